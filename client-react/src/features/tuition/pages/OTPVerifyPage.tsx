@@ -20,6 +20,7 @@ export function OTPVerifyPage() {
   const [student, setStudent] = useState<Student | null>(null);
   const [otp, setOtp] = useState('');
   const [generatedOTP, setGeneratedOTP] = useState('');
+  const [otpChallenge, setOtpChallenge] = useState<string | undefined>(undefined);
   const [otpSent, setOtpSent] = useState(false);
   const [isProcessing, setIsProcessing] = useState(false);
   const [isVerifying, setIsVerifying] = useState(false);
@@ -63,6 +64,7 @@ export function OTPVerifyPage() {
 
       const newOTP = generateResponse.data.otp || '';
       setGeneratedOTP(newOTP);
+      setOtpChallenge(generateResponse.data.challenge);
       console.log('✅ OTP đã tạo:', newOTP);
 
       // 2. Tự động gửi email (không cần user click)
@@ -101,17 +103,22 @@ export function OTPVerifyPage() {
     try {
       console.log('🔐 Đang xác thực OTP...');
 
-      // 1. Verify OTP
-      await verifyOTP({
+      // 1. Verify OTP (nhận payment_token gắn với sinh viên này)
+      const verifyResponse = await verifyOTP({
         user_id: currentUser.user_id,
         email: currentUser.email_address,
         otp: otp,
+        challenge: otpChallenge,
+        student_id: student.student_id,
       });
 
       console.log('✅ OTP hợp lệ, đang thanh toán...');
 
       // 2. Thanh toán học phí
-      const paymentResult = await payTuition({ student_id: student.student_id });
+      const paymentResult = await payTuition({
+        student_id: student.student_id,
+        payment_token: verifyResponse.data.payment_token,
+      });
 
       // 3. Cập nhật số dư
       currentUser.available_balance = paymentResult.remaining_balance;
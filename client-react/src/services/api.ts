@@ -60,6 +60,63 @@ const addAuthToken = (config: any) => {
   return config;
 };
 
+// ✅ Access token ngắn hạn (JWT_ACCESS_EXPIRES_MINUTES): khi gặp 401, đổi refresh token
+//    lấy access token mới qua /auth/refresh rồi gửi lại request một lần.
+//    Các request 401 đồng thời dùng chung một lần refresh (refresh token chỉ dùng được một lần).
+let refreshInFlight: Promise<string> | null = null;
+
+export const refreshAccessToken = (): Promise<string> => {
+  if (!refreshInFlight) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshInFlight = (refreshToken
+      ? axios.post(`${AUTH_API_URL}/auth/refresh`, { refresh_token: refreshToken }, { timeout: 10000 })
+          .then((response) => {
+            localStorage.setItem('token', response.data.token);
+            localStorage.setItem('refresh_token', response.data.refresh_token);
+            console.log('🔄 Access token refreshed');
+            return response.data.token as string;
+          })
+      : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+};
+
+const clearSessionAndRedirect = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('user');
+
+  if (window.location.pathname !== '/login') {
+    console.warn('⚠️ Redirecting to login...');
+    window.location.href = '/login';
+  }
+};
+
+// 401 → refresh + gửi lại request; refresh thất bại → xóa phiên, về trang login
+export const retryWithRefresh = (instance: any) => async (error: any) => {
+  const config = error.config;
+  const url: string = config?.url || '';
+  const isAuthCall = url.includes('/auth/login') || url.includes('/auth/refresh');
+
+  if (error.response?.status !== 401 || !config || config._retried || isAuthCall) {
+    return Promise.reject(error);
+  }
+
+  config._retried = true;
+  try {
+    const token = await refreshAccessToken();
+    config.headers.Authorization = `Bearer ${token}`;
+    return instance(config);
+  } catch (refreshError) {
+    console.warn('⚠️ Token refresh failed - clearing session');
+    clearSessionAndRedirect();
+    return Promise.reject(error);
+  }
+};
+
 // Response interceptor - Handle errors and log
 const handleResponse = (response: any) => {
   console.log('📥 Response Received:');
@@ -83,16 +140,9 @@ const handleResponseError = (error: any) => {
     console.error('   Method:', error.config?.method?.toUpperCase());
     console.error('   Data:', error.response.data);
     
-    // Handle 401 Unauthorized
+    // Handle 401 Unauthorized (retryWithRefresh đã thử refresh token trước đó)
     if (error.response.status === 401) {
-      console.warn('⚠️ Unauthorized - clearing token');
-      localStorage.removeItem('token');
-      localStorage.removeItem('user');
-      
-      if (window.location.pathname !== '/login') {
-        console.warn('⚠️ Redirecting to login...');
-        window.location.href = '/login';
-      }
+      console.warn('⚠️ Unauthorized - refresh not possible');
     }
     
     // Handle 404 Not Found
@@ -117,14 +167,11 @@ const handleResponseError = (error: any) => {
   return Promise.reject(error);
 };
 
-// Apply interceptors
-authApi.interceptors.request.use(addAuthToken);
-authApi.interceptors.response.use(handleResponse, handleResponseError);
-
-tuitionApi.interceptors.request.use(addAuthToken);
-tuitionApi.interceptors.response.use(handleResponse, handleResponseError);
-
-otpApi.interceptors.request.use(addAuthToken);
-otpApi.interceptors.response.use(handleResponse, handleResponseError);
+// Apply interceptors (đăng ký sau chạy sau: log lỗi trước, rồi mới refresh + retry)
+for (const instance of [authApi, tuitionApi, otpApi]) {
+  instance.interceptors.request.use(addAuthToken);
+  instance.interceptors.response.use(handleResponse, handleResponseError);
+  instance.interceptors.response.use(undefined, retryWithRefresh(instance));
+}
 
 export default { authApi, tuitionApi, otpApi };
\ No newline at end of file
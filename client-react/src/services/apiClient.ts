@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { retryWithRefresh } from './api';
 
 /**
  * Tạo một axios instance được cấu hình sẵn cho Auth Service
@@ -16,7 +17,7 @@ const apiClient = axios.create({
  */
 apiClient.interceptors.request.use(
   (config) => {
-    const token = localStorage.getItem('authToken');
+    const token = localStorage.getItem('token');
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
@@ -28,25 +29,8 @@ apiClient.interceptors.request.use(
 );
 
 /**
- * Interceptor cho Response
+ * Interceptor cho Response: 401 → refresh token (services/api.ts), chỉ về /login khi refresh thất bại
  */
-apiClient.interceptors.response.use(
-  (response) => {
-    return response;
-  },
-  (error) => {
-    if (error.response && error.response.status === 401) {
-      console.error("Lỗi 401: Unauthorized. Token không hợp lệ hoặc đã hết hạn.");
-      localStorage.removeItem('authToken');
-      localStorage.removeItem('user');
-      
-      if (window.location.pathname !== '/login') {
-        window.location.href = '/login';
-      }
-    }
-    
-    return Promise.reject(error);
-  }
-);
+apiClient.interceptors.response.use(undefined, retryWithRefresh(apiClient));
 
 export default apiClient;
\ No newline at end of file
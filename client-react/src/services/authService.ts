@@ -27,6 +27,8 @@ export interface LoginResponse {
   statusCode: number;
   message: string;
   token: string;
+  refresh_token?: string;
+  expires_in?: number;
   user: User;
 }
 
@@ -46,6 +48,10 @@ export const login = async (credentials: { username: string; password: string })
     if (response.data.success) {
       // Store token and user data
       localStorage.setItem('token', response.data.token);
+      // Access token ngắn hạn → api.ts dùng refresh token để lấy token mới khi gặp 401
+      if (response.data.refresh_token) {
+        localStorage.setItem('refresh_token', response.data.refresh_token);
+      }
       localStorage.setItem('user', JSON.stringify(response.data.user));
       
       return response.data;
@@ -161,6 +167,7 @@ export const getCurrentUser = (): User | null => {
 // ✅ LOGOUT
 export const logout = () => {
   localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
   localStorage.removeItem('user');
   console.log('🚪 User logged out');
 };
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { retryWithRefresh } from './api';
 import { PaymentHistoryResponse, PaymentStatisticsResponse } from '../types/payment';
 
 const TUITION_API_URL = import.meta.env.VITE_TUITION_API_URL || 'http://localhost:8001/api';
@@ -49,6 +50,7 @@ paymentApi.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+paymentApi.interceptors.response.use(undefined, retryWithRefresh(paymentApi));
 
 export const getPaymentHistory = async (
   limit: number = 50,
@@ -98,7 +98,8 @@ export const getUnpaidStudents = async (): Promise<Student[]> => {
   }
 };
 
-export const payTuition = async (paymentData: any) => {
+// payment_token: từ /otp/verify, Tuition Service từ chối thanh toán không có token (PAYMENT_OTP_TOKEN_REQUIRED)
+export const payTuition = async (paymentData: { student_id: string; payment_token?: string }) => {
   try {
     console.log('💳 Paying tuition:', paymentData);
     const response = await tuitionApi.post('/payments/pay', paymentData);
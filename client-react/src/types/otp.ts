@@ -5,6 +5,10 @@ export interface OTPRequest {
 
 export interface OTPVerifyRequest extends OTPRequest {
   otp: string;
+  // Challenge token từ /otp/generate (OTP service chạy OTP_MODE=stateless)
+  challenge?: string;
+  // Gắn payment_token với sinh viên sẽ thanh toán
+  student_id?: string;
 }
 
 export interface OTPResponse {
@@ -14,9 +18,13 @@ export interface OTPResponse {
     user_id: string;
     email: string;
     otp?: string;
+    challenge?: string;
     expires_in?: number;
     verified?: boolean;
     txn_id?: string;
+    // Token ủy quyền thanh toán, gửi kèm POST /payments/pay
+    payment_token?: string;
+    payment_token_expires_in?: number;
     timestamp: string;
   };
 }
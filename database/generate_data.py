@@ -0,0 +1,400 @@
+"""
+Sinh dữ liệu giả có thể tái lập (--seed) cho users / students / user_student_payment
+
+Tạo database mới từ database/schema.sql + database/migrations/*.sql rồi nạp:
+- N users: user_id USR00000000…, username user0…, email user0@example.com…,
+  cùng một password (mặc định "password123", hash bcrypt_sha256 như Auth Service)
+- M students: trải theo khoa, học kỳ (Spring/Summer/Fall) và năm, học phí theo khoa/năm
+- Lịch sử thanh toán: mỗi sinh viên đã đóng (--paid-ratio) có một dòng user_student_payment
+  trong khoảng đầu học kỳ; người trả tiền lệch về các user đầu danh sách (phụ huynh trả cho nhiều con)
+
+Nạp bằng LOAD DATA LOCAL INFILE (file TSV tạm); server tắt local_infile → INSERT nhiều dòng
+(executemany theo lô). Cùng --seed và cùng kích thước → cùng dữ liệu.
+
+Dùng chung cho benchmark / plan test:
+    from generate_data import connect, create_database, generate
+
+Chạy: python database/generate_data.py --users 100000 --students 1000000 [--seed 42]
+      [--database midterm_soa_scale] [--method auto|load|insert]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+
+SCHEMA = os.path.join(ROOT, "database", "schema.sql")
+MIGRATIONS_DIR = os.path.join(ROOT, "database", "migrations")
+SCALE_DB = os.getenv("SCALE_DB_NAME", "midterm_soa_scale")
+DEFAULT_PASSWORD = "password123"
+# Cho plan test / benchmark không cần login: bỏ qua bước tính bcrypt
+PLACEHOLDER_PASSWORD_HASH = "$bcrypt-sha256$v=2,t=2b,r=12$placeholder"
+
+# Số dòng sinh ra mỗi lượt; cố định để cùng seed luôn cho cùng dữ liệu
+CHUNK_ROWS = 50000
+
+USER_COLUMNS = ("user_id", "username", "email_address", "password", "full_name",
+                "phone_number", "available_balance", "created_at", "updated_at")
+STUDENT_COLUMNS = ("student_id", "full_name", "class", "faculty", "semester", "year",
+                   "tuition_amount", "is_payed", "created_at")
+PAYMENT_COLUMNS = ("user_id", "student_id", "payment_date")
+
+# (mã lớp, tên khoa, học phí một học kỳ năm đầu, tỉ trọng sinh viên)
+FACULTIES = [
+    ("CNTT", "Faculty of Information Technology", 15000000, 20),
+    ("KT", "Faculty of Economics", 13000000, 16),
+    ("QTKD", "Faculty of Business Administration", 14000000, 14),
+    ("DDT", "Faculty of Electrical and Electronic Engineering", 14500000, 10),
+    ("CK", "Faculty of Mechanical Engineering", 14000000, 8),
+    ("XD", "Faculty of Civil Engineering", 13500000, 8),
+    ("NN", "Faculty of Foreign Languages", 12000000, 10),
+    ("L", "Faculty of Law", 12500000, 6),
+    ("Y", "Faculty of Medicine", 25000000, 4),
+    ("TKDH", "Faculty of Graphic Design", 16000000, 4),
+]
+
+# (học kỳ, tháng bắt đầu, hệ số học phí, tỉ trọng)
+SEASONS = [("Spring", 2, 1.0, 45), ("Summer", 6, 0.4, 10), ("Fall", 9, 1.0, 45)]
+
+FAMILY_NAMES = [
+    ("Nguyễn", 38), ("Trần", 11), ("Lê", 9), ("Phạm", 7), ("Hoàng", 5), ("Huỳnh", 5),
+    ("Phan", 4), ("Vũ", 4), ("Võ", 4), ("Đặng", 2), ("Bùi", 2), ("Đỗ", 2), ("Hồ", 2),
+    ("Ngô", 2), ("Dương", 1), ("Lý", 1), ("Trương", 1), ("Đinh", 1), ("Lâm", 1), ("Mai", 1),
+]
+MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Minh", "Ngọc", "Thanh", "Đức", "Quốc", "Gia",
+                "Hoài", "Thu", "Anh", "Bảo", "Xuân", "Kim", "Công", "Phương", "Tuấn"]
+GIVEN_NAMES = ["An", "Bình", "Châu", "Cường", "Dũng", "Duy", "Giang", "Hà", "Hải", "Hạnh",
+               "Hiếu", "Hòa", "Hùng", "Huy", "Hương", "Khánh", "Khoa", "Lan", "Linh", "Long",
+               "Mai", "Minh", "Nam", "Ngân", "Nhung", "Phúc", "Phương", "Quân", "Quang", "Sơn",
+               "Tâm", "Thảo", "Thắng", "Thủy", "Tiến", "Trang", "Trung", "Tú", "Tuấn", "Việt",
+               "Vy", "Yến", "Đạt", "Ánh", "Ước", "Ơn"]
+
+
+def user_id(n: int) -> str:
+    return f"USR{n:08d}"
+
+
+def username(n: int) -> str:
+    return f"user{n}"
+
+
+def email_address(n: int) -> str:
+    return f"user{n}@example.com"
+
+
+def student_id(n: int) -> str:
+    return f"ST{n:08d}"
+
+
+# ----------------------------------------------------------------------
+# Schema
+# ----------------------------------------------------------------------
+
+def migrations() -> List[str]:
+    return [os.path.join(MIGRATIONS_DIR, name) for name in sorted(os.listdir(MIGRATIONS_DIR)) if name.endswith(".sql")]
+
+
+def run_sql_file(cursor, path: str):
+    with open(path, encoding="utf-8") as f:
+        text = "\n".join(line for line in f.read().splitlines() if not line.strip().startswith("--"))
+    for statement in text.split(";"):
+        if statement.strip():
+            cursor.execute(statement)
+
+
+def create_database(cursor, name: str):
+    """DROP + CREATE database `name`, USE nó, áp dụng schema.sql và mọi migration"""
+    cursor.execute(f"DROP DATABASE IF EXISTS `{name}`")
+    cursor.execute(f"CREATE DATABASE `{name}` CHARACTER SET utf8mb4")
+    cursor.execute(f"USE `{name}`")
+    run_sql_file(cursor, SCHEMA)
+    for path in migrations():
+        run_sql_file(cursor, path)
+
+
+def connect(database: Optional[str] = None):
+    """Connection pymysql tới server trong DB_* (bật local_infile, timeout dài cho lần nạp lớn)"""
+    import pymysql
+    from soa_common.db import DatabaseConfig
+
+    kwargs = DatabaseConfig.from_env().connect_kwargs()
+    kwargs["database"] = database
+    kwargs.update(read_timeout=600, write_timeout=600, autocommit=True, local_infile=True)
+    return pymysql.connect(**kwargs)
+
+
+# ----------------------------------------------------------------------
+# Sinh dòng
+# ----------------------------------------------------------------------
+
+def _weighted(items: List[tuple]) -> Tuple[list, list]:
+    """(giá trị, tỉ trọng cộng dồn) cho random.choices(cum_weights=...)"""
+    values, cumulative, total = [], [], 0
+    for *value, weight in items:
+        total += weight
+        values.append(value[0] if len(value) == 1 else tuple(value))
+        cumulative.append(total)
+    return values, cumulative
+
+
+def _full_names(rng: random.Random, count: int) -> List[str]:
+    families, family_weights = _weighted(FAMILY_NAMES)
+    family = rng.choices(families, cum_weights=family_weights, k=count)
+    middle = rng.choices(MIDDLE_NAMES, k=count)
+    given = rng.choices(GIVEN_NAMES, k=count)
+    return [f"{a} {b} {c}" for a, b, c in zip(family, middle, given)]
+
+
+# "HH:MM:SS" cho mọi giây trong ngày: timestamp = ngày + giờ, không format datetime cho từng dòng
+_TIMES_OF_DAY = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)]
+
+
+def _days(start: datetime, count: int) -> List[str]:
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(count)]
+
+
+def _random_timestamp(rng: random.Random, days: List[str]) -> str:
+    return f"{days[int(rng.random() * len(days))]} {_TIMES_OF_DAY[int(rng.random() * 86400)]}"
+
+
+def user_chunks(count: int, seed: int, password_hash: str, first_year: int) -> Iterator[List[tuple]]:
+    rng = random.Random(f"{seed}:users")
+    start = datetime(first_year - 1, 6, 1)
+    signup_days = _days(start, (datetime(first_year + 5, 1, 1) - start).days)
+    for offset in range(0, count, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, count - offset)
+        names = _full_names(rng, size)
+        rows = []
+        for i in range(size):
+            n = offset + i
+            created = _random_timestamp(rng, signup_days)
+            rows.append((
+                user_id(n), username(n), email_address(n), password_hash, names[i],
+                f"09{int(rng.random() * 1e8):08d}",
+                int(rng.random() * 200) * 500000,
+                created, created
+            ))
+        yield rows
+
+
+def _terms(years: Tuple[int, int]) -> Tuple[list, list]:
+    """Mọi học kỳ trong khoảng năm: (nhãn, năm, khóa, học phí theo khoa, ngày nhập học, ngày đóng tiền)"""
+    terms = []
+    for year in range(years[0], years[1] + 1):
+        for season, month, factor, weight in SEASONS:
+            start = datetime(year, month, 1)
+            # Học phí tăng ~5%/năm, làm tròn nghìn đồng
+            tuition = [round(base * factor * 1.05 ** (year - years[0]), -3) for _, _, base, _ in FACULTIES]
+            terms.append(((
+                f"{season} {year}", year, f"-K{year - 2006}", tuition,
+                _days(start - timedelta(days=30), 30), _days(start, 75)
+            ), weight))
+    return _weighted(terms)
+
+
+def student_chunks(count: int, users: int, seed: int, paid_ratio: float,
+                   years: Tuple[int, int]) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+    """(dòng students, dòng user_student_payment của các sinh viên đã đóng) theo từng lô"""
+    rng = random.Random(f"{seed}:students")
+    faculty_indexes, faculty_weights = _weighted([(i, weight) for i, (*_, weight) in enumerate(FACULTIES)])
+    terms, term_weights = _terms(years)
+    for offset in range(0, count, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, count - offset)
+        names = _full_names(rng, size)
+        chunk_faculties = rng.choices(faculty_indexes, cum_weights=faculty_weights, k=size)
+        chunk_terms = rng.choices(terms, cum_weights=term_weights, k=size)
+        students, payments = [], []
+        for i in range(size):
+            n = offset + i
+            sid = student_id(n)
+            faculty = chunk_faculties[i]
+            label, year, cohort, tuition, enrolled_days, payment_days = chunk_terms[i]
+            paid = rng.random() < paid_ratio
+            students.append((
+                sid, names[i], FACULTIES[faculty][0] + cohort, FACULTIES[faculty][1],
+                label, year, tuition[faculty], int(paid), _random_timestamp(rng, enrolled_days)
+            ))
+            if paid and users:
+                # rng^2 → user đầu danh sách trả cho nhiều sinh viên (phụ huynh, người bảo trợ)
+                payer = int(users * rng.random() ** 2)
+                payments.append((user_id(payer), sid, _random_timestamp(rng, payment_days)))
+        yield students, payments
+
+
+def default_password_hash(password: str = DEFAULT_PASSWORD) -> str:
+    """Hash giống hash_password của Auth Service (bcrypt_sha256, BCRYPT_ROUNDS) — tính một lần"""
+    from passlib.hash import bcrypt_sha256
+
+    return bcrypt_sha256.using(rounds=int(os.getenv("BCRYPT_ROUNDS", 12))).hash(password)
+
+
+# ----------------------------------------------------------------------
+# Nạp dữ liệu
+# ----------------------------------------------------------------------
+
+def _write_tsv(f, rows: List[tuple]):
+    # Generator không sinh NULL, chuỗi không chứa tab / xuống dòng / backslash → không cần escape
+    f.writelines("\t".join(map(str, row)) + "\n" for row in rows)
+
+
+def _read_tsv(path: str) -> Iterator[List[tuple]]:
+    with open(path, encoding="utf-8") as f:
+        chunk = []
+        for line in f:
+            chunk.append(tuple(line.rstrip("\n").split("\t")))
+            if len(chunk) == CHUNK_ROWS:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class _Loader:
+    """LOAD DATA LOCAL INFILE từ file TSV, hoặc INSERT nhiều dòng theo lô"""
+
+    def __init__(self, connection, method: str, directory: str):
+        self.connection = connection
+        self.method = method
+        self.directory = directory
+
+    def load(self, table: str, columns: tuple, chunks: Iterator[List[tuple]]) -> int:
+        if self.method == "insert":
+            return self._insert(table, columns, chunks)
+        path = os.path.join(self.directory, f"{table}.tsv")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            for chunk in chunks:
+                _write_tsv(f, chunk)
+        return self.load_file(table, columns, path)
+
+    def load_file(self, table: str, columns: tuple, path: str) -> int:
+        if self.method == "insert":
+            return self._insert(table, columns, _read_tsv(path))
+        try:
+            with self.connection.cursor() as cursor:
+                return cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+                    (path,)
+                )
+        except Exception as e:
+            if self.method == "load":
+                raise
+            # Server / client tắt local_infile → chuyển sang INSERT cho các bảng còn lại
+            print(f"   ⚠️  LOAD DATA LOCAL INFILE unavailable ({e}); falling back to batched INSERT")
+            self.method = "insert"
+            return self._insert(table, columns, _read_tsv(path))
+
+    def _insert(self, table: str, columns: tuple, chunks: Iterator[List[tuple]]) -> int:
+        # pymysql gộp executemany INSERT ... VALUES thành câu nhiều dòng (tối đa max_stmt_length)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        rows = 0
+        with self.connection.cursor() as cursor:
+            for chunk in chunks:
+                cursor.executemany(sql, chunk)
+                rows += len(chunk)
+        return rows
+
+
+def generate(connection, users: int, students: int, seed: int = 42, paid_ratio: float = 0.9,
+             years: Tuple[int, int] = (2021, 2025), method: str = "auto",
+             password_hash: Optional[str] = None) -> Dict[str, int]:
+    """
+    Nạp users / students / user_student_payment vào database hiện tại của connection
+    (đã có schema, xem create_database). Trả về số dòng mỗi bảng.
+    """
+    if password_hash is None:
+        password_hash = default_password_hash()
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+    try:
+        with tempfile.TemporaryDirectory(prefix="soa_data_") as directory:
+            loader = _Loader(connection, method, directory)
+            payments_path = os.path.join(directory, "user_student_payment.tsv")
+            payments_file = open(payments_path, "w", encoding="utf-8", newline="\n")
+
+            def students_only():
+                # Dòng thanh toán sinh cùng lúc với sinh viên, ghi tạm ra file để không giữ trong RAM
+                for student_rows, payment_rows in student_chunks(students, users, seed, paid_ratio, years):
+                    _write_tsv(payments_file, payment_rows)
+                    yield student_rows
+
+            def timed(table: str, load):
+                started = time.perf_counter()
+                counts[table] = load()
+                elapsed = time.perf_counter() - started
+                rate = counts[table] / elapsed if elapsed else 0
+                print(f"   📥 {table}: {counts[table]:,} rows in {elapsed:.1f}s "
+                      f"({rate:,.0f} rows/s, {'INSERT' if loader.method == 'insert' else 'LOAD DATA'})")
+
+            with payments_file:
+                timed("users", lambda: loader.load("users", USER_COLUMNS,
+                                                   user_chunks(users, seed, password_hash, years[0])))
+                timed("students", lambda: loader.load("students", STUDENT_COLUMNS, students_only()))
+            timed("user_student_payment",
+                  lambda: loader.load_file("user_student_payment", PAYMENT_COLUMNS, payments_path))
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+    with connection.cursor() as cursor:
+        for table in counts:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reproducible users / students / payment history")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--students", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--paid-ratio", type=float, default=0.9, help="Tỷ lệ sinh viên đã đóng học phí")
+    parser.add_argument("--years", default="2021-2025", help="Khoảng năm học, ví dụ 2021-2025")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password chung của mọi user")
+    parser.add_argument("--database", default=SCALE_DB, help="Database đích (bị DROP và tạo lại)")
+    parser.add_argument("--method", choices=("auto", "load", "insert"), default="auto")
+    parser.add_argument("--env-file", default=os.path.join(ROOT, "service-tution-python", ".env"),
+                        help="Đọc DB_HOST / DB_USER / DB_PASSWORD từ file này")
+    parser.add_argument("--force", action="store_true", help="Cho phép ghi đè database của service (DB_NAME)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.env_file):
+        from dotenv import load_dotenv
+        load_dotenv(args.env_file)
+    if args.database == os.getenv("DB_NAME") and not args.force:
+        print(f"❌ `{args.database}` is the service database (DB_NAME); pass --force to drop and regenerate it")
+        return False
+    first_year, last_year = (int(value) for value in args.years.split("-"))
+
+    print("=" * 80)
+    print(f"🏭 GENERATE DATA — {args.users:,} users, {args.students:,} students, seed {args.seed}")
+    print("=" * 80)
+
+    started = time.perf_counter()
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            create_database(cursor, args.database)
+        print(f"\n📦 `{args.database}`: schema.sql + {len(migrations())} migrations applied")
+        counts = generate(
+            connection, args.users, args.students, seed=args.seed, paid_ratio=args.paid_ratio,
+            years=(first_year, last_year), method=args.method,
+            password_hash=default_password_hash(args.password)
+        )
+    finally:
+        connection.close()
+
+    print("\n" + "=" * 80)
+    print(f"✅ {sum(counts.values()):,} rows in {time.perf_counter() - started:.1f}s "
+          f"(login: user0 / {args.password})")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,14 @@
+-- Indexes cho bảng otp_codes
+--
+-- idx_otp_codes_email_verified_created: lookup trong verify_otp
+--   WHERE email = ? AND verified = 0 ORDER BY created_at DESC LIMIT 1
+--   và DELETE ... WHERE email = ? AND verified = 0 trong send_otp
+--   → index seek + đọc ngược index, không cần filesort.
+--
+-- idx_otp_codes_expires_at: janitor xóa theo batch
+--   DELETE FROM otp_codes WHERE expires_at < ? ORDER BY expires_at LIMIT ?
+--   → range scan trên index thay vì quét toàn bảng.
+
+ALTER TABLE otp_codes
+    ADD INDEX idx_otp_codes_email_verified_created (email, verified, created_at),
+    ADD INDEX idx_otp_codes_expires_at (expires_at);
@@ -0,0 +1,18 @@
+-- Danh sách JWT đã thu hồi (Auth Service ghi, Auth + Tuition Service đồng bộ về Bloom filter cục bộ)
+--
+-- id tăng dần: các service đồng bộ incremental bằng WHERE id > last_seen_id - overlap
+-- (đọc lại vài id cuối vì AUTO_INCREMENT có thể commit không theo thứ tự).
+-- uq_revoked_tokens_jti: kiểm tra authoritative khi Bloom filter báo "có thể đã thu hồi".
+-- idx_revoked_tokens_expires_at: rebuild filter chỉ nạp token chưa hết hạn, dọn dòng cũ.
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    jti VARCHAR(64) NOT NULL,
+    user_id VARCHAR(50) NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    reason VARCHAR(100) NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_revoked_tokens_jti (jti),
+    KEY idx_revoked_tokens_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,21 @@
+-- Refresh token dạng opaque (Auth Service)
+--
+-- Chỉ lưu sha256(token): token ngẫu nhiên 256-bit nên hash nhanh là đủ, không cần bcrypt.
+-- family_id: mọi token sinh ra từ cùng một lần login. Token đã dùng (used_at) bị gửi lại
+--   → coi như bị đánh cắp, thu hồi cả family.
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    token_hash CHAR(64) NOT NULL,
+    family_id CHAR(32) NOT NULL,
+    user_id VARCHAR(50) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    used_at DATETIME NULL,
+    revoked_at DATETIME NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_refresh_tokens_token_hash (token_hash),
+    KEY idx_refresh_tokens_family_id (family_id),
+    KEY idx_refresh_tokens_user_id (user_id),
+    KEY idx_refresh_tokens_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,7 @@
+-- users.balance_version: tăng 1 mỗi khi available_balance thay đổi (pay_tuition)
+--
+-- Auth Service đưa giá trị này vào ETag của GET /api/auth/profile; client gửi lại
+-- qua If-None-Match và nhận 304 khi số dư chưa đổi, không cần đọc có khóa (FOR UPDATE).
+
+ALTER TABLE users
+    ADD COLUMN balance_version INT UNSIGNED NOT NULL DEFAULT 0 AFTER available_balance;
@@ -0,0 +1,12 @@
+-- Unique index cho các cột dùng để đăng nhập / kiểm tra trùng khi đăng ký
+--
+-- Login theo username  → một lần seek trên uq_users_username.
+-- Login theo email     → UNION ALL hai lần seek (email trước, username sau), thay cho
+--                        WHERE email_address = ? OR username = ? (index merge / full scan).
+-- Đăng ký dựa vào các ràng buộc này để phát hiện trùng (duplicate key).
+--
+-- Kiểm tra plan: service-auth-fastapi/test_login_query_plan.py
+
+ALTER TABLE users
+    ADD UNIQUE INDEX uq_users_username (username),
+    ADD UNIQUE INDEX uq_users_email_address (email_address);
@@ -0,0 +1,5 @@
+-- users.password đủ dài cho hash bcrypt_sha256 (~82 ký tự) và hash đã bọc
+-- $wrap$<salt bcrypt cũ>$<bcrypt_sha256> (~118 ký tự) của migrate_password_hashes.py
+
+ALTER TABLE users
+    MODIFY COLUMN password VARCHAR(255) NOT NULL;
@@ -0,0 +1,11 @@
+-- Danh sách sinh viên chưa đóng học phí (Tuition Service, get_unpaid_students)
+--
+--   SELECT ... FROM students WHERE is_payed = 0 ORDER BY student_id
+--
+-- idx_students_is_payed_student_id: ref trên is_payed = 0 và đọc theo thứ tự
+--   student_id của index → không quét toàn bảng, không filesort.
+--
+-- Kiểm tra plan: database/test_query_plans.py
+
+ALTER TABLE students
+    ADD INDEX idx_students_is_payed_student_id (is_payed, student_id);
@@ -0,0 +1,16 @@
+-- Lịch sử thanh toán (Tuition Service)
+--
+-- idx_user_student_payment_user_date: get_payment_history / get_payment_statistics
+--   WHERE ph.user_id = ? ORDER BY ph.payment_date DESC
+--   → ref trên user_id, đọc ngược index theo payment_date, không filesort.
+--   (index chỉ có user_id mà khóa ngoại tự tạo vẫn phải filesort theo payment_date)
+--
+-- idx_user_student_payment_date: get_all_payment_history
+--   ORDER BY ph.payment_date DESC LIMIT ?
+--   → đọc ngược index, dừng sau LIMIT dòng.
+--
+-- Kiểm tra plan: database/test_query_plans.py
+
+ALTER TABLE user_student_payment
+    ADD INDEX idx_user_student_payment_user_date (user_id, payment_date),
+    ADD INDEX idx_user_student_payment_date (payment_date);
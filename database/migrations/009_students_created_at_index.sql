@@ -0,0 +1,14 @@
+-- Đồng bộ incremental của index tên sinh viên (Tuition Service, app/utils/student_index.py)
+--
+--   SELECT MAX(created_at) FROM students
+--   SELECT ... FROM students WHERE (created_at, student_id) > (%s, %s)
+--   ORDER BY created_at, student_id LIMIT %s
+--
+-- idx_students_created_at_student_id: MAX đọc từ index, poll là range scan đọc
+--   theo thứ tự index → không quét toàn bảng, không filesort.
+--   (pay_tuition cũng đặt created_at = NOW() nên index được cập nhật khi thanh toán.)
+--
+-- Kiểm tra plan: database/test_query_plans.py
+
+ALTER TABLE students
+    ADD INDEX idx_students_created_at_student_id (created_at, student_id);
@@ -0,0 +1,63 @@
+-- Schema gốc của database midterm_soa (Auth, Tuition, OTP dùng chung)
+--
+-- Cài mới: chạy file này rồi lần lượt database/migrations/001 … 00N theo thứ tự số.
+-- Các migration ALTER/CREATE thêm index và bảng mới lên schema này, nên đây là
+-- trạng thái trước migration 001 (không sửa file này khi thêm migration mới).
+--
+--   mysql midterm_soa < database/schema.sql
+--   for f in database/migrations/*.sql; do mysql midterm_soa < "$f"; done
+--
+-- database/generate_data.py dựng database theo đúng thứ tự đó rồi nạp dữ liệu giả;
+-- database/test_query_plans.py dùng nó để kiểm tra EXPLAIN của mọi câu SQL trong controller.
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id VARCHAR(50) NOT NULL,
+    username VARCHAR(50) NOT NULL,
+    email_address VARCHAR(100) NOT NULL,
+    password VARCHAR(100) NOT NULL,
+    full_name VARCHAR(100) NULL,
+    phone_number VARCHAR(20) NULL,
+    available_balance DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS students (
+    student_id VARCHAR(20) NOT NULL,
+    full_name VARCHAR(100) NOT NULL,
+    class VARCHAR(20) NOT NULL,
+    faculty VARCHAR(100) NOT NULL,
+    -- "Fall 2024", "Spring 2025", … (StudentBase.semester)
+    semester VARCHAR(20) NOT NULL,
+    year SMALLINT UNSIGNED NOT NULL,
+    tuition_amount DECIMAL(15, 2) NOT NULL,
+    is_payed TINYINT(1) NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Optimistic lock của pay_tuition (UPDATE ... WHERE version = %s)
+    version INT UNSIGNED NOT NULL DEFAULT 1,
+    PRIMARY KEY (student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS user_student_payment (
+    payment_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    user_id VARCHAR(50) NOT NULL,
+    student_id VARCHAR(20) NOT NULL,
+    payment_date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (payment_id),
+    KEY fk_user_student_payment_student (student_id),
+    CONSTRAINT fk_user_student_payment_user FOREIGN KEY (user_id) REFERENCES users (user_id),
+    CONSTRAINT fk_user_student_payment_student FOREIGN KEY (student_id) REFERENCES students (student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS otp_codes (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    email VARCHAR(100) NOT NULL,
+    otp_code VARCHAR(10) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    attempts INT UNSIGNED NOT NULL DEFAULT 0,
+    verified TINYINT(1) NOT NULL DEFAULT 0,
+    verified_at DATETIME NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,417 @@
+"""
+Regression test cho plan của mọi câu SQL trong code (EXPLAIN FORMAT=JSON)
+
+1. Lấy câu SQL từ mọi lời gọi cursor.execute / executemany trong controller,
+   route, service và utils của ba service bằng AST (không import code service).
+   Hằng số SQL ở cấp module (LOGIN_BY_USERNAME_SQL, f-string ghép hằng số) được
+   giải ra; SQL ghép động (IN ({placeholders}), tên cột biến) được liệt kê là "dynamic".
+2. Dựng database tạm: database/schema.sql + database/migrations/*.sql theo thứ tự,
+   nạp users / students / lịch sử thanh toán bằng database/generate_data.py, thêm
+   token / OTP giả (kích thước chỉnh được), ANALYZE TABLE.
+3. EXPLAIN FORMAT=JSON từng câu với tham số mẫu theo tên cột; FAIL khi plan có
+   quét toàn bảng (access_type ALL, hoặc full index scan không có LIMIT) hay
+   filesort, trừ các trường hợp đã ghi trong ALLOWED kèm lý do.
+
+Chạy được với MySQL 8 và MariaDB 10.6+. Cần quyền CREATE DATABASE.
+Chạy: python database/test_query_plans.py [--users 100000] [--students 200000] [--keep]
+      python database/test_query_plans.py --list     (chỉ in các câu SQL, không cần DB)
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+
+from soa_common.db import normalize_sql  # noqa: E402
+from generate_data import (  # noqa: E402
+    PLACEHOLDER_PASSWORD_HASH, connect, create_database, email_address, generate, migrations,
+    student_id, user_id, username
+)
+
+SCRATCH_DB = os.getenv("PLAN_TEST_DB_NAME", "midterm_soa_plan_test")
+
+# Thư mục chứa code chạy SQL trên MySQL
+SOURCES = [
+    "service-auth-fastapi/app/controllers",
+    "service-auth-fastapi/app/routes",
+    "service-auth-fastapi/app/utils",
+    "service-tution-python/app/controllers",
+    "service-tution-python/app/routes",
+    "service-tution-python/app/utils",
+    "service-otp-python/app/controllers",
+    "service-otp-python/app/services",
+    "shared/soa_common",
+]
+# email_outbox.py dùng SQLite, không phải MySQL
+SKIP_FILES = {"email_outbox.py"}
+
+# (hàm, loại vấn đề) → lý do chấp nhận
+ALLOWED = {
+    ("get_all_students", "full_scan"): "trả về toàn bộ bảng theo thứ tự khóa chính",
+    ("find_login_user", "filesort"): "ORDER BY match_priority chỉ sắp xếp tối đa 2 dòng của UNION ALL",
+}
+
+# Hàm có SQL chưa chạy được → không EXPLAIN (hàm → lý do)
+SKIPPED = {
+    "get_all_payment_history": "SQL còn dở ('...', biến user_id chưa có); /payments/history/all cần kiểm tra quyền admin trước khi sửa",
+}
+
+# Giá trị mẫu cho placeholder theo tên cột đứng trước nó
+NOW = datetime.now().replace(microsecond=0)
+SAMPLE_VALUES = {
+    "user_id": user_id(42),
+    "student_id": student_id(42),
+    "username": username(42),
+    "email_address": email_address(42),
+    "email": email_address(42),
+    "token_hash": "0" * 64,
+    "family_id": "0" * 32,
+    "jti": "0" * 32,
+    "id": 42,
+    "version": 1,
+    "is_payed": 0,
+    "verified": 0,
+    "attempts": 0,
+    "expires_at": NOW,
+    "payment_date": NOW,
+    "created_at": NOW,
+    "updated_at": NOW,
+    "verified_at": NOW,
+    "available_balance": 50000000,
+    "__limit__": 100,
+}
+
+
+class Statement:
+    def __init__(self, sql: Optional[str], path: str, line: int, function: str, source: str = ""):
+        self.sql = sql
+        self.fingerprint = normalize_sql(sql) if sql else None
+        self.locations = [(path, line, function)]
+        self.source = source
+
+    @property
+    def functions(self) -> set:
+        return {function for _, _, function in self.locations}
+
+    def where(self) -> str:
+        return ", ".join(f"{path}:{line} {function}()" for path, line, function in self.locations)
+
+
+# ----------------------------------------------------------------------
+# Trích SQL bằng AST
+# ----------------------------------------------------------------------
+
+def _resolve(node, constants: Dict[str, str]) -> Optional[str]:
+    """Giá trị chuỗi của node nếu tính được tĩnh (hằng số, f-string ghép hằng số, phép +)"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            part = _resolve(value.value if isinstance(value, ast.FormattedValue) else value, constants)
+            if part is None:
+                return None
+            parts.append(part)
+        return "".join(parts)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _resolve(node.left, constants), _resolve(node.right, constants)
+        return left + right if left is not None and right is not None else None
+    return None
+
+
+class _SqlCollector(ast.NodeVisitor):
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.constants: Dict[str, str] = {}
+        self.functions: List[str] = []
+        self.statements: List[Statement] = []
+
+    def visit_Module(self, node):
+        for item in node.body:
+            if isinstance(item, ast.Assign) and len(item.targets) == 1 and isinstance(item.targets[0], ast.Name):
+                value = _resolve(item.value, self.constants)
+                if value is not None:
+                    self.constants[item.targets[0].id] = value
+        self.generic_visit(node)
+
+    def _visit_function(self, node):
+        self.functions.append(node.name)
+        self.generic_visit(node)
+        self.functions.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in ("execute", "executemany") and node.args:
+            function = self.functions[-1] if self.functions else "<module>"
+            sql = _resolve(node.args[0], self.constants)
+            self.statements.append(Statement(
+                sql, self.path, node.lineno, function,
+                source=ast.get_source_segment(self.source, node.args[0]) or ""
+            ))
+        self.generic_visit(node)
+
+
+def extract_statements(root: str = ROOT):
+    """(câu SQL tĩnh đã gộp theo fingerprint, câu SQL động)"""
+    by_fingerprint: Dict[str, Statement] = {}
+    dynamic: List[Statement] = []
+    for directory in SOURCES:
+        base = os.path.join(root, directory)
+        if not os.path.isdir(base):
+            continue
+        for name in sorted(os.listdir(base)):
+            if not name.endswith(".py") or name in SKIP_FILES:
+                continue
+            path = os.path.join(base, name)
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+            collector = _SqlCollector(os.path.relpath(path, root), source)
+            collector.visit(ast.parse(source))
+            for statement in collector.statements:
+                if statement.sql is None:
+                    dynamic.append(statement)
+                elif statement.fingerprint in by_fingerprint:
+                    by_fingerprint[statement.fingerprint].locations.extend(statement.locations)
+                else:
+                    by_fingerprint[statement.fingerprint] = statement
+    return list(by_fingerprint.values()), dynamic
+
+
+# ----------------------------------------------------------------------
+# Tham số mẫu + phân tích plan
+# ----------------------------------------------------------------------
+
+_INSERT_COLUMNS = re.compile(r"INSERT\s+(?:IGNORE\s+)?INTO\s+\w+\s*\(([^)]*)\)\s*VALUES", re.I | re.S)
+_COLUMN_BEFORE = re.compile(r"(\w+)\s*(?:=|<=|>=|<|>|LIKE)\s*$", re.I)
+_LIMIT_BEFORE = re.compile(r"(?:LIMIT|OFFSET)\s*$", re.I)
+# So sánh theo bộ cột: (created_at, student_id) > (%s, %s)
+_ROW_BEFORE = re.compile(r"\(([\w\s,]+)\)\s*(?:=|<=|>=|<|>)\s*\(((?:%s\s*,\s*)*)$", re.I)
+
+
+def sample_args(sql: str) -> tuple:
+    """Một giá trị mẫu cho mỗi %s, chọn theo cột đứng trước placeholder"""
+    insert = _INSERT_COLUMNS.search(sql)
+    insert_columns = [column.strip() for column in insert.group(1).split(",")] if insert else []
+    args = []
+    for match in re.finditer(r"%s", sql):
+        before = sql[:match.start()]
+        if insert and match.start() > insert.end() and len(args) < len(insert_columns):
+            column = insert_columns[len(args)]
+        elif _LIMIT_BEFORE.search(before):
+            column = "__limit__"
+        elif (row := _ROW_BEFORE.search(before)) is not None:
+            columns = [column.strip() for column in row.group(1).split(",")]
+            position = row.group(2).count("%s")
+            column = columns[position] if position < len(columns) else None
+        else:
+            found = _COLUMN_BEFORE.search(before)
+            column = found.group(1) if found else None
+        # Không biết cột → chuỗi "1": so sánh được với cả cột số lẫn cột chuỗi mà không mất index
+        args.append(SAMPLE_VALUES.get(column, "1"))
+    return tuple(args)
+
+
+def is_plain_insert(sql: str) -> bool:
+    """INSERT ... VALUES không đọc bảng nào → không có plan để kiểm tra"""
+    return bool(re.match(r"\s*INSERT\b", sql, re.I)) and not re.search(r"\bSELECT\b", sql, re.I)
+
+
+def plan_tables(plan) -> List[dict]:
+    """Mọi node bảng (table_name + access_type) trong plan JSON"""
+    found = []
+    if isinstance(plan, dict):
+        if "table_name" in plan and "access_type" in plan:
+            found.append(plan)
+        for value in plan.values():
+            found.extend(plan_tables(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            found.extend(plan_tables(value))
+    return found
+
+
+def has_filesort(plan) -> bool:
+    """MySQL: "using_filesort": true; MariaDB: node "filesort" / "read_sorted_file" """
+    if isinstance(plan, dict):
+        if plan.get("using_filesort") is True or "filesort" in plan or "read_sorted_file" in plan:
+            return True
+        return any(has_filesort(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(has_filesort(value) for value in plan)
+    return False
+
+
+def plan_problems(plan, sql: str) -> List[tuple]:
+    """[(loại, mô tả)] — loại: full_scan | filesort"""
+    problems = []
+    has_limit = re.search(r"\bLIMIT\b", sql, re.I) is not None
+    for table in plan_tables(plan):
+        access_type = table["access_type"]
+        if access_type == "ALL" or (access_type == "index" and not has_limit):
+            problems.append(("full_scan", f"{table['table_name']} via {access_type} (key={table.get('key')})"))
+    if has_filesort(plan):
+        problems.append(("filesort", "filesort"))
+    return problems
+
+
+def summarize(plan) -> str:
+    return ", ".join(f"{t['table_name']}:{t['access_type']}({t.get('key') or '-'})" for t in plan_tables(plan)) or "-"
+
+
+# ----------------------------------------------------------------------
+# Database tạm
+# ----------------------------------------------------------------------
+
+def seed_tokens(cursor, users: int, tokens: int):
+    """refresh_tokens / revoked_tokens / otp_codes bằng INSERT ... SELECT từ bảng số"""
+    digits = max(1, math.ceil(math.log10(max(tokens, 2))))
+    cursor.execute("CREATE TABLE digits (d INT NOT NULL)")
+    cursor.execute("INSERT INTO digits VALUES (0),(1),(2),(3),(4),(5),(6),(7),(8),(9)")
+    expression = " + ".join(f"d{i}.d * {10 ** i}" for i in range(digits))
+    tables = ", ".join(f"digits d{i}" for i in range(digits))
+    cursor.execute(
+        f"CREATE TABLE numbers (n INT NOT NULL PRIMARY KEY) "
+        f"SELECT n FROM (SELECT {expression} AS n FROM {tables}) x WHERE n < %s",
+        (tokens,)
+    )
+    # user_id / email cùng định dạng với generate_data.user_id / email_address
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    cursor.execute(
+        """
+        INSERT INTO refresh_tokens (token_hash, family_id, user_id, expires_at, used_at, revoked_at)
+        SELECT SHA2(n, 256), MD5(n DIV 4), CONCAT('USR', LPAD(n % %s, 8, '0')),
+               NOW() + INTERVAL (n % 30) - 20 DAY,
+               IF(n % 4 < 3, NOW(), NULL), IF(n % 50 = 0, NOW(), NULL)
+        FROM numbers
+        """,
+        (users,)
+    )
+    # Phần lớn token đã thu hồi đã hết hạn (access token sống 15 phút)
+    cursor.execute(
+        """
+        INSERT INTO revoked_tokens (jti, user_id, expires_at, reason)
+        SELECT MD5(CONCAT('jti', n)), CONCAT('USR', LPAD(n % %s, 8, '0')),
+               NOW() + INTERVAL 15 MINUTE - INTERVAL (n % 100) HOUR, 'logout'
+        FROM numbers
+        """,
+        (users,)
+    )
+    # Phần lớn OTP còn hạn (janitor xóa dần phần hết hạn)
+    cursor.execute(
+        """
+        INSERT INTO otp_codes (email, otp_code, expires_at, attempts, verified, created_at)
+        SELECT CONCAT('user', n % %s, '@example.com'), LPAD(n % 1000000, 6, '0'),
+               NOW() + INTERVAL (n % 20) - 1 MINUTE, 0, n % 4 = 0,
+               NOW() - INTERVAL (n % 600) SECOND
+        FROM numbers
+        """,
+        (users,)
+    )
+    cursor.execute("SET SESSION foreign_key_checks = 1")
+    for table in ("refresh_tokens", "revoked_tokens", "otp_codes"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN regression test for every SQL statement in the services")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--tokens", type=int, default=50000, help="Số dòng refresh_tokens / revoked_tokens / otp_codes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--paid-ratio", type=float, default=0.9, help="Tỷ lệ sinh viên đã đóng học phí")
+    parser.add_argument("--env-file", default=os.path.join(ROOT, "service-tution-python", ".env"),
+                        help="Đọc DB_HOST / DB_USER / DB_PASSWORD từ file này")
+    parser.add_argument("--list", action="store_true", help="Chỉ in các câu SQL tìm được")
+    parser.add_argument("--keep", action="store_true", help="Giữ lại database tạm sau khi chạy")
+    args = parser.parse_args()
+
+    statements, dynamic = extract_statements()
+
+    print("=" * 80)
+    print(f"🧪 QUERY PLAN TEST — {len(statements)} statements, {len(dynamic)} dynamic")
+    print("=" * 80)
+
+    if args.list:
+        for statement in statements:
+            print(f"\n📄 {statement.where()}\n   {statement.fingerprint}\n   args: {sample_args(statement.sql)}")
+        for statement in dynamic:
+            print(f"\n🔀 dynamic: {statement.where()}\n   {statement.source}")
+        return True
+
+    if os.path.exists(args.env_file):
+        from dotenv import load_dotenv
+        load_dotenv(args.env_file)
+
+    connection = connect()
+    cursor = connection.cursor()
+    failures = []
+    try:
+        create_database(cursor, SCRATCH_DB)
+        print(f"\n📦 schema.sql + {len(migrations())} migrations applied")
+        generate(connection, args.users, args.students, seed=args.seed, paid_ratio=args.paid_ratio,
+                 password_hash=PLACEHOLDER_PASSWORD_HASH)
+        seed_tokens(cursor, args.users, args.tokens)
+        print(f"🌱 Seeded {args.users:,} users, {args.students:,} students, {args.tokens:,} tokens/OTPs")
+
+        for statement in statements:
+            skipped = [SKIPPED[function] for function in statement.functions if function in SKIPPED]
+            if skipped and len(skipped) == len(statement.functions):
+                print(f"\n⏭️  {statement.where()}\n   skipped: {skipped[0]}")
+                continue
+            if is_plain_insert(statement.sql):
+                print(f"\n⏭️  {statement.where()}\n   INSERT ... VALUES (no plan)")
+                continue
+            try:
+                cursor.execute("EXPLAIN FORMAT=JSON " + statement.sql, sample_args(statement.sql))
+                plan = json.loads(cursor.fetchone()[0])
+            except Exception as e:
+                failures.append(f"   ❌ {statement.where()}: EXPLAIN failed: {e}")
+                print(f"\n❌ {statement.where()}\n   EXPLAIN failed: {e}")
+                continue
+
+            problems = []
+            for kind, detail in plan_problems(plan, statement.sql):
+                reasons = [ALLOWED[(function, kind)] for function in statement.functions if (function, kind) in ALLOWED]
+                if reasons:
+                    detail += f" — allowed: {reasons[0]}"
+                else:
+                    failures.append(f"   ❌ {statement.where()}: {detail}\n      {statement.fingerprint[:160]}")
+                problems.append(detail)
+
+            icon = "❌" if any("allowed" not in problem for problem in problems) else "✅"
+            print(f"\n{icon} {statement.where()}\n   {summarize(plan)}")
+            for problem in problems:
+                print(f"   • {problem}")
+
+        for statement in dynamic:
+            print(f"\n🔀 {statement.where()}\n   dynamic SQL, not checked: {statement.source[:120]}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{SCRATCH_DB}`")
+        cursor.close()
+        connection.close()
+
+    print("\n" + "=" * 80)
+    if failures:
+        print("⚠️  QUERY PLAN REGRESSION!")
+        print("\n".join(failures))
+        return False
+    print("🎉 NO FULL SCANS OR FILESORTS OUTSIDE THE ALLOWED LIST")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
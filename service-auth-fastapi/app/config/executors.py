@@ -0,0 +1,38 @@
+from fastapi import HTTPException
+from dotenv import load_dotenv
+import os
+
+from app.config.database import config
+from soa_common.executors import BlockingExecutor, ExecutorGroup, ExecutorSaturated
+
+load_dotenv()
+
+# ✅ Việc blocking chạy trong executor riêng theo loại, không chạy trên event loop:
+# - database: controller dùng pymysql, một worker cho mỗi connection của pool
+# - hashing: bcrypt (~250ms CPU mỗi lần), một worker cho mỗi CPU; login/register
+#   gọi từ worker database nên connection không bị giữ trong lúc hash
+# - bulk: POST /admin/bulk-register (tới 10.000 bcrypt, vài phút), tách riêng để
+#   không chiếm worker database của login / profile
+executors = ExecutorGroup(
+    BlockingExecutor.from_env("database", default_workers=config.max_size, default_queue=config.max_size * 4),
+    BlockingExecutor.from_env("hashing", default_workers=os.cpu_count() or 1, default_queue=64),
+    BlockingExecutor.from_env("bulk", default_workers=1, default_queue=2)
+)
+
+
+async def run_blocking(subsystem: str, fn, *args, **kwargs):
+    """await run_blocking("database", controller, ...) — hàng đợi đầy → 503"""
+    try:
+        return await executors[subsystem].run(fn, *args, **kwargs)
+    except ExecutorSaturated as e:
+        print(f"⚠️ {e}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "statusCode": 503,
+                "message": "Service is busy, please retry shortly",
+                "error": "EXECUTOR_SATURATED"
+            },
+            headers={"Retry-After": "1"}
+        )
@@ -1,48 +1,198 @@
-from passlib.context import CryptContext
 from fastapi import HTTPException
-from app.config.database import get_db_connection, db, refresh_connections
-from app.utils.jwt_helper import create_access_token
+from app.config.database import db
+from app.utils.jwt_helper import (
+    create_access_token,
+    create_refresh_token,
+    role_for,
+    hash_refresh_token,
+    ACCESS_TOKEN_EXPIRES_MINUTES,
+    REFRESH_TOKEN_EXPIRES_DAYS
+)
+from app.config.revocation import revocation_list
+from app.utils.password_helper import hash_password, verify_and_update
+from app.utils.bulk_register import bulk_register, BULK_REGISTER_WORKERS
+from app.config.executors import executors
+from soa_common.executors import ExecutorSaturated
+import hashlib
 import pymysql
 import uuid
-from datetime import datetime
-from app.models.user import LoginRequest, LoginResponse, RegisterRequest, User
+from datetime import datetime, timedelta
+from app.models.user import LoginRequest, LoginResponse, RegisterRequest, User, RefreshResponse
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def issue_refresh_token(cursor, user_id: str, family_id: str = None) -> str:
+    """
+    Tạo refresh token mới và lưu sha256 của nó.
+    family_id = None → family mới (lần login mới); khi rotate thì giữ family cũ.
+    """
+    refresh_token = create_refresh_token()
+    cursor.execute(
+        """
+        INSERT INTO refresh_tokens (token_hash, family_id, user_id, expires_at)
+        VALUES (%s, %s, %s, %s)
+        """,
+        (
+            hash_refresh_token(refresh_token),
+            family_id or uuid.uuid4().hex,
+            user_id,
+            datetime.now() + timedelta(days=REFRESH_TOKEN_EXPIRES_DAYS)
+        )
+    )
+    return refresh_token
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    # ✅ Truncate password to 72 bytes for bcrypt compatibility
-    if len(password.encode('utf-8')) > 72:
-        password = password.encode('utf-8')[:72].decode('utf-8')
-    return pwd_context.hash(password)
+def _refresh_error(message: str, error: str):
+    return HTTPException(
+        status_code=401,
+        detail={
+            "success": False,
+            "statusCode": 401,
+            "message": message,
+            "error": error,
+            "redirect": "/login"
+        }
+    )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    # ✅ Truncate password to 72 bytes for bcrypt compatibility
-    if len(plain_password.encode('utf-8')) > 72:
-        plain_password = plain_password.encode('utf-8')[:72].decode('utf-8')
+def refresh_access_token(refresh_token: str):
+    """
+    Đổi refresh token lấy access token mới (rotate: token cũ chỉ dùng được một lần).
+    Token đã dùng bị gửi lại → thu hồi toàn bộ family (phát hiện token bị đánh cắp).
+    """
+    error = None
     
     try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        print(f"❌ Password verification error: {e}")
-        # Fallback to manual bcrypt verification
-        import bcrypt
-        try:
-            return bcrypt.checkpw(
-                plain_password.encode('utf-8'), 
-                hashed_password.encode('utf-8')
+        with db.transaction() as cursor:
+            cursor.execute(
+                """
+                SELECT t.id, t.family_id, t.user_id, t.expires_at, t.used_at, t.revoked_at,
+                       u.username, u.email_address
+                FROM refresh_tokens t
+                JOIN users u ON u.user_id = t.user_id
+                WHERE t.token_hash = %s
+                FOR UPDATE
+                """,
+                (hash_refresh_token(refresh_token),)
             )
-        except Exception as bcrypt_error:
-            print(f"❌ Bcrypt fallback error: {bcrypt_error}")
-            return False
+            record = cursor.fetchone()
+            
+            if not record:
+                error = _refresh_error("Invalid refresh token", "INVALID_REFRESH_TOKEN")
+            elif record['used_at'] is not None or record['revoked_at'] is not None:
+                # Reuse → thu hồi cả family (transaction vẫn commit để việc thu hồi có hiệu lực)
+                cursor.execute(
+                    """
+                    UPDATE refresh_tokens SET revoked_at = NOW()
+                    WHERE family_id = %s AND revoked_at IS NULL
+                    """,
+                    (record['family_id'],)
+                )
+                print(f"⚠️ Refresh token reuse detected for user {record['user_id']}, family revoked")
+                error = _refresh_error("Refresh token has already been used", "REFRESH_TOKEN_REUSED")
+            elif datetime.now() > record['expires_at']:
+                error = _refresh_error("Refresh token has expired", "REFRESH_TOKEN_EXPIRED")
+            else:
+                cursor.execute(
+                    "UPDATE refresh_tokens SET used_at = NOW() WHERE id = %s",
+                    (record['id'],)
+                )
+                new_refresh_token = issue_refresh_token(cursor, record['user_id'], record['family_id'])
+        
+        if error:
+            raise error
+        
+        access_token = create_access_token({
+            "user_id": record['user_id'],
+            "username": record['username'],
+            "email": record['email_address'],
+            "role": role_for(record['username'])
+        })
+        
+        return RefreshResponse(
+            success=True,
+            statusCode=200,
+            message="Token refreshed",
+            token=access_token,
+            refresh_token=new_refresh_token,
+            expires_in=ACCESS_TOKEN_EXPIRES_MINUTES * 60
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Refresh token error: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "statusCode": 500,
+                "message": "Failed to refresh token",
+                "error": str(e)
+            }
+        )
+
+def revoke_refresh_token_family(refresh_token: str) -> int:
+    """Thu hồi family của một refresh token (logout). Trả về số token bị thu hồi."""
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE refresh_tokens t
+            JOIN refresh_tokens current ON current.family_id = t.family_id
+            SET t.revoked_at = NOW()
+            WHERE current.token_hash = %s AND t.revoked_at IS NULL
+            """,
+            (hash_refresh_token(refresh_token),)
+        )
+        return cursor.rowcount
+
+# ✅ Login lookup: mỗi nhánh là một lần seek trên unique index
+#    (uq_users_username / uq_users_email_address), không dùng OR giữa hai cột.
+LOGIN_USER_COLUMNS = """
+    user_id, username, email_address, password, full_name,
+    phone_number, available_balance, created_at, updated_at
+"""
+
+LOGIN_BY_USERNAME_SQL = f"""
+    SELECT {LOGIN_USER_COLUMNS}
+    FROM users
+    WHERE username = %s
+"""
+
+# Có '@' → nhiều khả năng là email, nhưng username cũng có thể chứa '@':
+# ưu tiên khớp email, sau đó mới tới username.
+LOGIN_BY_EMAIL_OR_USERNAME_SQL = f"""
+    (SELECT 0 AS match_priority, {LOGIN_USER_COLUMNS}
+     FROM users WHERE email_address = %s)
+    UNION ALL
+    (SELECT 1 AS match_priority, {LOGIN_USER_COLUMNS}
+     FROM users WHERE username = %s)
+    ORDER BY match_priority
+    LIMIT 1
+"""
+
+def find_login_user(cursor, identifier: str):
+    """Tìm user theo username hoặc email bằng index seek"""
+    if "@" in identifier:
+        cursor.execute(LOGIN_BY_EMAIL_OR_USERNAME_SQL, (identifier, identifier))
+    else:
+        cursor.execute(LOGIN_BY_USERNAME_SQL, (identifier,))
+    return cursor.fetchone()
+
+def rehash_password(cursor, user_id: str, old_hash: str, new_hash: str):
+    """
+    Ghi hash mới sau khi login thành công.
+    Điều kiện password = old_hash: không ghi đè nếu password vừa được đổi bởi request khác.
+    """
+    try:
+        cursor.execute(
+            "UPDATE users SET password = %s WHERE user_id = %s AND password = %s",
+            (new_hash, user_id, old_hash)
+        )
+        if cursor.rowcount:
+            print(f"🔁 Password hash upgraded for user {user_id}")
+    except Exception as e:
+        # Không chặn login vì lỗi rehash, lần login sau sẽ thử lại
+        print(f"⚠️ Password rehash failed for user {user_id}: {e}")
 
 def login_user(credentials: LoginRequest):
     """Authenticate user and return JWT token"""
-    connection = None
-    cursor = None
-    
     try:
         print("\n" + "=" * 70)
         print(f"🔐 LOGIN ATTEMPT")
@@ -51,22 +201,9 @@ def login_user(credentials: LoginRequest):
         print(f"📝 Password length: {len(credentials.password)} chars")
         print("=" * 70)
         
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
         print(f"\n🔍 Searching for user in database...")
-        
-        # ✅ Updated SQL query based on new table structure
-        cursor.execute(
-            """
-            SELECT user_id, username, email_address, password, full_name, 
-                   phone_number, available_balance, created_at, updated_at
-            FROM users 
-            WHERE email_address = %s OR username = %s
-            """,
-            (credentials.username, credentials.username)
-        )
-        user = cursor.fetchone()
+        with db.cursor() as cursor:
+            user = find_login_user(cursor, credentials.username)
         
         if not user:
             print(f"❌ USER NOT FOUND")
@@ -95,7 +232,8 @@ def login_user(credentials: LoginRequest):
         print(f"\n🔐 Verifying password...")
         print(f"   Input password: '{credentials.password}'")
         
-        is_valid = verify_password(credentials.password, user['password'])
+        # ✅ bcrypt chạy trong executor hashing và không giữ connection của pool
+        is_valid, new_hash = executors["hashing"].call(verify_and_update, credentials.password, user['password'])
         print(f"   Password valid: {is_valid}")
         
         if not is_valid:
@@ -118,13 +256,22 @@ def login_user(credentials: LoginRequest):
         token_data = {
             "user_id": user['user_id'],
             "username": user['username'],
-            "email": user['email_address']
+            "email": user['email_address'],
+            "role": role_for(user['username'])
         }
         print(f"   Token payload: {token_data}")
         
         access_token = create_access_token(token_data)
         print(f"   Token created: {access_token[:50]}...")
         
+        with db.cursor() as cursor:
+            # ✅ Hash cũ (bcrypt cắt 72 byte, đã bọc offline, hoặc cost cũ) → thay bằng hash hiện tại
+            if new_hash:
+                rehash_password(cursor, user['user_id'], user['password'], new_hash)
+            
+            # ✅ Refresh token: client gọi /auth/refresh khi access token hết hạn, không cần login lại
+            refresh_token = issue_refresh_token(cursor, user['user_id'])
+        
         print(f"\n{'='*70}")
         print(f"✅ LOGIN SUCCESSFUL")
         print(f"{'='*70}")
@@ -138,6 +285,8 @@ def login_user(credentials: LoginRequest):
             statusCode=200,
             message="Login successful",
             token=access_token,
+            refresh_token=refresh_token,
+            expires_in=ACCESS_TOKEN_EXPIRES_MINUTES * 60,
             user=User(
                 user_id=user['user_id'],
                 username=user['username'],
@@ -148,7 +297,7 @@ def login_user(credentials: LoginRequest):
             )
         )
         
-    except HTTPException:
+    except (HTTPException, ExecutorSaturated):
         raise
     except Exception as e:
         print(f"\n❌ UNEXPECTED ERROR:")
@@ -168,20 +317,61 @@ def login_user(credentials: LoginRequest):
                 "error": str(e)
             }
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
 
 # ✅ Constants
 INITIAL_BALANCE = 50000000.0  # 50 million VND
 
+ER_DUP_ENTRY = 1062
+# Unique index → field trả về trong USER_EXISTS
+DUPLICATE_KEY_FIELDS = {
+    "uq_users_email_address": "email",
+    "uq_users_username": "username"
+}
+
+def is_duplicate_entry(error: pymysql.err.IntegrityError) -> bool:
+    return bool(error.args) and error.args[0] == ER_DUP_ENTRY
+
+def duplicate_key_field(error: pymysql.err.IntegrityError):
+    """
+    "Duplicate entry 'x' for key 'users.uq_users_username'" → "username"
+    None nếu không nhận ra unique index (index khác / tên index đổi).
+    """
+    message = str(error.args[1]) if len(error.args) > 1 else ""
+    key = message.rsplit("for key", 1)[-1].strip(" '`\"").split(".")[-1]
+    return DUPLICATE_KEY_FIELDS.get(key)
+
+def bulk_register_users(users: list, workers: int = None):
+    """Admin: đăng ký nhiều user (hash song song + INSERT theo batch)"""
+    try:
+        # ✅ Connection chỉ lấy cho bước lọc trùng và INSERT, không giữ trong lúc hash
+        result = bulk_register(
+            db,
+            [user.model_dump() for user in users],
+            workers=workers or BULK_REGISTER_WORKERS
+        )
+        print(f"✅ Bulk register: {result['inserted']}/{result['requested']} inserted {result['timings']}")
+        
+        return {
+            "success": True,
+            "statusCode": 200,
+            "message": f"Registered {result['inserted']} of {result['requested']} users",
+            "data": result
+        }
+        
+    except Exception as e:
+        print(f"❌ Bulk register error: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "statusCode": 500,
+                "message": "Bulk registration failed",
+                "error": str(e)
+            }
+        )
+
 def register_user(user_data: RegisterRequest):
     """Register new user"""
-    connection = None
-    cursor = None
-    
     try:
         print(f"\n{'='*70}")
         print(f"📝 REGISTERING NEW USER")
@@ -191,44 +381,9 @@ def register_user(user_data: RegisterRequest):
         print(f"   Full Name: {user_data.full_name}")
         print(f"   Phone: {getattr(user_data, 'phone_number', 'N/A')}")
         
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        # ✅ Check if user exists (username or email)
-        print(f"\n🔍 Checking for existing user...")
-        cursor.execute(
-            """
-            SELECT user_id, username, email_address 
-            FROM users 
-            WHERE email_address = %s OR username = %s
-            """,
-            (user_data.email_address, user_data.username)
-        )
-        existing_user = cursor.fetchone()
-        
-        if existing_user:
-            conflict_field = "email" if existing_user['email_address'] == user_data.email_address else "username"
-            print(f"❌ USER ALREADY EXISTS:")
-            print(f"   Conflict: {conflict_field}")
-            print(f"   Existing user: {existing_user['username']} ({existing_user['email_address']})")
-            print(f"{'='*70}\n")
-            
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "success": False,
-                    "statusCode": 400,
-                    "message": f"User with this {conflict_field} already exists",
-                    "error": "USER_EXISTS",
-                    "conflict_field": conflict_field
-                }
-            )
-        
-        print(f"✅ No existing user found - proceeding with registration")
-        
-        # ✅ Hash password
+        # ✅ Hash password (trước khi lấy connection, bcrypt không giữ connection)
         print(f"\n🔒 Hashing password...")
-        hashed_password = hash_password(user_data.password)
+        hashed_password = executors["hashing"].call(hash_password, user_data.password)
         print(f"   Password hashed: {hashed_password[:50]}...")
         
         # ✅ Generate UUID for user_id
@@ -238,64 +393,83 @@ def register_user(user_data: RegisterRequest):
         # ✅ Get current timestamp
         current_time = datetime.now()
         
-        # ✅ Start transaction
-        print(f"\n💾 Inserting user into database...")
-        connection.begin()
-        
-        # ✅ Insert user with all required fields
-        cursor.execute(
-            """
-            INSERT INTO users (
-                user_id, username, email_address, password, full_name, 
-                phone_number, available_balance, created_at, updated_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                user_data.username,
-                user_data.email_address,
-                hashed_password,
-                user_data.full_name,
-                getattr(user_data, 'phone_number', None),  # Optional field
-                INITIAL_BALANCE,
-                current_time,
-                current_time
+        with db.cursor() as cursor:
+            # ✅ Một INSERT duy nhất (autocommit): uq_users_username / uq_users_email_address
+            #    phát hiện trùng, kể cả khi hai request đăng ký cùng lúc
+            print(f"\n💾 Inserting user into database...")
+            cursor.execute(
+                """
+                INSERT INTO users (
+                    user_id, username, email_address, password, full_name, 
+                    phone_number, available_balance, created_at, updated_at
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    user_id,
+                    user_data.username,
+                    user_data.email_address,
+                    hashed_password,
+                    user_data.full_name,
+                    getattr(user_data, 'phone_number', None),  # Optional field
+                    INITIAL_BALANCE,
+                    current_time,
+                    current_time
+                )
             )
-        )
+            
+            print(f"✅ USER REGISTERED SUCCESSFULLY:")
+            print(f"   User ID: {user_id}")
+            print(f"   Username: {user_data.username}")
+            print(f"   Email: {user_data.email_address}")
+            print(f"   Initial Balance: {INITIAL_BALANCE:,.0f} VND")
+            print(f"{'='*70}\n")
+            
+            return {
+                "success": True,
+                "statusCode": 201,
+                "message": "User registered successfully",
+                "user": {
+                    "user_id": user_id,
+                    "username": user_data.username,
+                    "email_address": user_data.email_address,
+                    "full_name": user_data.full_name,
+                    "phone_number": getattr(user_data, 'phone_number', None),
+                    "available_balance": INITIAL_BALANCE,
+                    "created_at": current_time.isoformat()
+                }
+            }
         
-        # ✅ Commit transaction
-        connection.commit()
+    except pymysql.err.IntegrityError as e:
+        if not is_duplicate_entry(e):
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "success": False,
+                    "statusCode": 500,
+                    "message": "Registration failed",
+                    "error": str(e)
+                }
+            )
         
-        print(f"✅ USER REGISTERED SUCCESSFULLY:")
-        print(f"   User ID: {user_id}")
-        print(f"   Username: {user_data.username}")
-        print(f"   Email: {user_data.email_address}")
-        print(f"   Initial Balance: {INITIAL_BALANCE:,.0f} VND")
+        # Mọi lỗi trùng trên users là USER_EXISTS; conflict_field None khi không rõ index
+        conflict_field = duplicate_key_field(e)
+        print(f"❌ USER ALREADY EXISTS: conflict on {conflict_field or 'unknown key'}")
         print(f"{'='*70}\n")
-        
-        return {
-            "success": True,
-            "statusCode": 201,
-            "message": "User registered successfully",
-            "user": {
-                "user_id": user_id,
-                "username": user_data.username,
-                "email_address": user_data.email_address,
-                "full_name": user_data.full_name,
-                "phone_number": getattr(user_data, 'phone_number', None),
-                "available_balance": INITIAL_BALANCE,
-                "created_at": current_time.isoformat()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "statusCode": 400,
+                "message": f"User with this {conflict_field} already exists" if conflict_field
+                           else "User already exists",
+                "error": "USER_EXISTS",
+                "conflict_field": conflict_field
             }
-        }
-        
-    except HTTPException:
-        if connection:
-            connection.rollback()
+        )
+    except (HTTPException, ExecutorSaturated):
         raise
     except Exception as e:
-        if connection:
-            connection.rollback()
         print(f"\n❌ REGISTRATION ERROR:")
         print(f"   Type: {type(e).__name__}")
         print(f"   Message: {str(e)}")
@@ -313,104 +487,76 @@ def register_user(user_data: RegisterRequest):
                 "error": str(e)
             }
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
+
+# ✅ Add endpoint to force refresh
+def force_refresh_user_data(user_id: str):
+    """
+    Kept for backward compatibility: get_user_profile already reads the
+    committed row on every call, so there is nothing to refresh.
+    """
+    return get_user_profile(user_id)
+
+def profile_etag(user: dict) -> str:
+    """
+    ETag của profile: balance_version (tăng mỗi lần số dư thay đổi) + digest
+    các field còn lại, để client gửi lại qua If-None-Match và nhận 304.
+    """
+    digest = hashlib.sha1(repr(sorted(user.items())).encode("utf-8")).hexdigest()[:12]
+    return f'"bv{user["balance_version"]}-{digest}"'
 
 def get_user_profile(user_id: str):
-    """Get user profile by user_id with fresh database connection"""
-    connection = None
-    cursor = None
+    """
+    Get user profile by user_id
     
+    Đọc theo primary key, không khóa: connection ở READ COMMITTED + autocommit
+    nên luôn thấy số dư đã commit mới nhất mà không chặn UPDATE của pay_tuition.
+    """
     try:
-        print(f"\n{'='*60}")
-        print(f"👤 GETTING USER PROFILE FROM AUTH SERVICE")
-        print(f"{'='*60}")
-        print(f"   User ID: {user_id}")
-        print(f"   Timestamp: {datetime.now().isoformat()}")
-        
-        # ✅ Force refresh connections before critical read
-        refresh_connections()
-        
-        # ✅ Get fresh connection
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        # ✅ Verify database and connection info
-        cursor.execute("SELECT DATABASE() as current_db, CONNECTION_ID() as conn_id, NOW() as server_time")
-        db_info = cursor.fetchone()
-        print(f"   🗄️ Database: {db_info['current_db']}")
-        print(f"   🔗 Connection ID: {db_info['conn_id']}")
-        print(f"   ⏰ Server time: {db_info['server_time']}")
-        
-        # ✅ Force fresh read with explicit transaction
-        cursor.execute("START TRANSACTION")
-        
-        query = """
-            SELECT user_id, username, email_address, full_name, 
-                   phone_number, available_balance, created_at, updated_at
-            FROM users 
-            WHERE user_id = %s
-            FOR UPDATE  
-        """
-        print(f"   📝 Query: {query.replace('FOR UPDATE', 'FOR UPDATE (fresh read)')}")
-        
-        cursor.execute(query, (user_id,))
-        user = cursor.fetchone()
-        
-        # ✅ Commit to release lock
-        cursor.execute("COMMIT")
-        
-        if not user:
-            print(f"   ❌ User not found in database")
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "success": False,
-                    "statusCode": 404,
-                    "message": "User not found",
-                    "error": "USER_NOT_FOUND"
-                }
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT user_id, username, email_address, full_name, 
+                       phone_number, available_balance, balance_version,
+                       created_at, updated_at
+                FROM users 
+                WHERE user_id = %s
+                """,
+                (user_id,)
             )
-        
-        print(f"   ✅ Fresh user data retrieved:")
-        print(f"      Username: {user['username']}")
-        print(f"      Full name: {user['full_name']}")
-        print(f"      💰 Balance: {user['available_balance']:,.0f} VND")
-        print(f"      🕐 Updated at: {user['updated_at']}")
-        print(f"      🔄 Data freshness: GUARANTEED FRESH")
-        print(f"{'='*60}\n")
-        
-        return {
-            "success": True,
-            "statusCode": 200,
-            "message": "User profile retrieved with fresh data",
-            "user": {
-                "user_id": user['user_id'],
-                "username": user['username'],
-                "email_address": user['email_address'],
-                "full_name": user['full_name'],
-                "phone_number": user['phone_number'],
-                "available_balance": float(user['available_balance']),
-                "created_at": user['created_at'].isoformat() if user['created_at'] else None,
-                "updated_at": user['updated_at'].isoformat() if user['updated_at'] else None
-            },
-            # ✅ Add metadata for debugging
-            "metadata": {
-                "connection_id": db_info['conn_id'],
-                "server_time": db_info['server_time'].isoformat(),
-                "data_freshness": "guaranteed_fresh"
+            user = cursor.fetchone()
+            
+            if not user:
+                raise HTTPException(
+                    status_code=404,
+                    detail={
+                        "success": False,
+                        "statusCode": 404,
+                        "message": "User not found",
+                        "error": "USER_NOT_FOUND"
+                    }
+                )
+            
+            return {
+                "success": True,
+                "statusCode": 200,
+                "message": "User profile retrieved",
+                "user": {
+                    "user_id": user['user_id'],
+                    "username": user['username'],
+                    "email_address": user['email_address'],
+                    "full_name": user['full_name'],
+                    "phone_number": user['phone_number'],
+                    "available_balance": float(user['available_balance']),
+                    "balance_version": user['balance_version'],
+                    "created_at": user['created_at'].isoformat() if user['created_at'] else None,
+                    "updated_at": user['updated_at'].isoformat() if user['updated_at'] else None
+                }
             }
-        }
         
     except HTTPException:
         raise
     except Exception as e:
         print(f"❌ Get profile error: {e}")
-        import traceback
-        traceback.print_exc()
         raise HTTPException(
             status_code=500,
             detail={
@@ -420,90 +566,46 @@ def get_user_profile(user_id: str):
                 "error": str(e)
             }
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
 
-# ✅ Add endpoint to force refresh
-def force_refresh_user_data(user_id: str):
-    """Force refresh user data by clearing all caches"""
+def revoke_token(jti: str, user_id: str = None, expires_at: float = None, reason: str = None):
+    """
+    Thu hồi một JWT theo jti.
+    Ghi vào revoked_tokens (authoritative) và đưa ngay vào Bloom filter cục bộ;
+    các service khác nhận được ở lượt sync kế tiếp.
+    """
     try:
-        print(f"🔄 FORCE REFRESHING USER DATA for {user_id}")
-        
-        # Clear connection pool
-        refresh_connections()
-        
-        # Get fresh data
-        return get_user_profile(user_id)
-        
-    except Exception as e:
-        print(f"❌ Force refresh error: {e}")
-        raise e
-
-def get_user_profile(user_id: str):
-    """Get user profile by user_id"""
-    connection = None
-    cursor = None
-    
-    try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        cursor.execute(
-            """
-            SELECT user_id, username, email_address, full_name, 
-                   phone_number, available_balance, created_at, updated_at
-            FROM users 
-            WHERE user_id = %s
-            """,
-            (user_id,)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "success": False,
-                    "statusCode": 404,
-                    "message": "User not found",
-                    "error": "USER_NOT_FOUND"
-                }
+        # Không biết exp (admin revoke) → giữ đến hết thời hạn tối đa của token
+        expires = (datetime.fromtimestamp(expires_at) if expires_at
+                   else datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRES_MINUTES))
+        
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO revoked_tokens (jti, user_id, expires_at, reason)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE reason = VALUES(reason)
+                """,
+                (jti, user_id, expires, reason)
             )
-        
-        return {
-            "success": True,
-            "statusCode": 200,
-            "message": "User profile retrieved",
-            "user": {
-                "user_id": user['user_id'],
-                "username": user['username'],
-                "email_address": user['email_address'],
-                "full_name": user['full_name'],
-                "phone_number": user['phone_number'],
-                "available_balance": float(user['available_balance']),
-                "created_at": user['created_at'].isoformat() if user['created_at'] else None,
-                "updated_at": user['updated_at'].isoformat() if user['updated_at'] else None
+            
+            revocation_list.add_local(jti, expires.timestamp())
+            
+            return {
+                "success": True,
+                "statusCode": 200,
+                "message": "Token revoked",
+                "jti": jti,
+                "expires_at": expires.isoformat()
             }
-        }
         
-    except HTTPException:
-        raise
     except Exception as e:
-        print(f"❌ Get profile error: {e}")
+        print(f"❌ Revoke token error: {e}")
         raise HTTPException(
             status_code=500,
             detail={
                 "success": False,
                 "statusCode": 500,
-                "message": "Failed to get user profile",
+                "message": "Failed to revoke token",
                 "error": str(e)
             }
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
\ No newline at end of file
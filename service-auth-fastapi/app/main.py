@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, user  # ✅ Import routes
+from app.routes import auth, user, debug  # ✅ Import routes
+from app.config.revocation import revocation_list
+from app.config.database import db
+from app.config.executors import executors
+from app.utils.bulk_register import shutdown_process_pool
+from app.middleware.admission import admission_limiter, ADMISSION_ENABLED, ADMISSION_ROUTES
+from soa_common.admission import AdmissionMiddleware
 import uvicorn
 
 app = FastAPI(
@@ -9,6 +15,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# ✅ Admission control trước các route dùng database (thêm trước CORS để
+#    response 503 vẫn đi qua CORSMiddleware và có header CORS)
+app.add_middleware(
+    AdmissionMiddleware,
+    limiter=admission_limiter,
+    routes=ADMISSION_ROUTES,
+    enabled=ADMISSION_ENABLED
+)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +36,7 @@ app.add_middleware(
 # ✅ Register routes
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(user.router, prefix="/api", tags=["Users"])
+app.include_router(debug.router, tags=["Debug"])
 
 @app.get("/")
 async def root():
@@ -34,5 +50,21 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.on_event("startup")
+async def startup_event():
+    try:
+        db.warm_up()
+    except Exception as e:
+        # Pool tự mở connection khi có request, chỉ cảnh báo
+        print(f"⚠️ Database warm-up failed: {e}")
+    revocation_list.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await revocation_list.stop()
+    executors.shutdown()
+    shutdown_process_pool()
+    db.close()
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+
+from dotenv import load_dotenv
+
+from app.config.database import db
+from soa_common.admission import AdaptiveLimiter
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+# Route dùng database → mức ưu tiên (prefix /api như trong main.py)
+ADMISSION_ROUTES = [
+    ("/api/auth/login", "critical"),
+    ("/api/auth/refresh", "critical"),
+    ("/api/auth/logout", "normal"),
+    ("/api/auth/register", "normal"),
+    ("/api/auth/profile", "normal"),
+    ("/api/auth/revoke", "normal"),
+    ("/api/users/me", "normal"),
+    ("/api/auth/admin/bulk-register", "low")
+]
+
+# Tín hiệu quá tải: latency request + thời gian chờ connection của pool
+admission_limiter = AdaptiveLimiter.from_env("auth", pool_wait=lambda: db.wait_seconds_ewma)
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime
 from typing import Optional
+from app.config.revocation import revocation_list
 
 load_dotenv()
 
@@ -89,6 +90,19 @@ def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(s
         print(f"👔 Role: {role}")
         print(f"{'='*60}\n")
         
+        # ✅ Token đã bị thu hồi (logout / revoke)
+        if revocation_list.is_revoked(payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={
+                    "success": False,
+                    "statusCode": 401,
+                    "message": "Token has been revoked",
+                    "error": "TOKEN_REVOKED"
+                },
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
         # Validate required fields
         if user_id is None:
             raise HTTPException(
@@ -107,7 +121,9 @@ def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(s
             "user_id": user_id,
             "email": email,
             "username": username,
-            "role": role
+            "role": role,
+            "jti": payload.get("jti"),
+            "exp": exp
         }
         
     except JWTError as e:
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class LoginRequest(BaseModel):
@@ -13,6 +13,9 @@ class RegisterRequest(BaseModel):
     full_name: str
     phone_number: Optional[str] = None
 
+class BulkRegisterRequest(BaseModel):
+    users: List[RegisterRequest]
+
 class User(BaseModel):
     user_id: str
     username: str
@@ -26,10 +29,28 @@ class LoginResponse(BaseModel):
     statusCode: int
     message: str
     token: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # giây, thời hạn của access token
     user: User
 
 class RegisterResponse(BaseModel):
     success: bool
     statusCode: int
     message: str
-    user: dict
\ No newline at end of file
+    user: dict
+
+class RevokeTokenRequest(BaseModel):
+    jti: str
+    user_id: Optional[str] = None
+    reason: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class RefreshResponse(BaseModel):
+    success: bool
+    statusCode: int
+    message: str
+    token: str
+    refresh_token: str
+    expires_in: int
@@ -1,27 +1,132 @@
-from fastapi import APIRouter, Depends
-from app.controllers.auth import login_user, register_user, get_user_profile, force_refresh_user_data
-from app.models.user import LoginRequest, RegisterRequest
-from app.middleware.auth_middleware import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import Optional
+from app.controllers.auth import (
+    login_user,
+    register_user,
+    get_user_profile,
+    force_refresh_user_data,
+    profile_etag,
+    revoke_token,
+    refresh_access_token,
+    revoke_refresh_token_family,
+    bulk_register_users
+)
+from app.models.user import LoginRequest, RegisterRequest, RevokeTokenRequest, RefreshRequest, BulkRegisterRequest
+from app.middleware.auth_middleware import get_current_user, require_role
+from app.config.revocation import revocation_list
+from app.config.database import db
+from app.middleware.admission import admission_limiter
+from app.config.executors import executors, run_blocking
 
 router = APIRouter(prefix="/auth")
 
 @router.post("/login")
 async def login(credentials: LoginRequest):
     """User login"""
-    return login_user(credentials)
+    return await run_blocking("database", login_user, credentials)
+
+@router.post("/refresh")
+async def refresh(request: RefreshRequest):
+    """Exchange a refresh token for a new access token (rotating)"""
+    return await run_blocking("database", refresh_access_token, request.refresh_token)
 
 @router.post("/register")
 async def register(user_data: RegisterRequest):
     """User registration"""
-    return register_user(user_data)
+    return await run_blocking("database", register_user, user_data)
+
+BULK_REGISTER_MAX_USERS = 10000
+
+@router.post("/admin/bulk-register")
+async def bulk_register(request: BulkRegisterRequest, current_user: dict = Depends(require_role(["admin"]))):
+    """Register many users at once (Admin, ADMIN_USERNAMES). Large imports: use bulk_register.py"""
+    if len(request.users) > BULK_REGISTER_MAX_USERS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "statusCode": 400,
+                "message": f"At most {BULK_REGISTER_MAX_USERS} users per request",
+                "error": "TOO_MANY_USERS"
+            }
+        )
+    return await run_blocking("bulk", bulk_register_users, request.users)
 
 @router.get("/profile")
-async def profile(current_user: dict = Depends(get_current_user)):
-    """Get current user profile - PROTECTED ROUTE"""
-    return get_user_profile(current_user["user_id"])
+async def profile(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    """
+    Get current user profile - PROTECTED ROUTE
+    
+    Trả về header ETag; gửi lại qua If-None-Match để nhận 304 khi profile/số dư chưa đổi.
+    """
+    result = await run_blocking("database", get_user_profile, current_user["user_id"])
+    etag = profile_etag(result["user"])
+    
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return result
 
 # ✅ Add force refresh endpoint
 @router.post("/profile/refresh")
 async def force_refresh_profile(current_user: dict = Depends(get_current_user)):
     """Force refresh user profile with guaranteed fresh data"""
-    return force_refresh_user_data(current_user["user_id"])
\ No newline at end of file
+    return await run_blocking("database", force_refresh_user_data, current_user["user_id"])
+
+@router.post("/logout")
+async def logout(request: Optional[RefreshRequest] = None, current_user: dict = Depends(get_current_user)):
+    """Revoke the current access token (and its refresh token family if provided)"""
+    if request is not None:
+        await run_blocking("database", revoke_refresh_token_family, request.refresh_token)
+    if not current_user.get("jti"):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "statusCode": 400,
+                "message": "Token has no jti and cannot be revoked, please login again",
+                "error": "TOKEN_NOT_REVOCABLE"
+            }
+        )
+    return await run_blocking(
+        "database", revoke_token, current_user["jti"], current_user["user_id"], current_user.get("exp"), "logout"
+    )
+
+@router.post("/revoke")
+async def revoke(request: RevokeTokenRequest, current_user: dict = Depends(require_role(["admin"]))):
+    """Revoke any token by jti (Admin, ADMIN_USERNAMES)"""
+    return await run_blocking("database", revoke_token, request.jti, request.user_id, None, request.reason or "admin")
+
+@router.get("/revocation/stats")
+async def revocation_stats(current_user: dict = Depends(get_current_user)):
+    """Revocation list / Bloom filter metrics"""
+    return {
+        "success": True,
+        "data": revocation_list.get_stats()
+    }
+
+@router.get("/db/stats")
+async def db_stats(current_user: dict = Depends(get_current_user)):
+    """Connection pool + query timing metrics"""
+    return {
+        "success": True,
+        "data": db.status()
+    }
+
+@router.get("/admission/stats")
+async def admission_stats(current_user: dict = Depends(get_current_user)):
+    """Adaptive concurrency limiter state (limit, inflight, rejections per priority)"""
+    return {
+        "success": True,
+        "data": admission_limiter.get_stats()
+    }
+
+@router.get("/executors/stats")
+async def executor_stats(current_user: dict = Depends(get_current_user)):
+    """Blocking-work executors: queue depth, active workers, wait/run time"""
+    return {
+        "success": True,
+        "data": executors.get_stats()
+    }
@@ -1,20 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.middleware.auth_middleware import get_current_user
-from app.config.database import get_db_connection, db
-import pymysql
+from app.config.database import db
+from app.config.executors import run_blocking
 
 router = APIRouter()
 
-@router.get("/users/me")
-async def get_current_user_profile(
-    current_user: dict = Depends(get_current_user)
-):
-    """Get profile of currently authenticated user"""
-    connection = None
-    try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
+def fetch_user_profile(user_id: str):
+    """Chạy trong executor database"""
+    with db.cursor() as cursor:
         # ✅ FIX: Remove 'role' from SELECT
         cursor.execute(
             """
@@ -22,10 +15,25 @@ async def get_current_user_profile(
             FROM users 
             WHERE user_id = %s
             """,
-            (current_user["user_id"],)
+            (user_id,)
         )
-        user = cursor.fetchone()
-        cursor.close()
+        return cursor.fetchone()
+
+def update_full_name(user_id: str, full_name: str):
+    """Chạy trong executor database"""
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE users SET full_name = %s WHERE user_id = %s",
+            (full_name, user_id)
+        )
+
+@router.get("/users/me")
+async def get_current_user_profile(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get profile of currently authenticated user"""
+    try:
+        user = await run_blocking("database", fetch_user_profile, current_user["user_id"])
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -48,9 +56,6 @@ async def get_current_user_profile(
     except Exception as e:
         print(f"Get profile error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if connection:
-            db.return_connection(connection)
 
 @router.put("/users/me")
 async def update_user_profile(
@@ -58,20 +63,10 @@ async def update_user_profile(
     current_user: dict = Depends(get_current_user)
 ):
     """Update user profile"""
-    connection = None
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
         # Update full_name if provided
         if "full_name" in data:
-            cursor.execute(
-                "UPDATE users SET full_name = %s WHERE user_id = %s",
-                (data["full_name"], current_user["user_id"])
-            )
-            connection.commit()
-        
-        cursor.close()
+            await run_blocking("database", update_full_name, current_user["user_id"], data["full_name"])
         
         return {
             "success": True,
@@ -79,11 +74,8 @@ async def update_user_profile(
             "message": "Profile updated successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        if connection:
-            connection.rollback()
         print(f"Update profile error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if connection:
-            db.return_connection(connection)
\ No newline at end of file
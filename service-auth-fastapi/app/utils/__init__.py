@@ -1,8 +1,10 @@
-from .jwt_helper import create_access_token
+from .jwt_helper import create_access_token, create_refresh_token, hash_refresh_token
 from .password_helper import hash_password, verify_password, get_password_hash
 
 __all__ = [
     "create_access_token",
+    "create_refresh_token",
+    "hash_refresh_token",
     "hash_password",
     "verify_password",
     "get_password_hash"
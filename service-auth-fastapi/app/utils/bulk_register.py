@@ -0,0 +1,190 @@
+"""
+Đăng ký hàng loạt user: hash bcrypt song song trên nhiều process, INSERT theo batch.
+INSERT thường (không IGNORE): lỗi dữ liệu (quá dài, sai kiểu) báo lỗi thay vì bị cắt
+âm thầm; chỉ lỗi trùng khóa (1062) được xử lý và tính vào skipped_conflicts.
+
+Dùng chung cho endpoint admin POST /api/auth/admin/bulk-register và CLI bulk_register.py.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional
+import os
+import threading
+import time
+import uuid
+
+import pymysql
+
+from app.utils.password_helper import hash_password
+
+BULK_REGISTER_WORKERS = int(os.getenv("BULK_REGISTER_WORKERS", os.cpu_count() or 1))
+BULK_REGISTER_BATCH_SIZE = int(os.getenv("BULK_REGISTER_BATCH_SIZE", 1000))
+INITIAL_BALANCE = 50000000.0  # 50 million VND (giống register_user)
+ER_DUP_ENTRY = 1062
+
+INSERT_USERS_SQL = """
+    INSERT INTO users (
+        user_id, username, email_address, password, full_name,
+        phone_number, available_balance, created_at, updated_at
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool dùng chung cho endpoint (tạo lần đầu, giữ tới khi shutdown)"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=BULK_REGISTER_WORKERS)
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Gọi khi app shutdown"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def _hash_chunk(passwords: List[str]) -> List[str]:
+    """Chạy trong process con"""
+    return [hash_password(password) for password in passwords]
+
+
+def hash_passwords_parallel(passwords: List[str], workers: int = BULK_REGISTER_WORKERS,
+                            executor: Optional[ProcessPoolExecutor] = None) -> List[str]:
+    """Hash bcrypt song song, giữ nguyên thứ tự đầu vào (executor None → process pool dùng chung)"""
+    if not passwords:
+        return []
+    if workers <= 1 and executor is None:
+        return _hash_chunk(passwords)
+
+    chunk_size = max(1, min(256, len(passwords) // (workers * 4) or 1))
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+
+    results = (executor or get_process_pool()).map(_hash_chunk, chunks)
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def _find_existing(cursor, column: str, values: List[str]) -> set:
+    """Giá trị đã tồn tại (seek trên unique index, chia nhỏ IN list)"""
+    existing = set()
+    for i in range(0, len(values), BULK_REGISTER_BATCH_SIZE):
+        chunk = values[i:i + BULK_REGISTER_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT {column} FROM users WHERE {column} IN ({placeholders})", chunk)
+        existing.update(row[column] if isinstance(row, dict) else row[0] for row in cursor.fetchall())
+    return existing
+
+
+def _is_duplicate(error: pymysql.err.IntegrityError) -> bool:
+    return bool(error.args) and error.args[0] == ER_DUP_ENTRY
+
+
+def _insert_batch(connection, cursor, batch: List[tuple]) -> int:
+    """
+    INSERT một batch trong một transaction; trả về số dòng đã thêm.
+    Batch có dòng trùng (user được tạo đồng thời bởi request khác) → rollback rồi
+    INSERT từng dòng, bỏ qua dòng trùng.
+    """
+    connection.begin()
+    try:
+        cursor.executemany(INSERT_USERS_SQL, batch)
+        inserted = cursor.rowcount
+        connection.commit()
+        return inserted
+    except pymysql.err.IntegrityError as e:
+        connection.rollback()
+        if not _is_duplicate(e):
+            raise
+
+    inserted = 0
+    connection.begin()
+    for row in batch:
+        try:
+            cursor.execute(INSERT_USERS_SQL, row)
+            inserted += 1
+        except pymysql.err.IntegrityError as e:
+            if not _is_duplicate(e):
+                raise
+    connection.commit()
+    return inserted
+
+
+def bulk_register(database, users: Iterable[dict], workers: int = BULK_REGISTER_WORKERS,
+                  batch_size: int = BULK_REGISTER_BATCH_SIZE,
+                  executor: Optional[ProcessPoolExecutor] = None) -> dict:
+    """
+    Đăng ký nhiều user.
+
+    database: ConnectionPool (soa_common.db), lấy connection riêng cho từng bước có truy vấn
+    users: dict có username, email_address, password, full_name, phone_number (tùy chọn)
+
+    1. Bỏ trùng trong input và user đã có trong DB (để không tốn bcrypt cho chúng)
+    2. Hash song song — không giữ connection của pool trong lúc hash
+    3. INSERT theo batch bằng executemany; dòng trùng do race với request khác
+       bị unique index chặn (1062) và tính vào "skipped_conflicts".
+    """
+    users = list(users)
+    timings = {}
+    skipped = []
+
+    started = time.perf_counter()
+    seen_usernames, seen_emails, candidates = set(), set(), []
+    for user in users:
+        if user["username"] in seen_usernames or user["email_address"] in seen_emails:
+            skipped.append({"username": user["username"], "reason": "DUPLICATE_IN_REQUEST"})
+            continue
+        seen_usernames.add(user["username"])
+        seen_emails.add(user["email_address"])
+        candidates.append(user)
+
+    with database.cursor() as cursor:
+        existing_usernames = _find_existing(cursor, "username", [u["username"] for u in candidates])
+        existing_emails = _find_existing(cursor, "email_address", [u["email_address"] for u in candidates])
+    new_users = []
+    for user in candidates:
+        if user["username"] in existing_usernames:
+            skipped.append({"username": user["username"], "reason": "USERNAME_EXISTS"})
+        elif user["email_address"] in existing_emails:
+            skipped.append({"username": user["username"], "reason": "EMAIL_EXISTS"})
+        else:
+            new_users.append(user)
+    timings["prefilter_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hashes = hash_passwords_parallel([u["password"] for u in new_users], workers, executor)
+    timings["hash_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    now = datetime.now()
+    rows = [
+        (str(uuid.uuid4()), u["username"], u["email_address"], hashed, u.get("full_name"),
+         u.get("phone_number"), INITIAL_BALANCE, now, now)
+        for u, hashed in zip(new_users, hashes)
+    ]
+    inserted = 0
+    if rows:
+        with database.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for i in range(0, len(rows), batch_size):
+                    inserted += _insert_batch(connection, cursor, rows[i:i + batch_size])
+            finally:
+                cursor.close()
+    timings["insert_seconds"] = time.perf_counter() - started
+
+    return {
+        "requested": len(users),
+        "inserted": inserted,
+        "skipped": skipped,
+        "skipped_conflicts": len(rows) - inserted,
+        "timings": {name: round(value, 3) for name, value in timings.items()}
+    }
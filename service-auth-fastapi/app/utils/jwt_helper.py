@@ -1,26 +1,47 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from typing import Optional
+import hashlib
 import os
+import secrets
+import uuid
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-EXPIRES_IN_HOURS = int(os.getenv("JWT_EXPIRES_IN_HOURS", 24))
+# Access token ngắn hạn; client dùng refresh token để lấy token mới thay vì login lại
+ACCESS_TOKEN_EXPIRES_MINUTES = int(os.getenv("JWT_ACCESS_EXPIRES_MINUTES", 15))
+REFRESH_TOKEN_EXPIRES_DAYS = int(os.getenv("JWT_REFRESH_EXPIRES_DAYS", 7))
+# Claim "role" trong access token: username trong danh sách → "admin" (require_role), còn lại "user"
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
 
-def create_access_token(data: dict) -> str:
+def role_for(username: str) -> str:
+    """Role ghi vào access token"""
+    return "admin" if username in ADMIN_USERNAMES else "user"
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Tạo JWT token"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=EXPIRES_IN_HOURS)
-    to_encode.update({"exp": expire})
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRES_MINUTES))
+    # jti: định danh riêng của token, dùng để thu hồi (revoked_tokens)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token() -> str:
+    """Refresh token opaque 256-bit (không phải JWT)"""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """sha256 của refresh token - giá trị lưu trong DB"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 def verify_token(token: str) -> dict:
     """Xác thực JWT token"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError as e:
-        raise ValueError(f"Token không hợp lệ hoặc đã hết hạn: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Token không hợp lệ hoặc đã hết hạn: {str(e)}")
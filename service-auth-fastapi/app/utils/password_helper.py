@@ -1,7 +1,32 @@
 from passlib.context import CryptContext
+from dotenv import load_dotenv
+from typing import Optional, Tuple
+import bcrypt
+import os
+
+load_dotenv()
+
+# Cost factor cho hash mới; tăng giá trị này → hash cũ được rehash dần khi user login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
 
 # Cấu hình bcrypt context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# - bcrypt_sha256: mặc định, pre-hash SHA-256 nên không bị giới hạn 72 byte của bcrypt
+# - bcrypt: hash cũ (đã cắt password còn 72 byte), chỉ dùng để verify rồi rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256", "bcrypt"],
+    default="bcrypt_sha256",
+    deprecated=["bcrypt"],
+    bcrypt_sha256__rounds=BCRYPT_ROUNDS
+)
+
+# Hash cũ được bọc offline (migrate_password_hashes.py):
+#   $wrap$<salt bcrypt cũ, 29 ký tự>$<bcrypt_sha256(hash bcrypt cũ)>
+WRAP_PREFIX = "$wrap$"
+_LEGACY_SALT_LENGTH = 29  # "$2b$12$" + 22 ký tự salt
+
+def _legacy_secret(password: str) -> bytes:
+    """Password như hash_password cũ đã dùng: cắt còn 72 byte"""
+    return password.encode('utf-8')[:72]
 
 def hash_password(password: str) -> str:
     """
@@ -15,6 +40,43 @@ def hash_password(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+def wrap_legacy_hash(legacy_hash: str) -> str:
+    """
+    Bọc hash bcrypt cũ bằng scheme hiện tại mà không cần plain password.
+    Verify = bcrypt cũ (salt giữ lại trong prefix) rồi bcrypt_sha256 với cost mới.
+    """
+    return f"{WRAP_PREFIX}{legacy_hash[:_LEGACY_SALT_LENGTH]}${pwd_context.hash(legacy_hash)}"
+
+def needs_update(hashed_password: str) -> bool:
+    """True nếu hash nên được thay bằng hash_password(plain) ở lần login tới"""
+    if hashed_password.startswith(WRAP_PREFIX):
+        return True
+    return pwd_context.needs_update(hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify password và trả về hash mới nếu hash hiện tại đã lỗi thời
+    (scheme bcrypt cũ, hash đã bọc, hoặc cost khác BCRYPT_ROUNDS).
+    
+    Returns:
+        (hợp lệ, hash mới hoặc None)
+    """
+    try:
+        if hashed_password.startswith(WRAP_PREFIX):
+            body = hashed_password[len(WRAP_PREFIX):]
+            legacy_salt, inner = body[:_LEGACY_SALT_LENGTH], body[_LEGACY_SALT_LENGTH + 1:]
+            legacy_hash = bcrypt.hashpw(_legacy_secret(plain_password), legacy_salt.encode('ascii')).decode('ascii')
+            valid = pwd_context.verify(legacy_hash, inner)
+        elif pwd_context.identify(hashed_password) == "bcrypt":
+            valid = pwd_context.verify(_legacy_secret(plain_password), hashed_password)
+        else:
+            return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError as e:
+        print(f"❌ Password verification error: {e}")
+        return False, None
+    
+    return valid, hash_password(plain_password) if valid else None
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify password với hashed password
@@ -26,10 +88,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True nếu password khớp, False nếu không
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
     """
     Alias cho hash_password (tương thích với các framework khác)
     """
-    return hash_password(password)
\ No newline at end of file
+    return hash_password(password)
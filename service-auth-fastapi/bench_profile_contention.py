@@ -0,0 +1,154 @@
+"""
+Đo tranh chấp khóa giữa đọc profile và cập nhật số dư (pay_tuition) trên cùng một dòng users
+
+- locking: đọc profile kiểu cũ (START TRANSACTION ... SELECT ... FOR UPDATE ... COMMIT)
+- plain  : đọc theo primary key ở READ COMMITTED, không khóa (get_user_profile hiện tại)
+
+Writer mô phỏng pay_tuition: khóa dòng user, giữ transaction --hold-ms, cập nhật
+available_balance (không đổi giá trị) + balance_version rồi commit.
+
+Chạy: python bench_profile_contention.py --user-id USR001 [--duration 10] [--readers 16] [--writers 4]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import threading
+import time
+
+import pymysql
+
+from app.config.database import DATABASE_CONFIG
+
+LOCKING_READ = """
+    SELECT user_id, username, email_address, full_name,
+           phone_number, available_balance, created_at, updated_at
+    FROM users
+    WHERE user_id = %s
+    FOR UPDATE
+"""
+
+PLAIN_READ = """
+    SELECT user_id, username, email_address, full_name,
+           phone_number, available_balance, created_at, updated_at
+    FROM users
+    WHERE user_id = %s
+"""
+
+
+def connect():
+    connection = pymysql.connect(**{**DATABASE_CONFIG, "read_timeout": 60, "write_timeout": 60})
+    with connection.cursor() as cursor:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    return connection
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(mode: str, args) -> dict:
+    stop = threading.Event()
+    read_latencies, write_latencies = [], []
+    lock = threading.Lock()
+
+    def reader():
+        connection = connect()
+        local = []
+        try:
+            with connection.cursor() as cursor:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    if mode == "locking":
+                        cursor.execute("START TRANSACTION")
+                        cursor.execute(LOCKING_READ, (args.user_id,))
+                        cursor.fetchone()
+                        cursor.execute("COMMIT")
+                    else:
+                        cursor.execute(PLAIN_READ, (args.user_id,))
+                        cursor.fetchone()
+                    local.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+            with lock:
+                read_latencies.extend(local)
+
+    def writer():
+        connection = connect()
+        local = []
+        try:
+            with connection.cursor() as cursor:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    connection.begin()
+                    cursor.execute("SELECT available_balance FROM users WHERE user_id = %s FOR UPDATE",
+                                   (args.user_id,))
+                    time.sleep(args.hold_ms / 1000)
+                    cursor.execute(
+                        """
+                        UPDATE users
+                        SET available_balance = available_balance,
+                            balance_version = balance_version + 1
+                        WHERE user_id = %s
+                        """,
+                        (args.user_id,)
+                    )
+                    connection.commit()
+                    local.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+            with lock:
+                write_latencies.extend(local)
+
+    threads = ([threading.Thread(target=reader) for _ in range(args.readers)] +
+               [threading.Thread(target=writer) for _ in range(args.writers)])
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = {
+        "reads_per_sec": len(read_latencies) / args.duration,
+        "read_p50_ms": percentile(read_latencies, 0.50) * 1000,
+        "read_p99_ms": percentile(read_latencies, 0.99) * 1000,
+        "payments_per_sec": len(write_latencies) / args.duration,
+        "payment_p50_ms": percentile(write_latencies, 0.50) * 1000,
+        "payment_p99_ms": percentile(write_latencies, 0.99) * 1000,
+    }
+    print(f"{mode:<8} reads {result['reads_per_sec']:9,.0f}/s  p50 {result['read_p50_ms']:7.2f} ms  "
+          f"p99 {result['read_p99_ms']:7.2f} ms | payments {result['payments_per_sec']:7,.1f}/s  "
+          f"p50 {result['payment_p50_ms']:7.2f} ms  p99 {result['payment_p99_ms']:7.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile read vs payment lock contention")
+    parser.add_argument("--user-id", required=True, help="user_id có thật trong bảng users")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--hold-ms", type=float, default=5, help="Thời gian writer giữ khóa dòng")
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"🔒 Profile/payment contention — {args.readers} readers, {args.writers} writers, "
+          f"{args.duration:.0f}s per mode, hold {args.hold_ms} ms")
+    print("=" * 100)
+
+    before = run("locking", args)
+    after = run("plain", args)
+
+    print("=" * 100)
+    if before["payments_per_sec"]:
+        print(f"⚡ Payment throughput: {after['payments_per_sec'] / before['payments_per_sec']:.2f}x, "
+              f"profile reads: {after['reads_per_sec'] / max(before['reads_per_sec'], 1e-9):.1f}x")
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    main()
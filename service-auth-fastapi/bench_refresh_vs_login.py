@@ -0,0 +1,93 @@
+"""
+Benchmark: lấy access token mới bằng /auth/login (bcrypt verify) so với /auth/refresh (sha256 + 2 câu SQL)
+
+Cần Auth Service đang chạy và một user có thật.
+Chạy: python bench_refresh_vs_login.py --username johndoe --password password123 [--duration 15] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+BASE_AUTH_URL = "http://localhost:8000/api"
+
+
+async def login(session, base_url, username, password):
+    async with session.post(f"{base_url}/auth/login", json={"username": username, "password": password}) as response:
+        data = await response.json()
+        return response.status, data
+
+
+async def refresh(session, base_url, refresh_token):
+    async with session.post(f"{base_url}/auth/refresh", json={"refresh_token": refresh_token}) as response:
+        data = await response.json()
+        return response.status, data
+
+
+async def run(mode: str, args) -> float:
+    deadline = time.perf_counter() + args.duration
+    latencies = []
+    errors = 0
+
+    async def worker(session):
+        nonlocal errors
+        refresh_token = None
+        if mode == "refresh":
+            status, data = await login(session, args.base_url, args.username, args.password)
+            if status != 200:
+                raise RuntimeError(f"Login failed: {data}")
+            refresh_token = data["refresh_token"]
+
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if mode == "login":
+                status, data = await login(session, args.base_url, args.username, args.password)
+            else:
+                status, data = await refresh(session, args.base_url, refresh_token)
+                if status == 200:
+                    refresh_token = data["refresh_token"]  # rotate
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+                if mode == "refresh":
+                    return
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(latencies)
+    rps = count / elapsed if elapsed else 0.0
+    p50 = latencies[count // 2] * 1000 if count else 0.0
+    p99 = latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0
+    print(f"{mode:<8} {count:>7,} requests  {rps:9,.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  errors={errors}")
+    return rps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark re-login vs refresh token")
+    parser.add_argument("--base-url", default=BASE_AUTH_URL)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--duration", type=float, default=15, help="Số giây chạy mỗi chế độ")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"🔑 Token renewal benchmark — {args.duration:.0f}s per mode, concurrency {args.concurrency}")
+    print("=" * 80)
+
+    login_rps = await run("login", args)
+    refresh_rps = await run("refresh", args)
+
+    print("=" * 80)
+    if login_rps:
+        print(f"⚡ Refresh vs re-login: {refresh_rps / login_rps:.1f}x requests/sec")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
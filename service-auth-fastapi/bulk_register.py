@@ -0,0 +1,119 @@
+"""
+Đăng ký user hàng loạt (thay cho update_passwords.py với danh sách hardcode)
+
+- Hash bcrypt song song trên --workers process
+- INSERT theo batch (executemany), bỏ qua user đã tồn tại (lỗi dữ liệu thì dừng)
+
+Import từ CSV (header: username,email_address,password,full_name,phone_number):
+    python bulk_register.py --csv users.csv
+Benchmark với user tổng hợp (mặc định 100k, xóa lại sau khi chạy):
+    python bulk_register.py --synthetic 100000 --cleanup
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import csv
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config.database import db
+from app.utils.bulk_register import bulk_register, BULK_REGISTER_BATCH_SIZE
+
+
+def read_csv(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield {
+                "username": row["username"].strip(),
+                "email_address": row["email_address"].strip(),
+                "password": row["password"],
+                "full_name": row.get("full_name") or None,
+                "phone_number": row.get("phone_number") or None
+            }
+
+
+def synthetic_users(count: int, prefix: str):
+    for i in range(count):
+        yield {
+            "username": f"{prefix}{i}",
+            "email_address": f"{prefix}{i}@example.com",
+            "password": f"Password{i}!",
+            "full_name": f"Bulk User {i}",
+            "phone_number": None
+        }
+
+
+def cleanup(prefix: str):
+    with db.cursor() as cursor:
+        total = 0
+        while True:
+            cursor.execute("DELETE FROM users WHERE username LIKE %s LIMIT 10000", (f"{prefix}%",))
+            total += cursor.rowcount
+            if cursor.rowcount == 0:
+                break
+    print(f"🧹 Removed {total:,} synthetic users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk user registration")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="File CSV cần import")
+    source.add_argument("--synthetic", type=int, help="Sinh N user giả để benchmark")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Số process hash bcrypt")
+    parser.add_argument("--batch-size", type=int, default=BULK_REGISTER_BATCH_SIZE, help="Số dòng mỗi executemany")
+    parser.add_argument("--chunk", type=int, default=10000, help="Số user xử lý mỗi lượt (giới hạn bộ nhớ)")
+    parser.add_argument("--cleanup", action="store_true", help="Xóa user tổng hợp sau benchmark")
+    args = parser.parse_args()
+
+    prefix = f"bulk_{uuid.uuid4().hex[:8]}_"
+    users = read_csv(args.csv) if args.csv else synthetic_users(args.synthetic, prefix)
+
+    print("=" * 70)
+    print(f"👥 BULK REGISTER — workers={args.workers}, batch={args.batch_size}")
+    print("=" * 70)
+
+    totals = {"requested": 0, "inserted": 0, "skipped": 0, "skipped_conflicts": 0}
+    phase_totals = {}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        chunk = []
+        for user in users:
+            chunk.append(user)
+            if len(chunk) >= args.chunk:
+                _run_chunk(chunk, args, executor, totals, phase_totals, started)
+                chunk = []
+        if chunk:
+            _run_chunk(chunk, args, executor, totals, phase_totals, started)
+
+    elapsed = time.perf_counter() - started
+    print("=" * 70)
+    print(f"✅ Inserted {totals['inserted']:,} / {totals['requested']:,} users in {elapsed:.1f}s "
+          f"({totals['inserted'] / elapsed:,.0f} users/s)")
+    print(f"   Skipped (existing/duplicate): {totals['skipped']:,}, lost to concurrent inserts: "
+          f"{totals['skipped_conflicts']:,}")
+    print("   Phase time: " + ", ".join(f"{k.replace('_seconds', '')} {v:.1f}s" for k, v in phase_totals.items()))
+    print("=" * 70)
+
+    if args.synthetic and args.cleanup:
+        cleanup(prefix)
+
+
+def _run_chunk(chunk, args, executor, totals, phase_totals, started):
+    result = bulk_register(db, chunk, workers=args.workers, batch_size=args.batch_size, executor=executor)
+    totals["requested"] += result["requested"]
+    totals["inserted"] += result["inserted"]
+    totals["skipped"] += len(result["skipped"])
+    totals["skipped_conflicts"] += result["skipped_conflicts"]
+    for name, value in result["timings"].items():
+        phase_totals[name] = phase_totals.get(name, 0.0) + value
+    elapsed = time.perf_counter() - started
+    print(f"   {totals['requested']:>9,} processed  {totals['inserted']:>9,} inserted  "
+          f"{totals['requested'] / elapsed:8,.0f} users/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Đo chi phí bcrypt của Auth Service và đề xuất BCRYPT_ROUNDS
+
+1. Với mỗi cost factor: thời gian hash / verify (p50, p99) bằng pwd_context thật
+2. Sweep thông lượng verify (logins/s) theo số thread và số process
+3. Đề xuất cost lớn nhất mà p99 verify ≤ --target-p99-ms
+4. Ghi kết quả JSON (--output) để so sánh giữa các lần chạy / máy
+
+Chạy: python calibrate_bcrypt.py [--rounds 10-14] [--samples 20] [--target-p99-ms 250] [--output bcrypt_calibration.json]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from app.utils.password_helper import pwd_context, BCRYPT_ROUNDS
+
+PASSWORD = "Calibrate-Password-123!"
+
+
+def context_for(rounds: int):
+    """pwd_context của service, chỉ đổi cost factor"""
+    return pwd_context.copy(bcrypt_sha256__rounds=rounds)
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct * (len(values) - 1))))]
+
+
+def summarize(seconds) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "p50_ms": round(percentile(ms, 0.50), 2),
+        "p99_ms": round(percentile(ms, 0.99), 2),
+        "mean_ms": round(statistics.mean(ms), 2),
+        "max_ms": round(max(ms), 2)
+    }
+
+
+def measure_rounds(rounds: int, samples: int) -> dict:
+    ctx = context_for(rounds)
+    hash_times, verify_times = [], []
+    hashed = ctx.hash(PASSWORD)  # warm-up
+    for _ in range(samples):
+        started = time.perf_counter()
+        hashed = ctx.hash(PASSWORD)
+        hash_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        ctx.verify(PASSWORD, hashed)
+        verify_times.append(time.perf_counter() - started)
+    return {"rounds": rounds, "hash": summarize(hash_times), "verify": summarize(verify_times)}
+
+
+def _verify_many(args):
+    """Chạy trong thread/process: verify `count` lần, trả về danh sách latency"""
+    rounds, hashed, count = args
+    ctx = context_for(rounds)
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        ctx.verify(PASSWORD, hashed)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def throughput(executor_cls, workers: int, rounds: int, per_worker: int) -> dict:
+    hashed = context_for(rounds).hash(PASSWORD)
+    started = time.perf_counter()
+    with executor_cls(max_workers=workers) as executor:
+        results = list(executor.map(_verify_many, [(rounds, hashed, per_worker)] * workers))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for result in results for latency in result]
+    return {
+        "executor": "process" if executor_cls is ProcessPoolExecutor else "thread",
+        "workers": workers,
+        "verifies": len(latencies),
+        "logins_per_sec": round(len(latencies) / elapsed, 1),
+        **summarize(latencies)
+    }
+
+
+def parse_range(value: str):
+    if "-" in value:
+        low, high = value.split("-")
+        return list(range(int(low), int(high) + 1))
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="bcrypt cost calibration")
+    parser.add_argument("--rounds", default="10-14", help="Dải cost factor, vd 10-14 hoặc 10,12")
+    parser.add_argument("--samples", type=int, default=20, help="Số mẫu hash/verify mỗi cost")
+    parser.add_argument("--sweep-rounds", type=int, default=BCRYPT_ROUNDS, help="Cost dùng cho sweep thông lượng")
+    parser.add_argument("--workers", default=",".join(str(w) for w in sorted({1, 2, 4, cpus, cpus * 2})),
+                        help="Số worker cho sweep, vd 1,2,4,8")
+    parser.add_argument("--per-worker", type=int, default=10, help="Số verify mỗi worker trong sweep")
+    parser.add_argument("--target-p99-ms", type=float, default=250, help="p99 verify mục tiêu cho 1 login")
+    parser.add_argument("--min-rounds", type=int, default=10, help="Cost tối thiểu chấp nhận được về bảo mật")
+    parser.add_argument("--output", default="bcrypt_calibration.json")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"🔐 BCRYPT CALIBRATION — scheme {pwd_context.default_scheme()}, "
+          f"current BCRYPT_ROUNDS={BCRYPT_ROUNDS}, {cpus} CPU(s)")
+    print("=" * 80)
+
+    per_rounds = []
+    for rounds in parse_range(args.rounds):
+        result = measure_rounds(rounds, args.samples)
+        per_rounds.append(result)
+        print(f"   rounds {rounds:>2}: hash p50 {result['hash']['p50_ms']:8.1f} ms  p99 {result['hash']['p99_ms']:8.1f} ms"
+              f" | verify p50 {result['verify']['p50_ms']:8.1f} ms  p99 {result['verify']['p99_ms']:8.1f} ms"
+              f" | ≈{1000 / result['verify']['p50_ms']:6.1f} logins/s/core")
+
+    print(f"\n📈 Throughput sweep (rounds {args.sweep_rounds}):")
+    sweep = []
+    for executor_cls in (ThreadPoolExecutor, ProcessPoolExecutor):
+        for workers in parse_range(args.workers):
+            result = throughput(executor_cls, workers, args.sweep_rounds, args.per_worker)
+            sweep.append(result)
+            print(f"   {result['executor']:<7} x{workers:<3} {result['logins_per_sec']:8.1f} logins/s  "
+                  f"p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms")
+
+    within_target = [r for r in per_rounds if r["verify"]["p99_ms"] <= args.target_p99_ms]
+    recommended = max(within_target, key=lambda r: r["rounds"]) if within_target else None
+    best_sweep = max(sweep, key=lambda r: r["logins_per_sec"])
+
+    print("\n" + "=" * 80)
+    if recommended and recommended["rounds"] < args.min_rounds:
+        print(f"⚠️  Only rounds {recommended['rounds']} meets the target, below the minimum {args.min_rounds}: "
+              f"add CPU capacity instead of lowering the cost")
+    elif recommended:
+        print(f"✅ Recommended BCRYPT_ROUNDS={recommended['rounds']} "
+              f"(verify p99 {recommended['verify']['p99_ms']:.1f} ms ≤ {args.target_p99_ms:.0f} ms)")
+    else:
+        print(f"⚠️  No tested cost meets verify p99 ≤ {args.target_p99_ms:.0f} ms")
+    print(f"   Peak throughput at rounds {args.sweep_rounds}: {best_sweep['logins_per_sec']:.1f} logins/s "
+          f"({best_sweep['executor']} x{best_sweep['workers']})")
+    print("=" * 80)
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "host": {
+            "hostname": platform.node(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": cpus,
+            "python": platform.python_version()
+        },
+        "scheme": pwd_context.default_scheme(),
+        "current_rounds": BCRYPT_ROUNDS,
+        "target_p99_ms": args.target_p99_ms,
+        "min_rounds": args.min_rounds,
+        "recommended_rounds": recommended["rounds"] if recommended else None,
+        "per_rounds": per_rounds,
+        "sweep_rounds": args.sweep_rounds,
+        "sweep": sweep
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Migrate hash mật khẩu cũ (bcrypt, password bị cắt 72 byte) sang scheme hiện tại — offline
+
+Không có plain password nên hash cũ được "bọc": $wrap$<salt cũ>$bcrypt_sha256(hash cũ)
+(xem app/utils/password_helper.py). Lần login kế tiếp, verify_and_update thay hash
+bọc bằng hash_password(plain) bình thường.
+
+- Đọc users bằng server-side cursor (SSCursor), không nạp cả bảng vào bộ nhớ
+- Hash song song trên --workers process
+- Ghi lại theo batch (executemany, chỉ khi password chưa bị đổi trong lúc chạy)
+- Lưu checkpoint sau mỗi batch → chạy lại sẽ tiếp tục từ user_id cuối cùng
+
+Chạy: python migrate_password_hashes.py [--workers 8] [--batch-size 500] [--dry-run] [--reset]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pymysql
+
+from app.config.database import DATABASE_CONFIG, db
+from app.utils.password_helper import pwd_context, wrap_legacy_hash, WRAP_PREFIX, BCRYPT_ROUNDS
+
+CHECKPOINT_FILE = "password_migration_checkpoint.json"
+
+UPDATE_SQL = "UPDATE users SET password = %s WHERE user_id = %s AND password = %s"
+
+
+def needs_wrap(hashed: str) -> bool:
+    """Chỉ hash bcrypt cũ mới cần bọc; hash đã bọc / bcrypt_sha256 được xử lý lúc login"""
+    if not hashed or hashed.startswith(WRAP_PREFIX):
+        return False
+    try:
+        return pwd_context.identify(hashed) == "bcrypt"
+    except ValueError:
+        return False
+
+
+def _wrap_chunk(hashes):
+    """Chạy trong process con"""
+    return [wrap_legacy_hash(h) for h in hashes]
+
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"last_user_id": "", "scanned": 0, "wrapped": 0, "skipped": 0, "conflicts": 0,
+            "started_at": datetime.now().isoformat()}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    checkpoint["updated_at"] = datetime.now().isoformat()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)  # atomic: checkpoint không bao giờ bị ghi dở
+
+
+def stream_users(last_user_id: str):
+    """SSCursor: server đẩy từng dòng, client không buffer toàn bộ kết quả"""
+    connection = pymysql.connect(**{**DATABASE_CONFIG, "read_timeout": 3600},
+                                 cursorclass=pymysql.cursors.SSCursor)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT user_id, password FROM users WHERE user_id > %s ORDER BY user_id",
+                (last_user_id,)
+            )
+            for row in cursor:
+                yield row
+    finally:
+        connection.close()
+
+
+def count_remaining(last_user_id: str) -> int:
+    with db.cursor(dict_cursor=False) as cursor:
+        cursor.execute("SELECT COUNT(*) FROM users WHERE user_id > %s", (last_user_id,))
+        return cursor.fetchone()[0]
+
+
+def process_batch(batch, executor, workers, writer, checkpoint, dry_run):
+    todo = [(user_id, hashed) for user_id, hashed in batch if needs_wrap(hashed)]
+    checkpoint["skipped"] += len(batch) - len(todo)
+
+    if todo:
+        old_hashes = [hashed for _, hashed in todo]
+        chunk_size = max(1, len(old_hashes) // (workers * 4) or 1)
+        chunks = [old_hashes[i:i + chunk_size] for i in range(0, len(old_hashes), chunk_size)]
+        new_hashes = [h for chunk in executor.map(_wrap_chunk, chunks) for h in chunk]
+
+        if not dry_run:
+            rows = [(new, user_id, old) for (user_id, old), new in zip(todo, new_hashes)]
+            with writer.cursor() as cursor:
+                writer.begin()
+                cursor.executemany(UPDATE_SQL, rows)
+                updated = cursor.rowcount
+                writer.commit()
+            checkpoint["conflicts"] += len(rows) - updated
+            checkpoint["wrapped"] += updated
+        else:
+            checkpoint["wrapped"] += len(todo)
+
+    checkpoint["scanned"] += len(batch)
+    checkpoint["last_user_id"] = batch[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline password hash migration")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ đếm, không ghi DB / checkpoint")
+    parser.add_argument("--reset", action="store_true", help="Bỏ checkpoint, chạy lại từ đầu")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    checkpoint = load_checkpoint(args.checkpoint)
+    total = count_remaining(checkpoint["last_user_id"])
+
+    print("=" * 70)
+    print(f"🔒 PASSWORD HASH MIGRATION → bcrypt_sha256 (rounds={BCRYPT_ROUNDS})")
+    print(f"   Resuming after user_id '{checkpoint['last_user_id']}'" if checkpoint["last_user_id"]
+          else "   Starting from the beginning")
+    print(f"   Users to scan: {total:,}, workers: {args.workers}, batch: {args.batch_size}"
+          f"{', DRY RUN' if args.dry_run else ''}")
+    print("=" * 70)
+
+    started = time.perf_counter()
+    scanned_at_start = checkpoint["scanned"]
+    try:
+        with db.connection() as writer, ProcessPoolExecutor(max_workers=args.workers) as executor:
+            batch = []
+            for row in stream_users(checkpoint["last_user_id"]):
+                batch.append(row)
+                if len(batch) < args.batch_size:
+                    continue
+                process_batch(batch, executor, args.workers, writer, checkpoint, args.dry_run)
+                batch = []
+                if not args.dry_run:
+                    save_checkpoint(args.checkpoint, checkpoint)
+
+                done = checkpoint["scanned"] - scanned_at_start
+                rate = done / (time.perf_counter() - started)
+                eta = (total - done) / rate if rate else 0
+                print(f"   {done:>9,}/{total:,} scanned  {checkpoint['wrapped']:>9,} wrapped  "
+                      f"{rate:8,.0f} users/s  ETA {eta / 60:6.1f} min")
+
+            if batch:
+                process_batch(batch, executor, args.workers, writer, checkpoint, args.dry_run)
+                if not args.dry_run:
+                    save_checkpoint(args.checkpoint, checkpoint)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted — run again to resume from the last checkpoint")
+        return
+
+    print("=" * 70)
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s: scanned {checkpoint['scanned']:,}, "
+          f"wrapped {checkpoint['wrapped']:,}, already current {checkpoint['skipped']:,}, "
+          f"changed during run {checkpoint['conflicts']:,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Regression test cho plan của câu truy vấn login (EXPLAIN FORMAT=JSON)
+
+Tạo database tạm (database/schema.sql + mọi migration, gồm 005_users_unique_login_indexes.sql),
+nạp 1 triệu users bằng database/generate_data.py rồi kiểm tra mọi câu login đều dùng
+index seek (không có access_type = ALL / index_merge).
+
+Cần quyền CREATE DATABASE trên MySQL trong .env.
+Chạy: python test_login_query_plan.py [--rows 1000000] [--keep]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import json
+import os
+
+import pymysql
+
+from app.config.database import DATABASE_CONFIG
+from app.controllers.auth import LOGIN_BY_USERNAME_SQL, LOGIN_BY_EMAIL_OR_USERNAME_SQL
+
+SCRATCH_DB = os.getenv("PLAN_TEST_DB_NAME", "midterm_soa_plan_test")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+
+from generate_data import PLACEHOLDER_PASSWORD_HASH, create_database, email_address, generate, username  # noqa: E402
+
+LEGACY_LOGIN_SQL = """
+    SELECT user_id, username, email_address, password
+    FROM users
+    WHERE email_address = %s OR username = %s
+"""
+
+
+def access_types(plan):
+    """Lấy (table, access_type, key) của mọi bảng trong plan JSON"""
+    found = []
+    if isinstance(plan, dict):
+        if "table_name" in plan and "access_type" in plan:
+            found.append((plan["table_name"], plan["access_type"], plan.get("key")))
+        for value in plan.values():
+            found.extend(access_types(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            found.extend(access_types(value))
+    return found
+
+
+def explain(cursor, sql: str, params) -> list:
+    cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+    return access_types(json.loads(cursor.fetchone()["EXPLAIN"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN regression test for login queries")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--keep", action="store_true", help="Giữ lại database tạm sau khi chạy")
+    args = parser.parse_args()
+
+    config = {k: v for k, v in DATABASE_CONFIG.items() if k != "database"}
+    config.update(read_timeout=600, write_timeout=600, local_infile=True,
+                  cursorclass=pymysql.cursors.DictCursor)
+    connection = pymysql.connect(**config)
+    cursor = connection.cursor()
+
+    print("=" * 70)
+    print(f"🧪 LOGIN QUERY PLAN TEST ({args.rows:,} users in `{SCRATCH_DB}`)")
+    print("=" * 70)
+
+    failures = []
+    try:
+        create_database(cursor, SCRATCH_DB)
+        generate(connection, users=args.rows, students=0, password_hash=PLACEHOLDER_PASSWORD_HASH)
+
+        target = args.rows // 2
+        cases = [
+            ("username", LOGIN_BY_USERNAME_SQL, (username(target),)),
+            ("email", LOGIN_BY_EMAIL_OR_USERNAME_SQL, (email_address(target),) * 2),
+            ("email-miss", LOGIN_BY_EMAIL_OR_USERNAME_SQL, ("nobody@example.com",) * 2),
+        ]
+
+        for name, sql, params in cases:
+            accesses = explain(cursor, sql, params)
+            print(f"\n🔍 {name}: {accesses}")
+            for table, access_type, key in accesses:
+                if table == "users" and access_type in ("ALL", "index", "index_merge"):
+                    failures.append(f"   ❌ {name}: users accessed via {access_type} (key={key})")
+
+        print(f"\nℹ️  legacy OR query: {explain(cursor, LEGACY_LOGIN_SQL, (email_address(target),) * 2)}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{SCRATCH_DB}`")
+        cursor.close()
+        connection.close()
+
+    print("\n" + "=" * 70)
+    if failures:
+        print("⚠️  LOGIN QUERY PLAN REGRESSION!")
+        print("\n".join(failures))
+        return False
+    print("🎉 ALL LOGIN QUERIES USE INDEX SEEKS")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
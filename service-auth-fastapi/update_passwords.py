@@ -2,8 +2,7 @@ import sys
 sys.path.append('..')
 
 from app.utils.password_helper import hash_password
-from app.config.database import get_db_connection, db
-import pymysql
+from app.config.database import db
 
 def update_passwords():
     """Update passwords for existing users"""
@@ -14,36 +13,30 @@ def update_passwords():
         {"username": "admin", "password": "admin123"}
     ]
     
-    connection = None
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        print("=" * 50)
-        print("🔒 Updating passwords for existing users...")
-        print("=" * 50)
-        
-        for user in users:
-            # Hash password
-            password_hash = hash_password(user["password"])
-            
-            # Update password
-            cursor.execute(
-                """
-                UPDATE users 
-                SET password = %s 
-                WHERE username = %s
-                """,
-                (password_hash, user["username"])
-            )
+        with db.transaction() as cursor:
+            print("=" * 50)
+            print("🔒 Updating passwords for existing users...")
+            print("=" * 50)
             
-            if cursor.rowcount > 0:
-                print(f"✅ Updated password for: {user['username']}")
-            else:
-                print(f"⚠️  User not found: {user['username']}")
-        
-        connection.commit()
-        cursor.close()
+            for user in users:
+                # Hash password
+                password_hash = hash_password(user["password"])
+                
+                # Update password
+                cursor.execute(
+                    """
+                    UPDATE users 
+                    SET password = %s 
+                    WHERE username = %s
+                    """,
+                    (password_hash, user["username"])
+                )
+                
+                if cursor.rowcount > 0:
+                    print(f"✅ Updated password for: {user['username']}")
+                else:
+                    print(f"⚠️  User not found: {user['username']}")
         
         print("\n🎉 All passwords updated successfully!")
         print("\n📝 Login credentials:")
@@ -53,15 +46,10 @@ def update_passwords():
         print("=" * 50)
         
     except Exception as e:
-        if connection:
-            connection.rollback()
         print(f"❌ Error updating passwords: {e}")
         import traceback
         traceback.print_exc()
         raise
-    finally:
-        if connection:
-            db.return_connection(connection)
 
 if __name__ == "__main__":
     update_passwords()
\ No newline at end of file
@@ -1,44 +1,18 @@
-import pymysql
-from pymysql.cursors import DictCursor
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv()
 
-class Database:
-    def __init__(self):
-        self.host = os.getenv("DB_HOST", "localhost")
-        self.port = int(os.getenv("DB_PORT", 3306))
-        self.user = os.getenv("DB_USER", "root")
-        self.password = os.getenv("DB_PASSWORD", "")
-        self.database = os.getenv("DB_NAME", "midterm_soa")
-        self.connection = None
+# ✅ Pool/transaction helpers dùng chung: <repo>/shared/soa_common
+SHARED_DIR = os.path.abspath(os.getenv(
+    "SOA_SHARED_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "..", "shared")
+))
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
 
-    def get_connection(self):
-        """Tạo hoặc trả về connection hiện có"""
-        if self.connection is None or not self.connection.open:
-            try:
-                self.connection = pymysql.connect(
-                    host=self.host,
-                    port=self.port,
-                    user=self.user,
-                    password=self.password,
-                    database=self.database,
-                    cursorclass=DictCursor,
-                    autocommit=True,
-                    charset='utf8mb4'
-                )
-                print(f"✅ Database connected: {self.database}@{self.host}:{self.port}")
-            except Exception as e:
-                print(f"❌ Database connection failed: {e}")
-                raise
-        return self.connection
+from soa_common.db import DatabaseConfig  # noqa: E402
+from soa_common.db.aio import AsyncDatabase  # noqa: E402
 
-    def close(self):
-        """Đóng connection"""
-        if self.connection and self.connection.open:
-            self.connection.close()
-            print("🔒 Database connection closed")
-
-# Singleton instance
-db = Database()
\ No newline at end of file
+# Async connection pool (aiomysql): mỗi request checkout một connection riêng
+db = AsyncDatabase(DatabaseConfig.from_env(autocommit=True), name="otp")
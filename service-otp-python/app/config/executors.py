@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+
+import app.config.database  # noqa: F401  (thêm shared/ vào sys.path)
+from soa_common.executors import BlockingExecutor, ExecutorGroup
+
+load_dotenv()
+
+# ✅ Việc blocking của OTP service chạy trong executor riêng theo loại:
+# - database: outbox SQLite (MySQL dùng aiomysql, không cần thread)
+# - email: render MIME message của email OTP
+executors = ExecutorGroup(
+    BlockingExecutor.from_env("database", default_workers=2, default_queue=100),
+    BlockingExecutor.from_env("email", default_workers=2, default_queue=100)
+)
@@ -7,13 +7,32 @@ from app.models.otp import (
     OTPVerifyResponse
 )
 from app.services.otp_service import otp_service
-from app.services.mail_service import mail_service
+from app.services.otp_challenge import otp_challenge_service
+from app.services.email_outbox import email_outbox
+from app.services.payment_auth import payment_auth_service
 from app.middleware.rate_limit import is_allowed
 import datetime
 
 async def generate_otp(request: OTPGenerateRequest) -> OTPGenerateResponse:
     """Generate OTP code based on user_id and current time"""
     try:
+        if otp_service.mode == "stateless":
+            # OTP_MODE=stateless: mã ngẫu nhiên + challenge token đã ký, client gửi lại khi verify
+            issued = otp_challenge_service.issue(request.user_id, request.email)
+            return OTPGenerateResponse(
+                status="success",
+                message="OTP generated successfully",
+                data={
+                    "user_id": request.user_id,
+                    "email": request.email,
+                    "otp": issued["otp_code"],
+                    "challenge": issued["challenge"],
+                    "expires_in": otp_challenge_service.ttl_seconds,
+                    "valid_window": f"{otp_challenge_service.ttl_seconds // 60} minutes",
+                    "timestamp": datetime.datetime.now().isoformat()
+                }
+            )
+
         otp = otp_service.generate_user_otp(request.user_id)
         
         return OTPGenerateResponse(
@@ -33,23 +52,56 @@ async def generate_otp(request: OTPGenerateRequest) -> OTPGenerateResponse:
         raise HTTPException(status_code=500, detail="Failed to generate OTP")
 
 async def send_otp(request: OTPSendRequest) -> OTPGenerateResponse:
-    """Send OTP via email"""
+    """Queue OTP email for background delivery"""
     try:
-        await mail_service.send_otp_email(request.email, request.otp, 5)
+        message_id = await email_outbox.enqueue(request.email, request.otp, 5, request.locale)
         
         return OTPGenerateResponse(
             status="success",
-            message="OTP sent successfully",
+            message="OTP queued for delivery",
             data={
                 "user_id": request.user_id,
                 "email": request.email,
                 "otp_sent": True,
+                "message_id": message_id,
+                "delivery_status": "pending",
                 "timestamp": datetime.datetime.now().isoformat()
             }
         )
     except Exception as e:
-        print(f"❌ Send OTP error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to send email")
+        print(f"❌ Queue OTP email error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue email")
+
+async def get_send_status(message_id: str) -> dict:
+    """Get delivery state of a queued OTP email"""
+    delivery = await email_outbox.get_status(message_id)
+    
+    if delivery is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Message not found",
+                "message": f"No queued email with id {message_id}",
+                "code": "MESSAGE_NOT_FOUND"
+            }
+        )
+    
+    return {
+        "status": "success",
+        "data": {
+            "message_id": delivery["message_id"],
+            "email": delivery["to_email"],
+            "delivery_status": delivery["status"],
+            "attempts": delivery["attempts"],
+            "queued_at": datetime.datetime.fromtimestamp(delivery["created_at"]).isoformat(),
+            "next_attempt_at": datetime.datetime.fromtimestamp(delivery["next_attempt_at"]).isoformat()
+                if delivery["status"] == "pending" else None,
+            "sent_at": datetime.datetime.fromtimestamp(delivery["sent_at"]).isoformat()
+                if delivery["sent_at"] else None,
+            "last_error": delivery["last_error"]
+        },
+        "timestamp": datetime.datetime.now().isoformat()
+    }
 
 async def verify_otp(request: OTPVerifyRequest) -> OTPVerifyResponse:
     """Verify OTP code with rate limiting and anti-replay protection"""
@@ -67,12 +119,18 @@ async def verify_otp(request: OTPVerifyRequest) -> OTPVerifyResponse:
                 }
             )
         
-        # Verify OTP
-        result = otp_service.verify_user_otp(request.user_id, request.otp, interval=300)
+        # Verify OTP (stateless: kiểm tra challenge token, không cần TOTP / database)
+        if otp_service.mode == "stateless":
+            result = otp_challenge_service.verify(request.challenge or "", request.email, request.otp, request.user_id)
+        else:
+            result = otp_service.verify_user_otp(request.user_id, request.otp, interval=300)
         
         if result == "valid":
             txn_id = "TXN-" + datetime.datetime.now().strftime("%Y%m%d%H%M%S")
             
+            # ✅ Token ủy quyền thanh toán, Tuition Service kiểm tra cục bộ tại /payments/pay
+            payment_auth = payment_auth_service.issue(request.user_id, request.email, request.student_id)
+            
             return OTPVerifyResponse(
                 status="success",
                 message="OTP verified successfully",
@@ -81,6 +139,8 @@ async def verify_otp(request: OTPVerifyRequest) -> OTPVerifyResponse:
                     "email": request.email,
                     "verified": True,
                     "txn_id": txn_id,
+                    "payment_token": payment_auth["payment_token"],
+                    "payment_token_expires_in": payment_auth["expires_in"],
                     "timestamp": datetime.datetime.now().isoformat()
                 }
             )
@@ -102,6 +162,15 @@ async def verify_otp(request: OTPVerifyRequest) -> OTPVerifyResponse:
                     "code": "OTP_ALREADY_USED"
                 }
             )
+        elif result == "max_attempts":
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Too many wrong OTP codes",
+                    "message": "Maximum attempts exceeded for this OTP. Please generate a new one.",
+                    "code": "OTP_MAX_ATTEMPTS"
+                }
+            )
         else:
             raise HTTPException(
                 status_code=400,
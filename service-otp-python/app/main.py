@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import otp
+from app.routes import otp, debug
 from app.models.otp import HealthResponse
 import datetime
 import os
@@ -26,6 +26,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(otp.router, prefix="/api")
+app.include_router(debug.router)
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -70,6 +71,10 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """Actions to perform on startup"""
+    from app.services.email_outbox import email_outbox
+    from app.services.otp_janitor import otp_janitor
+    from app.config.database import db
+    
     print("=" * 60)
     print("🚀 OTP Service Started!")
     print(f"📝 Documentation: http://localhost:{os.getenv('PORT', 8002)}/docs")
@@ -77,6 +82,12 @@ async def startup_event():
     print("=" * 60)
     print("✅ In-memory OTP storage initialized")
     print("✅ Rate limiting middleware active")
+    try:
+        await db.connect()
+    except Exception:
+        print("⚠️  Database pool will be created on first use")
+    await email_outbox.start()
+    otp_janitor.start()
 
 # Shutdown event
 @app.on_event("shutdown")
@@ -84,6 +95,15 @@ async def shutdown_event():
     """Actions to perform on shutdown"""
     from app.services.otp_service import otp_service
     from app.middleware.rate_limit import clear_all_rate_limits
+    from app.services.email_outbox import email_outbox
+    from app.services.otp_janitor import otp_janitor
+    from app.config.database import db
+    from app.config.executors import executors
+    
+    await otp_janitor.stop()
+    await email_outbox.stop()
+    executors.shutdown()
+    await db.close()
     
     otp_count = otp_service.clear_storage()
     rate_limit_count = clear_all_rate_limits()
@@ -1,6 +1,12 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
+from dotenv import load_dotenv
 from typing import Optional
+import os
+
+load_dotenv()
+
+OTP_LENGTH = int(os.getenv("OTP_LENGTH", 6))
 
 class OTPGenerateRequest(BaseModel):
     """Model cho request tạo OTP"""
@@ -19,14 +25,17 @@ class OTPSendRequest(BaseModel):
     """Model cho request gửi OTP"""
     user_id: str = Field(..., description="User ID")
     email: EmailStr = Field(..., description="Email nhận OTP")
-    otp: str = Field(..., description="Mã OTP cần gửi")
+    # Chỉ chữ số ASCII: mã OTP được đưa vào header Subject của email
+    otp: str = Field(..., pattern=rf"^[0-9]{{{OTP_LENGTH}}}$", description=f"Mã OTP {OTP_LENGTH} chữ số")
+    locale: Optional[str] = Field(None, description="Ngôn ngữ email (vi, en), mặc định vi")
 
     class Config:
         json_schema_extra = {
             "example": {
                 "user_id": "USR1737618000000",
                 "email": "user@example.com",
-                "otp": "123456"
+                "otp": "123456",
+                "locale": "vi"
             }
         }
 
@@ -35,13 +44,17 @@ class OTPVerifyRequest(BaseModel):
     user_id: str = Field(..., description="User ID")
     email: EmailStr = Field(..., description="Email đã nhận OTP")
     otp: str = Field(..., min_length=6, max_length=6, description="Mã OTP 6 chữ số")
+    student_id: Optional[str] = Field(None, description="Mã sinh viên cần thanh toán (gắn vào payment token)")
+    challenge: Optional[str] = Field(None, description="Challenge token từ /otp/generate (bắt buộc khi OTP_MODE=stateless)")
 
     class Config:
         json_schema_extra = {
             "example": {
                 "user_id": "USR1737618000000",
                 "email": "user@example.com",
-                "otp": "123456"
+                "otp": "123456",
+                "student_id": "ST2025001",
+                "challenge": "v2.eyJlIjoi....abc.def"
             }
         }
 
@@ -82,6 +95,8 @@ class OTPVerifyResponse(BaseModel):
                     "email": "user@example.com",
                     "verified": True,
                     "txn_id": "TXN-20251023123500",
+                    "payment_token": "eyJhbGciOiJIUzI1NiIs...",
+                    "payment_token_expires_in": 300,
                     "timestamp": "2025-10-23T12:35:00"
                 }
             }
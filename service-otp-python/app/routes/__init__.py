@@ -1,3 +1,3 @@
-from . import otp
+from . import otp, debug
 
-__all__ = ["otp"]
\ No newline at end of file
+__all__ = ["otp", "debug"]
\ No newline at end of file
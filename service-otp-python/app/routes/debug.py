@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Query
+from app.config.database import db
+import datetime
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+@router.get("/queries")
+async def top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total", pattern="^(total|avg|max|calls|rows|errors|slow)$")
+):
+    """Top-N SQL statements by fingerprint + recent slow queries (Admin)"""
+    return {
+        "status": "success",
+        "data": {
+            "summary": db.query_stats.snapshot(),
+            "statements": db.query_stats.top(limit, order_by),
+            "slow_queries": db.query_stats.slow_log(limit)
+        },
+        "timestamp": datetime.datetime.now().isoformat()
+    }
@@ -9,6 +9,11 @@ from app.models.otp import (
 )
 from app.controllers import otp as otp_controller
 from app.services.otp_service import otp_service
+from app.services.email_outbox import email_outbox
+from app.services.otp_janitor import otp_janitor
+from app.services.otp_challenge import otp_challenge_service
+from app.config.database import db
+from app.config.executors import executors
 from app.middleware.rate_limit import (
     get_rate_limit_status,
     reset_rate_limit,
@@ -31,17 +36,29 @@ async def generate_otp_endpoint(request: OTPGenerateRequest):
     """
     return await otp_controller.generate_otp(request)
 
-@router.post("/send", response_model=OTPGenerateResponse)
+@router.post("/send", response_model=OTPGenerateResponse, status_code=202)
 async def send_otp_endpoint(request: OTPSendRequest):
     """
-    Send OTP code via email
+    Queue OTP code for email delivery
     
     - **user_id**: User ID who will receive OTP
     - **email**: Email address to send OTP
     - **otp**: OTP code to send
+    
+    Returns 202 as soon as the email is in the outbox.
+    Poll `/otp/send/{message_id}` for the delivery state.
     """
     return await otp_controller.send_otp(request)
 
+@router.get("/send/{message_id}")
+async def send_status_endpoint(message_id: str):
+    """
+    Get delivery state of a queued OTP email
+    
+    States: pending → sending → sent | failed
+    """
+    return await otp_controller.get_send_status(message_id)
+
 @router.post("/verify", response_model=OTPVerifyResponse)
 async def verify_otp_endpoint(request: OTPVerifyRequest):
     """
@@ -107,6 +124,44 @@ async def clear_all_rate_limit():
         "timestamp": datetime.datetime.now().isoformat()
     }
 
+@router.get("/outbox/stats")
+async def get_outbox_stats():
+    """Get email outbox queue depth, age and delivery latency (Admin)"""
+    return {
+        "status": "success",
+        "data": await email_outbox.get_metrics(),
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+
+@router.get("/executors/stats")
+async def get_executor_stats():
+    """Get blocking-work executor queue depth and wait time (Admin)"""
+    return {
+        "status": "success",
+        "data": executors.get_stats(),
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+
+@router.get("/janitor/stats")
+async def get_janitor_stats():
+    """Get expired OTP purge statistics (Admin)"""
+    return {
+        "status": "success",
+        "data": otp_janitor.get_stats(),
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+
+@router.post("/janitor/run")
+async def run_janitor():
+    """Purge expired OTP rows now (Admin)"""
+    purged = await otp_janitor.purge_once()
+    return {
+        "status": "success",
+        "message": f"Purged {purged} expired OTP rows",
+        "data": otp_janitor.get_stats(),
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+
 @router.get("/stats")
 async def get_stats():
     """Get overall OTP service statistics (Admin)"""
@@ -122,7 +177,10 @@ async def get_stats():
             "rate_limiting": {
                 "total_tracked_users": len(request_counters),
                 "users": list(request_counters.keys())
-            }
+            },
+            "database_pool": db.status(),
+            "otp_mode": otp_service.mode,
+            "otp_challenges": otp_challenge_service.get_status()
         },
         "timestamp": datetime.datetime.now().isoformat()
     }
\ No newline at end of file
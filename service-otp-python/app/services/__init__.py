@@ -1,4 +1,7 @@
 from .otp_service import otp_service
 from .mail_service import mail_service
+from .email_outbox import email_outbox
+from .otp_challenge import otp_challenge_service
+from .payment_auth import payment_auth_service
 
-__all__ = ["otp_service", "mail_service"]
\ No newline at end of file
+__all__ = ["otp_service", "mail_service", "email_outbox", "otp_challenge_service", "payment_auth_service"]
\ No newline at end of file
@@ -0,0 +1,390 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.mail_service import mail_service
+from app.services.mail_templates import InvalidOTPCode
+from app.config.executors import executors
+
+load_dotenv()
+
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "email_outbox.db")
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", 2))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", 300))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", 1))
+# Email đã gửi / thất bại được giữ N giây (tra trạng thái qua message_id) rồi xóa
+OUTBOX_RETENTION_SECONDS = float(os.getenv("OUTBOX_RETENTION_SECONDS", 86400))
+OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", 300))
+
+# Trạng thái của một email trong outbox
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+ERROR_OTP_EXPIRED = "OTP expired before delivery"
+
+# Giữ lại N mẫu latency gần nhất để tính percentile
+_LATENCY_SAMPLES = 1000
+
+
+class EmailOutbox:
+    """
+    Outbox bền vững (SQLite) cho email OTP.
+
+    Request chỉ ghi một dòng vào outbox rồi trả về ngay; các worker asyncio
+    chạy nền sẽ lấy email đến hạn, gửi qua SMTP và retry với exponential
+    backoff khi SMTP lỗi. Email đang "sending" khi service bị tắt sẽ được
+    đưa về "pending" ở lần khởi động sau.
+
+    Mã OTP chỉ nằm trong outbox tới khi email gửi xong hoặc thất bại (otp_code
+    bị xóa trắng). Email chưa gửi được trước khi OTP hết hạn thì bỏ, không gửi
+    muộn; dòng sent/failed bị xóa sau OUTBOX_RETENTION_SECONDS.
+    """
+
+    def __init__(self, db_path: str = OUTBOX_DB_PATH, workers: int = OUTBOX_WORKERS):
+        self.db_path = db_path
+        self.worker_count = workers
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._purge_task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Metrics (in-memory, reset khi restart)
+        self._delivery_latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._sent_total = 0
+        self._failed_total = 0
+        self._retried_total = 0
+        self._expired_total = 0
+        self._purged_total = 0
+
+    # ============================================
+    # STORAGE
+    # ============================================
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS email_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message_id TEXT NOT NULL UNIQUE,
+                    to_email TEXT NOT NULL,
+                    otp_code TEXT NOT NULL,
+                    expires_in_minutes INTEGER NOT NULL,
+                    locale TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    sent_at REAL,
+                    last_error TEXT
+                )
+            """)
+            # Outbox tạo trước khi có template theo locale
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(email_outbox)")}
+            if "locale" not in columns:
+                self._conn.execute("ALTER TABLE email_outbox ADD COLUMN locale TEXT")
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+                ON email_outbox (status, next_attempt_at)
+            """)
+        return self._conn
+
+    def _insert(self, to_email: str, otp_code: str, expires_in_minutes: int,
+                locale: Optional[str]) -> str:
+        message_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._get_conn().execute(
+                """
+                INSERT INTO email_outbox (message_id, to_email, otp_code, expires_in_minutes,
+                                          locale, status, attempts, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)
+                """,
+                (message_id, to_email, otp_code, expires_in_minutes, locale, STATUS_PENDING, now, now)
+            )
+        return message_id
+
+    def _claim_next(self) -> Optional[dict]:
+        """Lấy 1 email đến hạn và chuyển sang 'sending' (atomic nhờ lock); OTP đã hết hạn → failed"""
+        with self._lock:
+            conn = self._get_conn()
+            now = time.time()
+            expired = conn.execute(
+                """
+                UPDATE email_outbox SET status = ?, otp_code = '', last_error = ?
+                WHERE status = ? AND next_attempt_at <= ? AND created_at + expires_in_minutes * 60 <= ?
+                """,
+                (STATUS_FAILED, ERROR_OTP_EXPIRED, STATUS_PENDING, now, now)
+            ).rowcount
+            if expired:
+                self._expired_total += expired
+                print(f"⌛ {expired} OTP email(s) expired before delivery")
+            row = conn.execute(
+                """
+                SELECT * FROM email_outbox
+                WHERE status = ? AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT 1
+                """,
+                (STATUS_PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE email_outbox SET status = ?, attempts = attempts + 1 WHERE id = ?",
+                (STATUS_SENDING, row["id"])
+            )
+            job = dict(row)
+            job["attempts"] += 1
+            return job
+
+    # sent / failed: xóa trắng otp_code, outbox không giữ mã OTP sau khi xử lý xong
+    def _mark_sent(self, job_id: int, sent_at: float):
+        with self._lock:
+            self._get_conn().execute(
+                "UPDATE email_outbox SET status = ?, sent_at = ?, otp_code = '', last_error = NULL WHERE id = ?",
+                (STATUS_SENT, sent_at, job_id)
+            )
+
+    def _mark_retry(self, job_id: int, next_attempt_at: float, error: str):
+        with self._lock:
+            self._get_conn().execute(
+                "UPDATE email_outbox SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (STATUS_PENDING, next_attempt_at, error, job_id)
+            )
+
+    def _mark_failed(self, job_id: int, error: str):
+        with self._lock:
+            self._get_conn().execute(
+                "UPDATE email_outbox SET status = ?, otp_code = '', last_error = ? WHERE id = ?",
+                (STATUS_FAILED, error, job_id)
+            )
+
+    def _purge(self, older_than: float) -> int:
+        """Xóa email sent / failed tạo trước older_than"""
+        with self._lock:
+            cursor = self._get_conn().execute(
+                "DELETE FROM email_outbox WHERE status IN (?, ?) AND created_at < ?",
+                (STATUS_SENT, STATUS_FAILED, older_than)
+            )
+            return cursor.rowcount
+
+    def _recover_in_flight(self) -> int:
+        """Email đang 'sending' lúc service dừng → đưa lại về 'pending'"""
+        with self._lock:
+            cursor = self._get_conn().execute(
+                "UPDATE email_outbox SET status = ?, next_attempt_at = ? WHERE status = ?",
+                (STATUS_PENDING, time.time(), STATUS_SENDING)
+            )
+            return cursor.rowcount
+
+    def _fetch_status(self, message_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._get_conn().execute(
+                """
+                SELECT message_id, to_email, status, attempts, created_at,
+                       next_attempt_at, sent_at, last_error
+                FROM email_outbox WHERE message_id = ?
+                """,
+                (message_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _queue_snapshot(self) -> dict:
+        with self._lock:
+            conn = self._get_conn()
+            counts = {
+                row["status"]: row["total"]
+                for row in conn.execute(
+                    "SELECT status, COUNT(*) AS total FROM email_outbox GROUP BY status"
+                ).fetchall()
+            }
+            oldest = conn.execute(
+                "SELECT MIN(created_at) AS oldest FROM email_outbox WHERE status IN (?, ?)",
+                (STATUS_PENDING, STATUS_SENDING)
+            ).fetchone()["oldest"]
+        return {"counts": counts, "oldest_created_at": oldest}
+
+    # ============================================
+    # PUBLIC API
+    # ============================================
+
+    async def enqueue(self, to_email: str, otp_code: str, expires_in_minutes: int = 5,
+                      locale: Optional[str] = None) -> str:
+        """Ghi email vào outbox và đánh thức worker. Trả về message_id."""
+        message_id = await executors["database"].run(
+            self._insert, to_email, otp_code, expires_in_minutes, locale
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        print(f"📥 OTP email queued: {message_id} → {to_email}")
+        return message_id
+
+    async def get_status(self, message_id: str) -> Optional[dict]:
+        """Trạng thái gửi của một email"""
+        return await executors["database"].run(self._fetch_status, message_id)
+
+    async def get_metrics(self) -> dict:
+        """Queue depth, tuổi email cũ nhất và delivery latency"""
+        snapshot = await executors["database"].run(self._queue_snapshot)
+        counts = snapshot["counts"]
+        oldest = snapshot["oldest_created_at"]
+
+        latencies = sorted(self._delivery_latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+            return round(latencies[index], 3)
+
+        return {
+            "queue_depth": counts.get(STATUS_PENDING, 0) + counts.get(STATUS_SENDING, 0),
+            "by_status": {
+                STATUS_PENDING: counts.get(STATUS_PENDING, 0),
+                STATUS_SENDING: counts.get(STATUS_SENDING, 0),
+                STATUS_SENT: counts.get(STATUS_SENT, 0),
+                STATUS_FAILED: counts.get(STATUS_FAILED, 0),
+            },
+            "oldest_pending_age_seconds": round(time.time() - oldest, 3) if oldest else 0,
+            "delivery_latency_seconds": {
+                "samples": len(latencies),
+                "avg": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 3) if latencies else None,
+            },
+            "totals": {
+                "sent": self._sent_total,
+                "failed": self._failed_total,
+                "retried": self._retried_total,
+                "expired": self._expired_total,
+                "purged": self._purged_total,
+            },
+            "workers": {
+                "configured": self.worker_count,
+                "running": sum(1 for task in self._workers if not task.done()),
+            },
+        }
+
+    # ============================================
+    # WORKERS
+    # ============================================
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff + full jitter"""
+        ceiling = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def _deliver(self, job: dict):
+        expires_at = job["created_at"] + job["expires_in_minutes"] * 60
+        try:
+            await mail_service.send_otp_email(
+                job["to_email"], job["otp_code"], job["expires_in_minutes"], job["locale"]
+            )
+        except InvalidOTPCode as e:
+            # Lỗi dữ liệu, gửi lại cũng không thành công → failed ngay, không retry
+            await executors["database"].run(self._mark_failed, job["id"], str(e))
+            self._failed_total += 1
+            print(f"❌ OTP email {job['message_id']} rejected: {e}")
+            return
+        except Exception as e:
+            error = str(e)
+            delay = self._backoff(job["attempts"])
+            if time.time() + delay >= expires_at:
+                # Lần thử tiếp theo đã quá hạn OTP → không gửi mã hết hạn
+                await executors["database"].run(self._mark_failed, job["id"], f"{ERROR_OTP_EXPIRED}: {error}")
+                self._expired_total += 1
+                print(f"⌛ OTP email {job['message_id']} dropped, OTP expires before next retry: {error}")
+            elif job["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+                await executors["database"].run(self._mark_failed, job["id"], error)
+                self._failed_total += 1
+                print(f"❌ OTP email {job['message_id']} failed after {job['attempts']} attempts: {error}")
+            else:
+                await executors["database"].run(self._mark_retry, job["id"], time.time() + delay, error)
+                self._retried_total += 1
+                print(f"🔁 OTP email {job['message_id']} retry #{job['attempts']} in {delay:.1f}s: {error}")
+            return
+
+        sent_at = time.time()
+        await executors["database"].run(self._mark_sent, job["id"], sent_at)
+        self._sent_total += 1
+        self._delivery_latencies.append(sent_at - job["created_at"])
+
+    async def _worker(self, worker_id: int):
+        while self._running:
+            try:
+                job = await executors["database"].run(self._claim_next)
+            except Exception as e:
+                print(f"⚠️ Outbox worker {worker_id} claim error: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._deliver(job)
+
+    async def _purge_loop(self):
+        while self._running:
+            try:
+                purged = await executors["database"].run(self._purge, time.time() - OUTBOX_RETENTION_SECONDS)
+                self._purged_total += purged
+                if purged:
+                    print(f"🧹 Purged {purged} delivered/failed OTP email(s) from outbox")
+            except Exception as e:
+                print(f"⚠️ Outbox purge error: {e}")
+            await asyncio.sleep(OUTBOX_PURGE_INTERVAL_SECONDS)
+
+    async def start(self):
+        """Khởi động worker pool (gọi trong startup event)"""
+        if self._running:
+            return
+        recovered = await executors["database"].run(self._recover_in_flight)
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        self._purge_task = asyncio.create_task(self._purge_loop())
+        print(f"✅ Email outbox started: {self.worker_count} workers, db={self.db_path}"
+              + (f", recovered {recovered} in-flight email(s)" if recovered else ""))
+
+    async def stop(self):
+        """Dừng worker pool; email chưa gửi vẫn nằm trong outbox"""
+        self._running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        tasks = self._workers + ([self._purge_task] if self._purge_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._purge_task = None
+        # Email bị hủy giữa chừng sẽ được gửi lại ở lần khởi động sau
+        await executors["database"].run(self._recover_in_flight)
+
+
+# Singleton instance
+email_outbox = EmailOutbox()
@@ -0,0 +1,170 @@
+import binascii
+import os
+import re
+import uuid
+from email.header import Header
+from email.utils import formataddr, formatdate
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "otp_email"
+DEFAULT_LOCALE = os.getenv("OTP_EMAIL_DEFAULT_LOCALE", "vi")
+
+# Subject theo locale; mã OTP được nối vào cuối
+SUBJECTS = {
+    "vi": "Mã OTP xác thực -",
+    "en": "Your OTP code -",
+}
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Mã OTP được ghép thẳng vào header Subject → chỉ nhận chữ số ASCII (không CR/LF, không Unicode)
+_OTP_CODE = re.compile(r"[0-9]{1,16}")
+
+# Segment đã compile: bytes (tĩnh, đã encode sẵn) hoặc str (dòng có placeholder)
+Segment = Union[bytes, str]
+
+
+class InvalidOTPCode(ValueError):
+    """otp_code không phải chuỗi chữ số ASCII, không thể đưa vào header"""
+
+
+def _qp(text: str) -> bytes:
+    """Quoted-printable encode (binascii, C implementation)"""
+    return binascii.b2a_qp(text.encode("utf-8"))
+
+
+def _compile_body(source: str) -> List[Segment]:
+    """
+    Tách template thành các khối dòng tĩnh (encode QP một lần) và các dòng
+    chứa placeholder (chỉ những dòng này được encode lại cho mỗi email).
+    Tách theo dòng để nối các khối QP với nhau luôn hợp lệ.
+    """
+    segments: List[Segment] = []
+    static_lines: List[str] = []
+
+    for line in source.splitlines(keepends=True):
+        if not line.endswith("\n"):
+            line += "\n"
+        if _PLACEHOLDER.search(line):
+            if static_lines:
+                segments.append(_qp("".join(static_lines)))
+                static_lines = []
+            segments.append(_PLACEHOLDER.sub(lambda m: "{" + m.group(1) + "}", line))
+        else:
+            static_lines.append(line)
+
+    if static_lines:
+        segments.append(_qp("".join(static_lines)))
+    return segments
+
+
+def _render_body(segments: List[Segment], values: Dict[str, str]) -> bytes:
+    return b"".join(
+        segment if isinstance(segment, bytes) else _qp(segment.format(**values))
+        for segment in segments
+    )
+
+
+class CompiledOTPEmail:
+    """
+    Email OTP của một locale đã được compile sẵn.
+
+    Header cố định, boundary multipart, phần text và HTML tĩnh đều được
+    build một lần; mỗi email chỉ còn ghép To/Date/Message-ID, mã OTP và
+    thời gian hết hạn vào skeleton.
+    """
+
+    def __init__(self, locale: str, html_source: str, text_source: str,
+                 subject_prefix: str, from_name: str, from_email: str):
+        self.locale = locale
+        self.boundary = "==otp_" + uuid.uuid4().hex
+        self.domain = from_email.rsplit("@", 1)[-1] if "@" in from_email else "localhost"
+
+        self._html = _compile_body(html_source)
+        self._text = _compile_body(text_source)
+
+        subject = Header(subject_prefix, "utf-8").encode()
+        sender = formataddr((from_name, from_email), charset="utf-8")
+
+        self._head = (
+            f"From: {sender}\n"
+            f"Subject: {subject} "
+        ).encode("ascii")
+        self._mime_head = (
+            "MIME-Version: 1.0\n"
+            f'Content-Type: multipart/alternative; boundary="{self.boundary}"\n'
+            "\n"
+        ).encode("ascii")
+        part_head = (
+            f"--{self.boundary}\n"
+            'Content-Type: text/{subtype}; charset="utf-8"\n'
+            "Content-Transfer-Encoding: quoted-printable\n"
+            "\n"
+        )
+        self._text_head = part_head.format(subtype="plain").encode("ascii")
+        self._html_head = ("\n" + part_head.format(subtype="html")).encode("ascii")
+        self._tail = f"\n--{self.boundary}--\n".encode("ascii")
+
+    def render(self, to_email: str, otp_code: str, expires_in_minutes: int) -> bytes:
+        """Build raw RFC 5322 message (bytes) sẵn sàng để gửi qua SMTP"""
+        if not _OTP_CODE.fullmatch(otp_code):
+            raise InvalidOTPCode("otp_code must contain only ASCII digits")
+        values = {"otp_code": otp_code, "expires_in_minutes": str(expires_in_minutes)}
+        recipient = to_email if to_email.isascii() else Header(to_email, "utf-8").encode()
+
+        return b"".join((
+            self._head,
+            otp_code.encode("ascii"),
+            (
+                f"\nTo: {recipient}\n"
+                f"Date: {formatdate(localtime=True)}\n"
+                f"Message-ID: <{uuid.uuid4().hex}@{self.domain}>\n"
+            ).encode("ascii"),
+            self._mime_head,
+            self._text_head,
+            _render_body(self._text, values),
+            self._html_head,
+            _render_body(self._html, values),
+            self._tail,
+        ))
+
+
+class OTPEmailTemplates:
+    """Registry các template OTP đã compile, load một lần khi khởi động"""
+
+    def __init__(self, from_name: str, from_email: str, template_dir: Path = TEMPLATE_DIR):
+        self.default_locale = DEFAULT_LOCALE
+        self._templates: Dict[str, CompiledOTPEmail] = {}
+
+        for html_path in sorted(template_dir.glob("*.html")):
+            locale = html_path.stem
+            text_path = html_path.with_suffix(".txt")
+            self._templates[locale] = CompiledOTPEmail(
+                locale=locale,
+                html_source=html_path.read_text(encoding="utf-8"),
+                text_source=text_path.read_text(encoding="utf-8"),
+                subject_prefix=SUBJECTS.get(locale, SUBJECTS["en"]),
+                from_name=from_name,
+                from_email=from_email,
+            )
+
+        if self.default_locale not in self._templates:
+            raise RuntimeError(f"Missing OTP email template for default locale '{self.default_locale}'")
+
+        print(f"✅ OTP email templates compiled: {', '.join(self._templates)}")
+
+    @property
+    def locales(self) -> Tuple[str, ...]:
+        return tuple(self._templates)
+
+    def get(self, locale: str = None) -> CompiledOTPEmail:
+        """Template theo locale, fallback về locale mặc định"""
+        if locale:
+            template = self._templates.get(locale.lower()) or self._templates.get(locale.split("-")[0].lower())
+            if template:
+                return template
+        return self._templates[self.default_locale]
@@ -0,0 +1,177 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OTP_LENGTH = int(os.getenv("OTP_LENGTH", 6))
+OTP_EXPIRY_MINUTES = int(os.getenv("OTP_EXPIRY_MINUTES", 5))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 3))
+OTP_CHALLENGE_SECRET = os.getenv("OTP_CHALLENGE_SECRET", "change-this-otp-challenge-secret")
+
+_VERSION = "v2"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class OTPChallengeService:
+    """
+    OTP không trạng thái: thay vì lưu mã vào otp_codes, service trả về một
+    challenge token đã ký HMAC-SHA256, gắn email, user_id, nonce và thời hạn.
+
+        challenge = v2.<payload>.<HMAC(secret, "v2." + payload)>.<HMAC(secret, "v2." + payload + "." + otp)>
+
+    Chữ ký thứ nhất xác thực payload: challenge giả mạo / sửa claims bị từ chối
+    trước khi đọc claims hay ghi gì vào anti-replay store. Chữ ký thứ hai gắn
+    mã OTP — mã không nằm trong token, chỉ ai có mã đúng mới tái tạo được.
+    Verify là một phép kiểm tra CPU cộng với anti-replay store in-memory
+    (nonce đã dùng + số lần nhập sai), không cần truy cập database.
+    """
+
+    def __init__(self, secret: str = OTP_CHALLENGE_SECRET, ttl_seconds: int = OTP_EXPIRY_MINUTES * 60):
+        self._key = secret.encode("utf-8")
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # nonce → thời điểm hết hạn (để dọn dẹp)
+        self._used_nonces: Dict[str, float] = {}
+        # nonce → (số lần nhập sai, thời điểm hết hạn)
+        self._failed_attempts: Dict[str, Tuple[int, float]] = {}
+        self._next_prune = 0.0
+
+    def _mac(self, data: bytes) -> bytes:
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _sign_code(self, signing_input: bytes, otp_code: str) -> bytes:
+        return self._mac(signing_input + b"." + otp_code.encode("utf-8"))
+
+    def generate_code(self) -> str:
+        return f"{secrets.randbelow(10 ** OTP_LENGTH):0{OTP_LENGTH}d}"
+
+    def issue(self, user_id: str, email: str, otp_code: Optional[str] = None) -> dict:
+        """Tạo mã OTP và challenge token tương ứng"""
+        otp_code = otp_code or self.generate_code()
+        expires_at = int(time.time()) + self.ttl_seconds
+        payload = _b64encode(json.dumps(
+            {"e": email.lower(), "u": user_id, "n": secrets.token_urlsafe(12), "x": expires_at},
+            separators=(",", ":")
+        ).encode("utf-8"))
+        signing_input = f"{_VERSION}.{payload}".encode("ascii")
+
+        return {
+            "otp_code": otp_code,
+            "challenge": f"{_VERSION}.{payload}.{_b64encode(self._mac(signing_input))}"
+                         f".{_b64encode(self._sign_code(signing_input, otp_code))}",
+            "expires_at": expires_at
+        }
+
+    def _open(self, challenge: str) -> Optional[Tuple[dict, bytes, bytes]]:
+        """
+        (claims, signing_input, chữ ký mã OTP) nếu payload do service này ký, ngược lại None.
+        Chữ ký payload được kiểm tra trước khi giải mã claims.
+        """
+        try:
+            version, payload, tag, code_signature = challenge.split(".")
+            signing_input = f"{version}.{payload}".encode("ascii")
+            provided_tag = _b64decode(tag)
+            provided_code = _b64decode(code_signature)
+        except (ValueError, TypeError):
+            return None
+        if version != _VERSION or not hmac.compare_digest(self._mac(signing_input), provided_tag):
+            return None
+
+        try:
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(claims, dict):
+            return None
+        expires_at = claims.get("x")
+        if isinstance(expires_at, bool) or not isinstance(expires_at, (int, float)):
+            return None
+        if not all(isinstance(claims.get(key), str) for key in ("e", "u", "n")):
+            return None
+        return claims, signing_input, provided_code
+
+    def verify(self, challenge: str, email: str, otp_code: str, user_id: Optional[str] = None) -> str:
+        """
+        Returns:
+            "valid" | "expired" | "invalid" | "already_used" | "max_attempts"
+        """
+        opened = self._open(challenge)
+        if opened is None:
+            return "invalid"
+        claims, signing_input, provided_code = opened
+
+        if claims["e"] != email.lower():
+            return "invalid"
+        if user_id is not None and claims["u"] != user_id:
+            return "invalid"
+
+        now = time.time()
+        if now > claims["x"]:
+            return "expired"
+
+        nonce = claims["n"]
+        expected = self._sign_code(signing_input, otp_code)
+
+        with self._lock:
+            self._prune(now)
+
+            if nonce in self._used_nonces:
+                return "already_used"
+            failures = self._failed_attempts.get(nonce, (0, 0))[0]
+            if failures >= OTP_MAX_ATTEMPTS:
+                return "max_attempts"
+
+            if not hmac.compare_digest(expected, provided_code):
+                self._failed_attempts[nonce] = (failures + 1, claims["x"])
+                return "invalid"
+
+            # ✅ Anti-replay: challenge chỉ dùng được một lần
+            self._used_nonces[nonce] = claims["x"]
+            self._failed_attempts.pop(nonce, None)
+            return "valid"
+
+    def remaining_attempts(self, challenge: str) -> int:
+        opened = self._open(challenge)
+        if opened is None:
+            return 0
+        with self._lock:
+            failures = self._failed_attempts.get(opened[0]["n"], (0, 0))[0]
+        return max(0, OTP_MAX_ATTEMPTS - failures)
+
+    def _prune(self, now: float):
+        """Xóa nonce đã hết hạn (challenge hết hạn thì không thể replay nữa)"""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        for nonce in [nonce for nonce, exp in self._used_nonces.items() if exp < now]:
+            del self._used_nonces[nonce]
+        for nonce in [nonce for nonce, (_, exp) in self._failed_attempts.items() if exp < now]:
+            del self._failed_attempts[nonce]
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "used_nonces": len(self._used_nonces),
+                "tracked_failed_challenges": len(self._failed_attempts),
+                "ttl_seconds": self.ttl_seconds
+            }
+
+
+# Singleton instance
+otp_challenge_service = OTPChallengeService()
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.config.database import db
+
+load_dotenv()
+
+# Giữ lại OTP đã hết hạn thêm N phút (phục vụ debug/audit) trước khi xóa
+OTP_RETENTION_MINUTES = int(os.getenv("OTP_RETENTION_MINUTES", 60))
+OTP_PURGE_INTERVAL_SECONDS = int(os.getenv("OTP_PURGE_INTERVAL_SECONDS", 300))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", 1000))
+# Nghỉ giữa các batch để không giữ lock/IO liên tục
+OTP_PURGE_BATCH_PAUSE_SECONDS = float(os.getenv("OTP_PURGE_BATCH_PAUSE_SECONDS", 0.05))
+
+
+class OTPJanitor:
+    """
+    Task nền xóa các dòng otp_codes đã hết hạn.
+
+    Xóa theo từng batch nhỏ (DELETE ... LIMIT n) dựa trên index (expires_at),
+    mỗi batch là một statement autocommit riêng nên không giữ lock lâu.
+    """
+
+    def __init__(self):
+        self.retention_minutes = OTP_RETENTION_MINUTES
+        self.interval_seconds = OTP_PURGE_INTERVAL_SECONDS
+        self.batch_size = OTP_PURGE_BATCH_SIZE
+        self._task: Optional[asyncio.Task] = None
+        self._running_purge = asyncio.Lock()
+
+        # Metrics
+        self.runs_total = 0
+        self.rows_purged_total = 0
+        self.errors_total = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_rows = 0
+        self.last_run_batches = 0
+        self.last_run_duration = 0.0
+        self.last_error: Optional[str] = None
+
+    async def purge_once(self) -> int:
+        """Xóa toàn bộ OTP quá hạn retention, từng batch một. Trả về số dòng đã xóa."""
+        async with self._running_purge:
+            cutoff = datetime.now() - timedelta(minutes=self.retention_minutes)
+            started = time.perf_counter()
+            purged = 0
+            batches = 0
+            self.last_error = None
+
+            try:
+                while True:
+                    async with db.cursor() as cursor:
+                        await cursor.execute(
+                            """
+                            DELETE FROM otp_codes
+                            WHERE expires_at < %s
+                            ORDER BY expires_at
+                            LIMIT %s
+                            """,
+                            (cutoff, self.batch_size)
+                        )
+                        deleted = cursor.rowcount
+                    purged += deleted
+                    batches += 1
+                    self.rows_purged_total += deleted
+
+                    if deleted < self.batch_size:
+                        break
+                    await asyncio.sleep(OTP_PURGE_BATCH_PAUSE_SECONDS)
+            except Exception as e:
+                self.errors_total += 1
+                self.last_error = str(e)
+                print(f"❌ OTP purge error after {purged} rows: {e}")
+                raise
+            finally:
+                self.runs_total += 1
+                self.last_run_at = datetime.now()
+                self.last_run_rows = purged
+                self.last_run_batches = batches
+                self.last_run_duration = time.perf_counter() - started
+
+            if purged:
+                print(f"🧹 Purged {purged} expired OTP row(s) in {batches} batch(es) "
+                      f"({self.last_run_duration:.2f}s)")
+            return purged
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.purge_once()
+            except Exception:
+                pass  # đã ghi nhận vào metrics, thử lại ở lượt sau
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Khởi động task định kỳ (gọi trong startup event)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            print(f"✅ OTP janitor started: every {self.interval_seconds}s, "
+                  f"retention {self.retention_minutes}m, batch {self.batch_size}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval_seconds,
+            "retention_minutes": self.retention_minutes,
+            "batch_size": self.batch_size,
+            "runs_total": self.runs_total,
+            "rows_purged_total": self.rows_purged_total,
+            "errors_total": self.errors_total,
+            "last_run": {
+                "at": self.last_run_at.isoformat() if self.last_run_at else None,
+                "rows_purged": self.last_run_rows,
+                "batches": self.last_run_batches,
+                "duration_seconds": round(self.last_run_duration, 3),
+                "error": self.last_error
+            }
+        }
+
+
+# Singleton instance
+otp_janitor = OTPJanitor()
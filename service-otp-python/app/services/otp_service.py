@@ -2,7 +2,8 @@ import random
 import string
 from datetime import datetime, timedelta
 from app.config.database import db
-from app.services.mail_service import mail_service
+from app.services.email_outbox import email_outbox
+from app.services.otp_challenge import otp_challenge_service
 from dotenv import load_dotenv
 import os
 import pyotp
@@ -15,6 +16,8 @@ load_dotenv()
 OTP_LENGTH = int(os.getenv("OTP_LENGTH", 6))
 OTP_EXPIRY_MINUTES = int(os.getenv("OTP_EXPIRY_MINUTES", 5))
 OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 3))
+# "database": lưu OTP vào otp_codes | "stateless": trả về challenge token đã ký HMAC
+OTP_MODE = os.getenv("OTP_MODE", "database").strip().lower()
 
 # ✅ In-memory storage cho OTP secrets
 _otp_storage: Dict[str, str] = {}
@@ -23,6 +26,11 @@ _otp_storage: Dict[str, str] = {}
 _used_otp_tokens: Dict[str, set] = {}
 
 class OTPService:
+    def __init__(self, mode: str = OTP_MODE):
+        if mode not in ("database", "stateless"):
+            raise ValueError(f"Unsupported OTP_MODE: {mode}")
+        self.mode = mode
+    
     def get_user_secret(self, user_id: str) -> str:
         """
         Tạo secret key CỐ ĐỊNH từ user_id.
@@ -58,106 +66,158 @@ class OTPService:
     async def send_otp(self, user_id: str, email: str) -> dict:
         """Gửi OTP qua email"""
         try:
-            connection = db.get_connection()
-            
-            with connection.cursor() as cursor:
+            async with db.cursor() as cursor:
                 # Kiểm tra email có tồn tại trong hệ thống không
-                cursor.execute("SELECT email_address FROM users WHERE email_address = %s", (email,))
-                if not cursor.fetchone():
+                await cursor.execute("SELECT email_address FROM users WHERE email_address = %s", (email,))
+                if not await cursor.fetchone():
                     raise Exception("Email not found in system")
-                
-                # Xóa OTP cũ chưa sử dụng của email này
-                cursor.execute("""
-                    DELETE FROM otp_codes 
-                    WHERE email = %s AND verified = 0
-                """, (email,))
-                
-                # Tạo mã OTP mới
-                otp_code = self.generate_otp(user_id=user_id)
-                expires_at = datetime.now() + timedelta(minutes=OTP_EXPIRY_MINUTES)
-                
-                # Lưu vào database
-                cursor.execute("""
-                    INSERT INTO otp_codes (email, otp_code, expires_at, attempts, verified)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (email, otp_code, expires_at, 0, 0))
-                
-                # Gửi email
-                await mail_service.send_otp_email(email, otp_code, OTP_EXPIRY_MINUTES)
-                
-                return {
-                    "success": True,
-                    "message": "OTP sent successfully",
-                    "email": email,
-                    "expires_at": expires_at
-                }
+            
+            if self.mode == "stateless":
+                otp_code, extra = self._issue_stateless_otp(user_id, email)
+            else:
+                otp_code, extra = await self._issue_db_otp(user_id, email)
+            
+            # Đưa email vào outbox, worker nền sẽ gửi
+            message_id = await email_outbox.enqueue(email, otp_code, OTP_EXPIRY_MINUTES)
+            
+            return {
+                "success": True,
+                "message": "OTP queued for delivery",
+                "email": email,
+                "message_id": message_id,
+                **extra
+            }
                 
         except Exception as e:
             raise Exception(str(e))
     
-    def verify_otp(self, email: str, otp_code: str) -> dict:
+    async def _issue_db_otp(self, user_id: str, email: str):
+        """Tạo OTP và lưu vào bảng otp_codes"""
+        otp_code = self.generate_otp(user_id=user_id)
+        expires_at = datetime.now() + timedelta(minutes=OTP_EXPIRY_MINUTES)
+        
+        async with db.transaction() as cursor:
+            # Xóa OTP cũ chưa sử dụng của email này
+            await cursor.execute("""
+                DELETE FROM otp_codes 
+                WHERE email = %s AND verified = 0
+            """, (email,))
+            
+            # Lưu vào database
+            await cursor.execute("""
+                INSERT INTO otp_codes (email, otp_code, expires_at, attempts, verified)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (email, otp_code, expires_at, 0, 0))
+        
+        return otp_code, {"expires_at": expires_at}
+    
+    def _issue_stateless_otp(self, user_id: str, email: str):
+        """Tạo OTP kèm challenge token đã ký, không ghi database"""
+        issued = otp_challenge_service.issue(user_id, email)
+        return issued["otp_code"], {
+            "challenge": issued["challenge"],
+            "expires_at": datetime.fromtimestamp(issued["expires_at"])
+        }
+    
+    async def verify_otp(self, email: str, otp_code: str, challenge: Optional[str] = None,
+                         user_id: Optional[str] = None) -> dict:
         """Xác thực mã OTP"""
+        if self.mode == "stateless":
+            return self._verify_stateless_otp(email, otp_code, challenge, user_id)
+        
         try:
-            connection = db.get_connection()
+            error = None
+            verified_at = None
             
-            with connection.cursor() as cursor:
-                # Lấy OTP gần nhất chưa được verify
-                cursor.execute("""
+            async with db.transaction() as cursor:
+                # Lấy OTP gần nhất chưa được verify (khóa dòng để các lần thử song song không ghi đè nhau)
+                await cursor.execute("""
                     SELECT * FROM otp_codes 
                     WHERE email = %s AND verified = 0
                     ORDER BY created_at DESC
                     LIMIT 1
+                    FOR UPDATE
                 """, (email,))
                 
-                otp_record = cursor.fetchone()
+                otp_record = await cursor.fetchone()
                 
                 if not otp_record:
-                    raise Exception("No OTP found for this email")
+                    error = "No OTP found for this email"
                 
                 # Kiểm tra hết hạn
-                if datetime.now() > otp_record['expires_at']:
-                    cursor.execute("""
+                elif datetime.now() > otp_record['expires_at']:
+                    await cursor.execute("""
                         DELETE FROM otp_codes WHERE id = %s
                     """, (otp_record['id'],))
-                    raise Exception("OTP has expired")
+                    error = "OTP has expired"
                 
                 # Kiểm tra số lần thử
-                if otp_record['attempts'] >= OTP_MAX_ATTEMPTS:
-                    cursor.execute("""
+                elif otp_record['attempts'] >= OTP_MAX_ATTEMPTS:
+                    await cursor.execute("""
                         DELETE FROM otp_codes WHERE id = %s
                     """, (otp_record['id'],))
-                    raise Exception("Maximum attempts exceeded")
+                    error = "Maximum attempts exceeded"
                 
                 # Kiểm tra mã OTP
-                if otp_record['otp_code'] != otp_code:
+                elif otp_record['otp_code'] != otp_code:
                     # Tăng số lần thử
-                    cursor.execute("""
+                    await cursor.execute("""
                         UPDATE otp_codes 
                         SET attempts = attempts + 1 
                         WHERE id = %s
                     """, (otp_record['id'],))
                     
                     remaining_attempts = OTP_MAX_ATTEMPTS - (otp_record['attempts'] + 1)
-                    raise Exception(f"Invalid OTP code. {remaining_attempts} attempts remaining")
+                    error = f"Invalid OTP code. {remaining_attempts} attempts remaining"
                 
-                # OTP đúng - đánh dấu đã verify
-                verified_at = datetime.now()
-                cursor.execute("""
-                    UPDATE otp_codes 
-                    SET verified = 1, verified_at = %s 
-                    WHERE id = %s
-                """, (verified_at, otp_record['id']))
-                
-                return {
-                    "success": True,
-                    "message": "OTP verified successfully",
-                    "email": email,
-                    "verified_at": verified_at
-                }
+                else:
+                    # OTP đúng - đánh dấu đã verify
+                    verified_at = datetime.now()
+                    await cursor.execute("""
+                        UPDATE otp_codes 
+                        SET verified = 1, verified_at = %s 
+                        WHERE id = %s
+                    """, (verified_at, otp_record['id']))
+            
+            # Raise sau khi commit để DELETE/UPDATE ở trên không bị rollback
+            if error:
+                raise Exception(error)
+            
+            return {
+                "success": True,
+                "message": "OTP verified successfully",
+                "email": email,
+                "verified_at": verified_at
+            }
                 
         except Exception as e:
             raise Exception(str(e))
     
+    def _verify_stateless_otp(self, email: str, otp_code: str, challenge: Optional[str],
+                              user_id: Optional[str]) -> dict:
+        """Xác thực OTP bằng challenge token: chỉ kiểm tra chữ ký + anti-replay, không truy cập DB"""
+        if not challenge:
+            raise Exception("No OTP found for this email")
+        
+        result = otp_challenge_service.verify(challenge, email, otp_code, user_id)
+        
+        if result == "expired":
+            raise Exception("OTP has expired")
+        if result == "max_attempts":
+            raise Exception("Maximum attempts exceeded")
+        if result == "already_used":
+            raise Exception("OTP has already been used")
+        if result != "valid":
+            remaining_attempts = otp_challenge_service.remaining_attempts(challenge)
+            raise Exception(f"Invalid OTP code. {remaining_attempts} attempts remaining")
+        
+        return {
+            "success": True,
+            "message": "OTP verified successfully",
+            "email": email,
+            "verified_at": datetime.now()
+        }
+    
     def get_user_secret(self, user_id: str) -> str:
         """
         Tạo secret key CỐ ĐỊNH từ user_id
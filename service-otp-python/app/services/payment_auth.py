@@ -0,0 +1,52 @@
+import os
+import secrets
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+from jose import jwt
+
+load_dotenv()
+
+# Secret dùng chung với Tuition Service (service-tution-python/app/utils/payment_auth.py)
+PAYMENT_AUTH_SECRET = os.getenv("PAYMENT_AUTH_SECRET", "change-this-payment-auth-secret")
+PAYMENT_AUTH_TTL_SECONDS = int(os.getenv("PAYMENT_AUTH_TTL_SECONDS", 300))
+PAYMENT_AUTH_ALGORITHM = "HS256"
+PAYMENT_AUTH_TOKEN_TYPE = "payment_auth"
+
+
+class PaymentAuthService:
+    """
+    Phát hành payment-authorization token sau khi OTP được xác thực.
+
+    Token là JWT ngắn hạn, dùng một lần (jti), gắn user_id và (tùy chọn) student_id.
+    Tuition Service kiểm tra chữ ký cục bộ nên /payments/pay không cần gọi lại OTP Service.
+    """
+
+    def __init__(self, secret: str = PAYMENT_AUTH_SECRET, ttl_seconds: int = PAYMENT_AUTH_TTL_SECONDS):
+        self._secret = secret
+        self.ttl_seconds = ttl_seconds
+        self.issued_total = 0
+
+    def issue(self, user_id: str, email: str, student_id: Optional[str] = None) -> dict:
+        now = int(time.time())
+        claims = {
+            "typ": PAYMENT_AUTH_TOKEN_TYPE,
+            "sub": user_id,
+            "email": email,
+            "jti": secrets.token_urlsafe(16),
+            "iat": now,
+            "exp": now + self.ttl_seconds
+        }
+        if student_id:
+            claims["student_id"] = student_id
+
+        self.issued_total += 1
+        return {
+            "payment_token": jwt.encode(claims, self._secret, algorithm=PAYMENT_AUTH_ALGORITHM),
+            "expires_in": self.ttl_seconds
+        }
+
+
+# Singleton instance
+payment_auth_service = PaymentAuthService()
@@ -0,0 +1,151 @@
+"""
+Benchmark chi phí render email OTP
+
+So sánh cách cũ (f-string ~4 KB HTML + MIMEMultipart mới cho mỗi email)
+với template đã compile sẵn (app/services/mail_templates.py).
+
+Chạy: python bench_email_render.py [--count 100000] [--locale vi]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from app.services.mail_service import mail_service
+
+
+def legacy_render(to_email: str, otp_code: str, expires_in_minutes: int) -> bytes:
+    """Cách render trước đây của MailService.send_otp_email"""
+    html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{
+                    font-family: Arial, sans-serif;
+                    line-height: 1.6;
+                    color: #333;
+                }}
+                .container {{
+                    max-width: 600px;
+                    margin: 0 auto;
+                    padding: 20px;
+                    background-color: #f4f4f4;
+                }}
+                .content {{
+                    background-color: white;
+                    padding: 30px;
+                    border-radius: 10px;
+                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+                }}
+                .header {{
+                    text-align: center;
+                    color: #2563eb;
+                    margin-bottom: 30px;
+                }}
+                .otp-code {{
+                    font-size: 32px;
+                    font-weight: bold;
+                    color: #2563eb;
+                    text-align: center;
+                    padding: 20px;
+                    background-color: #f0f9ff;
+                    border-radius: 8px;
+                    letter-spacing: 8px;
+                    margin: 20px 0;
+                }}
+                .warning {{
+                    color: #dc2626;
+                    font-size: 14px;
+                    text-align: center;
+                    margin-top: 20px;
+                }}
+                .footer {{
+                    text-align: center;
+                    margin-top: 30px;
+                    font-size: 12px;
+                    color: #666;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="content">
+                    <div class="header">
+                        <h1>🔐 Xác thực OTP</h1>
+                    </div>
+
+                    <p>Xin chào,</p>
+
+                    <p>Bạn đã yêu cầu mã OTP để xác thực tài khoản trên hệ thống Thanh toán học phí SOA.</p>
+
+                    <div class="otp-code">
+                        {otp_code}
+                    </div>
+
+                    <p>Mã OTP này sẽ hết hạn sau <strong>{expires_in_minutes} phút</strong>.</p>
+
+                    <div class="warning">
+                        ⚠️ Không chia sẻ mã này với bất kỳ ai!
+                    </div>
+
+                    <p>Nếu bạn không yêu cầu mã này, vui lòng bỏ qua email này.</p>
+
+                    <div class="footer">
+                        <p>Email này được gửi tự động, vui lòng không trả lời.</p>
+                        <p>&copy; 2025 SOA Tuition Payment System</p>
+                    </div>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+    message = MIMEMultipart("alternative")
+    message["Subject"] = f"Mã OTP xác thực - {otp_code}"
+    message["From"] = f"{mail_service.from_name} <{mail_service.from_email}>"
+    message["To"] = to_email
+    message.attach(MIMEText(html_content, "html"))
+    # aiosmtplib serialize message trước khi gửi
+    return message.as_bytes()
+
+
+def run(label: str, render, count: int) -> float:
+    start = time.perf_counter()
+    total_bytes = 0
+    for i in range(count):
+        raw = render(f"student{i}@example.com", f"{i % 1000000:06d}", 5)
+        total_bytes += len(raw)
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<12} {count:>8,} emails  {elapsed:8.2f}s  "
+          f"{elapsed / count * 1e6:8.1f} µs/email  {count / elapsed:10,.0f} emails/s  "
+          f"avg {total_bytes // count:,} bytes")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OTP email rendering")
+    parser.add_argument("--count", type=int, default=100000, help="Số email (mặc định 100k)")
+    parser.add_argument("--locale", default="vi", help="Locale của template compile sẵn")
+    args = parser.parse_args()
+
+    template = mail_service.templates.get(args.locale)
+
+    print("=" * 80)
+    print(f"📧 OTP email render benchmark — {args.count:,} emails (locale={template.locale})")
+    print("=" * 80)
+
+    legacy = run("legacy", legacy_render, args.count)
+    compiled = run("compiled", template.render, args.count)
+
+    print("=" * 80)
+    print(f"⚡ Speedup: {legacy / compiled:.1f}x")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark OTP hot path: chế độ database (otp_codes) và stateless (challenge HMAC)
+
+Mỗi flow = phát hành OTP + verify đúng mã cho một email riêng. Bỏ qua bước kiểm tra
+bảng users và email outbox (giống nhau ở cả hai chế độ) để chỉ đo phần lưu/kiểm tra OTP.
+Chế độ database cần MySQL đang chạy (cấu hình trong .env); nếu không kết nối được
+thì chỉ chạy stateless.
+
+Chạy: python bench_otp_modes.py [--count 5000] [--concurrency 20]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import asyncio
+import time
+
+from app.config.database import db
+from app.services.otp_service import OTPService
+
+EMAIL_PREFIX = "otp-bench-"
+
+
+def email_for(i: int) -> str:
+    return f"{EMAIL_PREFIX}{i}@example.com"
+
+
+async def run_mode(mode: str, count: int, concurrency: int) -> float:
+    service = OTPService(mode=mode)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def flow(i: int):
+        user_id = f"BENCH{i:07d}"
+        async with semaphore:
+            if mode == "stateless":
+                otp_code, issued = service._issue_stateless_otp(user_id, email_for(i))
+            else:
+                otp_code, issued = await service._issue_db_otp(user_id, email_for(i))
+            await service.verify_otp(email_for(i), otp_code, issued.get("challenge"), user_id)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(flow(i) for i in range(count)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    print(f"{mode:<10} {count:>8,} flows  {elapsed:8.2f}s  {count / elapsed:10,.0f} flows/s  "
+          f"{elapsed / count * 1e6:9.1f} µs/flow  errors={len(errors)}")
+    if errors:
+        print(f"           first error: {errors[0]}")
+    return elapsed
+
+
+async def cleanup():
+    async with db.cursor() as cursor:
+        await cursor.execute("DELETE FROM otp_codes WHERE email LIKE %s", (f"{EMAIL_PREFIX}%",))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark OTP database vs stateless mode")
+    parser.add_argument("--count", type=int, default=5000, help="Số flow issue+verify mỗi chế độ")
+    parser.add_argument("--concurrency", type=int, default=20, help="Số flow chạy song song")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"🔐 OTP mode benchmark — {args.count:,} flows, concurrency {args.concurrency}")
+    print("=" * 80)
+
+    stateless = await run_mode("stateless", args.count, args.concurrency)
+
+    try:
+        await db.connect()
+    except Exception as e:
+        print(f"⚠️  Database unavailable, skipping database mode: {e}")
+        return
+
+    try:
+        database = await run_mode("database", args.count, args.concurrency)
+        await cleanup()
+    finally:
+        await db.close()
+
+    print("=" * 80)
+    print(f"⚡ Stateless speedup: {database / stateless:.1f}x  (pool size {db.max_size})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import sys
+sys.path.append('.')
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.config.database import db
+from app.services.otp_service import otp_service
+
+# Số request verify chạy song song
+CONCURRENT_REQUESTS = 50
+EMAIL_PREFIX = "concurrency-test-"
+
+def email_for(i: int) -> str:
+    return f"{EMAIL_PREFIX}{i}@example.com"
+
+def code_for(i: int) -> str:
+    return f"{(i * 7919) % 1000000:06d}"
+
+def wrong_code_for(i: int) -> str:
+    return f"{(int(code_for(i)) + 1) % 1000000:06d}"
+
+async def seed_otp_codes():
+    """Tạo một OTP riêng cho mỗi email test"""
+    expires_at = datetime.now() + timedelta(minutes=5)
+    async with db.transaction() as cursor:
+        await cursor.execute("DELETE FROM otp_codes WHERE email LIKE %s", (f"{EMAIL_PREFIX}%",))
+        await cursor.executemany(
+            """
+            INSERT INTO otp_codes (email, otp_code, expires_at, attempts, verified)
+            VALUES (%s, %s, %s, 0, 0)
+            """,
+            [(email_for(i), code_for(i), expires_at) for i in range(CONCURRENT_REQUESTS)]
+        )
+
+async def cleanup():
+    async with db.cursor() as cursor:
+        await cursor.execute("DELETE FROM otp_codes WHERE email LIKE %s", (f"{EMAIL_PREFIX}%",))
+
+async def verify(i: int):
+    """
+    Request chẵn gửi đúng mã, request lẻ gửi sai mã.
+    Kết quả của mỗi request chỉ được phụ thuộc vào OTP của chính email đó.
+    """
+    code = code_for(i) if i % 2 == 0 else wrong_code_for(i)
+    try:
+        result = await otp_service.verify_otp(email_for(i), code)
+        return i, "verified" if result["success"] else "unexpected", None
+    except Exception as e:
+        message = str(e)
+        if message.startswith("Invalid OTP code"):
+            return i, "rejected", None
+        return i, "error", message
+
+async def connection_ids():
+    """Các checkout đồng thời phải nhận connection khác nhau"""
+    async def conn_id():
+        async with db.cursor() as cursor:
+            await cursor.execute("SELECT CONNECTION_ID() AS conn_id, SLEEP(0.2)")
+            return (await cursor.fetchone())["conn_id"]
+    return await asyncio.gather(*(conn_id() for _ in range(db.max_size)))
+
+async def test_otp_concurrency():
+    print("=" * 70)
+    print(f"🧪 TESTING CONCURRENT OTP VERIFICATION ({CONCURRENT_REQUESTS} requests)")
+    print("=" * 70)
+
+    await db.connect()
+    try:
+        await seed_otp_codes()
+
+        results = await asyncio.gather(*(verify(i) for i in range(CONCURRENT_REQUESTS)))
+
+        failures = []
+        for i, outcome, error in results:
+            expected = "verified" if i % 2 == 0 else "rejected"
+            if outcome != expected:
+                failures.append(f"   ❌ {email_for(i)}: expected {expected}, got {outcome} {error or ''}")
+
+        # Kiểm tra trạng thái trong DB: mỗi dòng chỉ bị thay đổi bởi request của nó
+        async with db.cursor() as cursor:
+            await cursor.execute(
+                "SELECT email, verified, attempts FROM otp_codes WHERE email LIKE %s",
+                (f"{EMAIL_PREFIX}%",)
+            )
+            rows = {row["email"]: row for row in await cursor.fetchall()}
+
+        for i in range(CONCURRENT_REQUESTS):
+            row = rows.get(email_for(i))
+            expected = (1, 0) if i % 2 == 0 else (0, 1)
+            actual = (row["verified"], row["attempts"]) if row else None
+            if actual != expected:
+                failures.append(f"   ❌ {email_for(i)}: expected (verified, attempts)={expected}, got {actual}")
+
+        ids = await connection_ids()
+
+        print("\n" + "=" * 70)
+        print("📊 RESULTS:")
+        print("=" * 70)
+        print(f"   Pool status: {db.status()}")
+        print(f"   Distinct connections for {len(ids)} concurrent checkouts: {len(set(ids))}")
+
+        if len(set(ids)) != len(ids):
+            failures.append("   ❌ Concurrent checkouts shared a connection")
+
+        if failures:
+            print("\n⚠️  CROSS-REQUEST INTERFERENCE DETECTED!")
+            print("\n".join(failures))
+            return False
+
+        print("\n🎉 NO CROSS-REQUEST INTERFERENCE!")
+        print("   Every request saw and updated only its own OTP row.")
+        return True
+    finally:
+        await cleanup()
+        await db.close()
+
+if __name__ == "__main__":
+    ok = asyncio.run(test_otp_concurrency())
+    sys.exit(0 if ok else 1)
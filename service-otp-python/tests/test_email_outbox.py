@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from app.services.email_outbox import EmailOutbox, ERROR_OTP_EXPIRED, STATUS_FAILED, STATUS_SENT
+
+# app.services re-export singleton email_outbox trùng tên module
+outbox_module = sys.modules["app.services.email_outbox"]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return EmailOutbox(db_path=str(tmp_path / "outbox.db"), workers=1)
+
+
+def _row(outbox, message_id):
+    return dict(outbox._get_conn().execute(
+        "SELECT status, otp_code, last_error FROM email_outbox WHERE message_id = ?", (message_id,)
+    ).fetchone())
+
+
+def test_sent_email_no_longer_stores_the_otp(outbox, monkeypatch):
+    sent = []
+
+    async def send(to_email, otp_code, expires_in_minutes, locale):
+        sent.append(otp_code)
+
+    monkeypatch.setattr(outbox_module.mail_service, "send_otp_email", send)
+    message_id = outbox._insert("a@example.com", "123456", 5, None)
+    asyncio.run(outbox._deliver(outbox._claim_next()))
+
+    assert sent == ["123456"]
+    assert _row(outbox, message_id) == {"status": STATUS_SENT, "otp_code": "", "last_error": None}
+
+
+def test_expired_otp_is_failed_instead_of_sent(outbox):
+    message_id = outbox._insert("a@example.com", "123456", 5, None)
+    outbox._get_conn().execute("UPDATE email_outbox SET created_at = ?", (time.time() - 301,))
+
+    assert outbox._claim_next() is None
+    assert _row(outbox, message_id) == {"status": STATUS_FAILED, "otp_code": "", "last_error": ERROR_OTP_EXPIRED}
+    assert outbox._expired_total == 1
+
+
+def test_retry_past_expiry_fails_the_job(outbox, monkeypatch):
+    async def send(*args):
+        raise OSError("smtp down")
+
+    monkeypatch.setattr(outbox_module.mail_service, "send_otp_email", send)
+    monkeypatch.setattr(outbox, "_backoff", lambda attempts: 600)
+    message_id = outbox._insert("a@example.com", "123456", 5, None)
+    asyncio.run(outbox._deliver(outbox._claim_next()))
+
+    row = _row(outbox, message_id)
+    assert row["status"] == STATUS_FAILED
+    assert row["otp_code"] == ""
+    assert row["last_error"].startswith(ERROR_OTP_EXPIRED)
+
+
+def test_purge_removes_only_finished_rows_past_retention(outbox):
+    old_sent = outbox._insert("a@example.com", "111111", 5, None)
+    pending = outbox._insert("b@example.com", "222222", 5, None)
+    outbox._get_conn().execute("UPDATE email_outbox SET created_at = ?", (time.time() - 7200,))
+    outbox._mark_sent(outbox._get_conn().execute(
+        "SELECT id FROM email_outbox WHERE message_id = ?", (old_sent,)
+    ).fetchone()["id"], time.time())
+
+    assert outbox._purge(time.time() - 3600) == 1
+    assert outbox._fetch_status(old_sent) is None
+    assert outbox._fetch_status(pending) is not None
+
+
+def test_invalid_otp_code_fails_without_retry(outbox):
+    message_id = outbox._insert("a@example.com", "123456\r\nBcc: attacker@evil.com", 5, None)
+    asyncio.run(outbox._deliver(outbox._claim_next()))
+
+    row = _row(outbox, message_id)
+    assert row["status"] == STATUS_FAILED
+    assert row["otp_code"] == ""
+    assert outbox._retried_total == 0
@@ -0,0 +1,37 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.otp import OTPSendRequest
+from app.services.mail_templates import InvalidOTPCode, OTPEmailTemplates
+
+
+@pytest.fixture(scope="module")
+def template():
+    return OTPEmailTemplates("SOA Tuition System", "noreply@example.com").get("vi")
+
+
+def test_render_puts_the_code_in_subject_and_body(template):
+    message = template.render("user@example.com", "042137", 5)
+    headers = message.split(b"\n\n", 1)[0]
+    assert b"Subject: " in headers and headers.count(b"042137") == 1
+    assert b"\nTo: user@example.com\n" in headers
+    assert b"042137" in message.split(b"\n\n", 1)[1]
+
+
+@pytest.mark.parametrize("otp_code", [
+    "123456\r\nBcc: attacker@evil.com",
+    "123456\nBcc: attacker@evil.com",
+    "١٢٣٤٥٦",
+    "12345a",
+    "",
+])
+def test_render_rejects_anything_but_ascii_digits(template, otp_code):
+    with pytest.raises(InvalidOTPCode):
+        template.render("user@example.com", otp_code, 5)
+
+
+@pytest.mark.parametrize("otp", ["123456\r\nBcc: attacker@evil.com", "12345", "1234567", "١٢٣٤٥٦", "12 456"])
+def test_send_request_accepts_only_six_digit_codes(otp):
+    with pytest.raises(ValidationError):
+        OTPSendRequest(user_id="USR1", email="user@example.com", otp=otp)
+    assert OTPSendRequest(user_id="USR1", email="user@example.com", otp="012345").otp == "012345"
@@ -0,0 +1,95 @@
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from app.services.otp_challenge import OTP_MAX_ATTEMPTS, OTPChallengeService, _b64decode, _b64encode
+
+EMAIL = "user@example.com"
+USER_ID = "USR1"
+
+
+@pytest.fixture
+def service():
+    return OTPChallengeService(secret="test-secret", ttl_seconds=300)
+
+
+@pytest.fixture
+def issued(service):
+    return service.issue(USER_ID, EMAIL)
+
+
+def _replace_payload(challenge: str, **changes) -> str:
+    """Sửa claims nhưng giữ nguyên hai chữ ký cũ"""
+    version, payload, tag, code_signature = challenge.split(".")
+    claims = json.loads(_b64decode(payload))
+    claims.update(changes)
+    forged = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{version}.{forged}.{tag}.{code_signature}"
+
+
+def test_valid_code_verifies_once(service, issued):
+    assert service.verify(issued["challenge"], EMAIL, issued["otp_code"], USER_ID) == "valid"
+    assert service.verify(issued["challenge"], EMAIL, issued["otp_code"], USER_ID) == "already_used"
+
+
+def test_email_is_case_insensitive_and_user_id_optional(service, issued):
+    assert service.verify(issued["challenge"], EMAIL.upper(), issued["otp_code"]) == "valid"
+
+
+def test_wrong_code_counts_attempts_until_locked(service, issued):
+    wrong = f"{(int(issued['otp_code']) + 1) % 10 ** 6:06d}"
+    for _ in range(OTP_MAX_ATTEMPTS):
+        assert service.verify(issued["challenge"], EMAIL, wrong, USER_ID) == "invalid"
+    assert service.remaining_attempts(issued["challenge"]) == 0
+    assert service.verify(issued["challenge"], EMAIL, issued["otp_code"], USER_ID) == "max_attempts"
+
+
+def test_challenge_is_bound_to_email_and_user(service, issued):
+    assert service.verify(issued["challenge"], "other@example.com", issued["otp_code"], USER_ID) == "invalid"
+    assert service.verify(issued["challenge"], EMAIL, issued["otp_code"], "USR2") == "invalid"
+
+
+def test_expired_challenge(service, monkeypatch):
+    issued = service.issue(USER_ID, EMAIL)
+    monkeypatch.setattr(time, "time", lambda: issued["expires_at"] + 1)
+    assert service.verify(issued["challenge"], EMAIL, issued["otp_code"], USER_ID) == "expired"
+
+
+@pytest.mark.parametrize("changes", [
+    {"x": 10 ** 12},
+    {"e": "attacker@example.com"},
+    {"u": "USR2"},
+    {"n": "fresh-nonce"},
+])
+def test_tampered_payload_is_rejected_before_any_state(service, issued, changes):
+    forged = _replace_payload(issued["challenge"], **changes)
+    email = changes.get("e", EMAIL)
+    user_id = changes.get("u", USER_ID)
+    assert service.verify(forged, email, issued["otp_code"], user_id) == "invalid"
+    assert service.get_status()["tracked_failed_challenges"] == 0
+    assert service.remaining_attempts(forged) == 0
+
+
+def test_payload_signed_with_other_secret_is_rejected(service):
+    other = OTPChallengeService(secret="other-secret").issue(USER_ID, EMAIL)
+    assert service.verify(other["challenge"], EMAIL, other["otp_code"], USER_ID) == "invalid"
+
+
+@pytest.mark.parametrize("claims", [[1], {"e": EMAIL, "u": USER_ID, "n": "n", "x": "9"},
+                                    {"e": EMAIL, "u": USER_ID, "n": "n", "x": True},
+                                    {"e": EMAIL, "u": 1, "n": "n", "x": 10 ** 12}])
+def test_correctly_signed_but_malformed_claims_are_rejected(service, claims):
+    payload = _b64encode(json.dumps(claims).encode("utf-8"))
+    signing_input = f"v2.{payload}".encode("ascii")
+    tag = hmac.new(b"test-secret", signing_input, hashlib.sha256).digest()
+    challenge = f"v2.{payload}.{_b64encode(tag)}.{_b64encode(service._sign_code(signing_input, '123456'))}"
+    assert service.verify(challenge, EMAIL, "123456", USER_ID) == "invalid"
+
+
+@pytest.mark.parametrize("challenge", ["", "v2", "v1.a.b", "v2.a.b.c.d", "v2.!!!.???.***"])
+def test_garbage_challenge_is_invalid(service, challenge):
+    assert service.verify(challenge, EMAIL, "123456", USER_ID) == "invalid"
+
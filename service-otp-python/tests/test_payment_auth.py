@@ -0,0 +1,29 @@
+import time
+
+from jose import jwt
+
+from app.services.payment_auth import PAYMENT_AUTH_ALGORITHM, PAYMENT_AUTH_TOKEN_TYPE, PaymentAuthService
+
+
+def _claims(issued, secret="test-secret"):
+    return jwt.decode(issued["payment_token"], secret, algorithms=[PAYMENT_AUTH_ALGORITHM])
+
+
+def test_token_carries_type_subject_student_and_expiry():
+    service = PaymentAuthService(secret="test-secret", ttl_seconds=120)
+    issued = service.issue("USR1", "user@example.com", "ST2025001")
+    claims = _claims(issued)
+    assert issued["expires_in"] == 120
+    assert claims["typ"] == PAYMENT_AUTH_TOKEN_TYPE
+    assert claims["sub"] == "USR1"
+    assert claims["student_id"] == "ST2025001"
+    assert claims["exp"] - claims["iat"] == 120
+    assert abs(claims["iat"] - time.time()) < 5
+
+
+def test_every_token_has_a_fresh_jti_and_optional_student():
+    service = PaymentAuthService(secret="test-secret")
+    first, second = service.issue("USR1", "user@example.com"), service.issue("USR1", "user@example.com")
+    assert _claims(first)["jti"] != _claims(second)["jti"]
+    assert "student_id" not in _claims(first)
+    assert service.issued_total == 2
@@ -0,0 +1,32 @@
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from app.config.database import config
+from soa_common.executors import BlockingExecutor, ExecutorGroup, ExecutorSaturated
+
+load_dotenv()
+
+# ✅ Controller dùng pymysql (blocking) chạy trong executor riêng, không chạy trên
+#    event loop và không dùng chung threadpool mặc định của Starlette.
+#    Một worker cho mỗi connection của pool → worker không phải chờ checkout.
+executors = ExecutorGroup(
+    BlockingExecutor.from_env("database", default_workers=config.max_size, default_queue=config.max_size * 4)
+)
+
+
+async def run_blocking(subsystem: str, fn, *args, **kwargs):
+    """await run_blocking("database", controller, ...) — hàng đợi đầy → 503"""
+    try:
+        return await executors[subsystem].run(fn, *args, **kwargs)
+    except ExecutorSaturated as e:
+        print(f"⚠️ {e}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "statusCode": 503,
+                "message": "Service is busy, please retry shortly",
+                "error": "EXECUTOR_SATURATED"
+            },
+            headers={"Retry-After": "1"}
+        )
@@ -0,0 +1,10 @@
+from dotenv import load_dotenv
+
+from app.config.database import db
+from app.config.executors import executors
+from soa_common.revocation import RevocationList
+
+load_dotenv()
+
+# ✅ Danh sách token bị thu hồi (Bloom filter đồng bộ từ bảng revoked_tokens)
+revocation_list = RevocationList.from_env(db, executors["database"])
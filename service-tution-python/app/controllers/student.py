@@ -1,77 +1,186 @@
-from app.config.database import get_db_connection, db
+from app.config.database import db
+from app.config.executors import run_blocking
+from app.utils.student_cache import student_cache
+from app.utils.student_index import student_index
 from fastapi import HTTPException
-import pymysql
+from soa_common.singleflight import SingleFlight
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# POST /students/search/batch: số ID tối đa mỗi request, số ID mỗi câu IN (...)
+STUDENT_BATCH_MAX_IDS = int(os.getenv("STUDENT_BATCH_MAX_IDS", 1000))
+STUDENT_BATCH_CHUNK_SIZE = int(os.getenv("STUDENT_BATCH_CHUNK_SIZE", 500))
+
+# Các request đồng thời cùng student_id (cả lớp mở trang học phí) chờ chung một lần đọc DB
+student_lookups = SingleFlight("student_lookup")
+
+def _serialize_student(student: dict) -> dict:
+    """Dòng students → JSON (DECIMAL → float, TINYINT → bool, DATETIME → ISO)"""
+    return {
+        "student_id": student["student_id"],
+        "full_name": student["full_name"],
+        "class": student["class"],
+        "faculty": student["faculty"],
+        "semester": student["semester"],
+        "year": student["year"],
+        "tuition_amount": float(student["tuition_amount"]),
+        "is_payed": bool(student["is_payed"]),
+        "created_at": student["created_at"].isoformat() if student["created_at"] else None,
+        "version": student.get("version", 1)
+    }
 
 def search_student_by_id(student_id: str):
     """Search student by ID"""
-    connection = None
-    cursor = None
-    
     try:
         print(f"\n{'='*60}")
         print(f"🔍 SEARCHING STUDENT")
         print(f"{'='*60}")
         print(f"📝 Student ID: {student_id}")
         
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        with db.cursor() as cursor:
+            # ✅ FIX: Use 'year' instead of 'academic_year'
+            cursor.execute(
+                """
+                SELECT student_id, full_name, class, faculty, semester, 
+                       year, tuition_amount, is_payed, created_at, version
+                FROM students
+                WHERE student_id = %s
+                """,
+                (student_id,)
+            )
+            student = cursor.fetchone()
+            
+            if not student:
+                print(f"❌ Student not found: {student_id}")
+                print(f"{'='*60}\n")
+                raise HTTPException(
+                    status_code=404,
+                    detail={
+                        "success": False,
+                        "statusCode": 404,
+                        "message": f"Student with ID {student_id} not found",
+                        "error": "STUDENT_NOT_FOUND"
+                    }
+                )
+            
+            print(f"✅ Student found:")
+            print(f"   Name: {student['full_name']}")
+            print(f"   Class: {student['class']}")
+            print(f"   Faculty: {student['faculty']}")
+            print(f"   Year: {student['year']}")
+            print(f"   Tuition: {student['tuition_amount']:,.0f} VND")
+            print(f"   Paid: {'Yes' if student['is_payed'] else 'No'}")
+            print(f"{'='*60}\n")
+            
+            return {
+                "success": True,
+                "statusCode": 200,
+                "message": "Student found",
+                "data": _serialize_student(student)
+            }
         
-        # ✅ FIX: Use 'year' instead of 'academic_year'
-        cursor.execute(
-            """
-            SELECT student_id, full_name, class, faculty, semester, 
-                   year, tuition_amount, is_payed, created_at, version
-            FROM students
-            WHERE student_id = %s
-            """,
-            (student_id,)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error searching student: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "statusCode": 500,
+                "message": "Internal server error",
+                "error": str(e)
+            }
         )
-        student = cursor.fetchone()
-        
-        if not student:
-            print(f"❌ Student not found: {student_id}")
-            print(f"{'='*60}\n")
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "success": False,
-                    "statusCode": 404,
-                    "message": f"Student with ID {student_id} not found",
-                    "error": "STUDENT_NOT_FOUND"
-                }
+
+async def lookup_student(student_id: str):
+    """
+    search_student_by_id qua cache (nếu bật) + single-flight:
+    cache miss → các caller đồng thời cùng student_id chỉ chạy một truy vấn.
+    """
+    # Collation của MySQL không phân biệt hoa thường → "st2025001" và "ST2025001" cùng một key
+    key = student_id.casefold()
+    cached = student_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = student_cache.generation()
+    result = await student_lookups.do(
+        key, lambda: run_blocking("database", search_student_by_id, student_id)
+    )
+    student_cache.put(key, result, generation)
+    return result
+
+def invalidate_student(student_id: str):
+    """Sau khi trạng thái học phí đổi: bỏ cache và không gộp vào lần đọc đang dở"""
+    key = student_id.casefold()
+    student_cache.invalidate(key)
+    student_lookups.forget(key)
+
+def _fetch_students(student_ids: list) -> dict:
+    """student_id.casefold() → sinh viên, một câu IN (...) cho mỗi STUDENT_BATCH_CHUNK_SIZE ID"""
+    found = {}
+    with db.cursor() as cursor:
+        for start in range(0, len(student_ids), STUDENT_BATCH_CHUNK_SIZE):
+            chunk = student_ids[start:start + STUDENT_BATCH_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"""
+                SELECT student_id, full_name, class, faculty, semester,
+                       year, tuition_amount, is_payed, created_at, version
+                FROM students
+                WHERE student_id IN ({placeholders})
+                """,
+                chunk
             )
-        
-        print(f"✅ Student found:")
-        print(f"   Name: {student['full_name']}")
-        print(f"   Class: {student['class']}")
-        print(f"   Faculty: {student['faculty']}")
-        print(f"   Year: {student['year']}")
-        print(f"   Tuition: {student['tuition_amount']:,.0f} VND")
-        print(f"   Paid: {'Yes' if student['is_payed'] else 'No'}")
-        print(f"{'='*60}\n")
-        
+            for student in cursor.fetchall():
+                # Collation của MySQL không phân biệt hoa thường → so khớp bằng casefold
+                found[student["student_id"].casefold()] = _serialize_student(student)
+    return found
+
+def search_students_by_ids(student_ids: list):
+    """
+    Tra cứu nhiều sinh viên: một câu WHERE student_id IN (...) cho mỗi
+    STUDENT_BATCH_CHUNK_SIZE ID (ID trùng chỉ truy vấn một lần).
+    Kết quả theo đúng thứ tự request; ID không tồn tại → found = false.
+    """
+    if len(student_ids) > STUDENT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "statusCode": 400,
+                "message": f"At most {STUDENT_BATCH_MAX_IDS} student IDs per request",
+                "error": "BATCH_TOO_LARGE"
+            }
+        )
+    try:
+        unique_ids = list(dict.fromkeys(student_ids))
+        found = _fetch_students(unique_ids)
+
+        results = []
+        for student_id in student_ids:
+            student = found.get(student_id.casefold())
+            if student is None:
+                results.append({"student_id": student_id, "found": False, "error": "STUDENT_NOT_FOUND"})
+            else:
+                results.append({"student_id": student_id, "found": True, "data": student})
+
+        found_count = sum(1 for result in results if result["found"])
+        print(f"🔍 Batch search: {found_count}/{len(student_ids)} found "
+              f"({len(unique_ids)} unique, {-(-len(unique_ids) // STUDENT_BATCH_CHUNK_SIZE)} queries)")
         return {
             "success": True,
             "statusCode": 200,
-            "message": "Student found",
-            "data": {
-                "student_id": student["student_id"],
-                "full_name": student["full_name"],
-                "class": student["class"],
-                "faculty": student["faculty"],
-                "semester": student["semester"],
-                "year": student["year"],  # ✅ Changed from academic_year
-                "tuition_amount": float(student["tuition_amount"]),
-                "is_payed": bool(student["is_payed"]),
-                "created_at": student["created_at"].isoformat() if student["created_at"] else None,
-                "version": student.get("version", 1)
-            }
+            "message": f"Found {found_count} of {len(student_ids)} students",
+            "data": results
         }
-        
-    except HTTPException:
-        raise
+
     except Exception as e:
-        print(f"❌ Error searching student: {e}")
+        print(f"❌ Error in batch student search: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(
@@ -83,117 +192,125 @@ def search_student_by_id(student_id: str):
                 "error": str(e)
             }
         )
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
 
-def get_all_students():
-    """Get all students"""
-    connection = None
-    cursor = None
-    
+def search_students_by_name(query: str, semester: str = None, year: int = None, limit: int = 20):
+    """
+    Tìm sinh viên theo tên hoặc lớp qua student_index (không dấu, khớp chuỗi con):
+    "nguyen van" khớp "Nguyễn Văn An", "k18" khớp lớp "CNTT-K18".
+    Index chỉ trả student_id; thông tin sinh viên đọc lại từ DB theo khóa chính.
+    """
+    if not student_index.ready:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "statusCode": 503,
+                "message": "Student name index is not ready yet, please retry shortly",
+                "error": "INDEX_NOT_READY"
+            }
+        )
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        # ✅ FIX: Use 'year' instead of 'academic_year'
-        cursor.execute(
-            """
-            SELECT student_id, full_name, class, faculty, semester, 
-                   year, tuition_amount, is_payed, created_at, version
-            FROM students
-            ORDER BY student_id
-            """
+        student_ids, has_more = student_index.search(query, limit=limit, semester=semester, year=year)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "statusCode": 400,
+                "message": str(e),
+                "error": "QUERY_TOO_SHORT"
+            }
         )
-        students = cursor.fetchall()
-        
-        # Convert data types
-        result = []
-        for student in students:
-            result.append({
-                "student_id": student["student_id"],
-                "full_name": student["full_name"],
-                "class": student["class"],
-                "faculty": student["faculty"],
-                "semester": student["semester"],
-                "year": student["year"],
-                "tuition_amount": float(student["tuition_amount"]),
-                "is_payed": bool(student["is_payed"]),
-                "created_at": student["created_at"].isoformat() if student["created_at"] else None,
-                "version": student.get("version", 1)
-            })
-        
+    try:
+        found = _fetch_students(student_ids) if student_ids else {}
+        # Sinh viên đã bị xóa sau lần sync gần nhất không có trong DB → bỏ qua
+        results = [found[student_id.casefold()] for student_id in student_ids if student_id.casefold() in found]
+        print(f"🔍 Name search '{query}': {len(results)} found{' (more available)' if has_more else ''}")
         return {
             "success": True,
             "statusCode": 200,
-            "message": "Students retrieved",
-            "data": result
+            "message": f"Found {len(results)} students",
+            "data": results,
+            "has_more": has_more
         }
+
+    except Exception as e:
+        print(f"❌ Error in student name search: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "statusCode": 500,
+                "message": "Internal server error",
+                "error": str(e)
+            }
+        )
+
+def get_all_students():
+    """Get all students"""
+    try:
+        with db.cursor() as cursor:
+            # ✅ FIX: Use 'year' instead of 'academic_year'
+            cursor.execute(
+                """
+                SELECT student_id, full_name, class, faculty, semester, 
+                       year, tuition_amount, is_payed, created_at, version
+                FROM students
+                ORDER BY student_id
+                """
+            )
+            students = cursor.fetchall()
+            
+            # Convert data types
+            result = []
+            for student in students:
+                result.append(_serialize_student(student))
+            
+            return {
+                "success": True,
+                "statusCode": 200,
+                "message": "Students retrieved",
+                "data": result
+            }
         
     except Exception as e:
         print(f"❌ Error getting students: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
 
 def get_unpaid_students():
     """Get unpaid students"""
-    connection = None
-    cursor = None
-    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        # ✅ FIX: Use 'year' instead of 'academic_year'
-        cursor.execute(
-            """
-            SELECT student_id, full_name, class, faculty, semester, 
-                   year, tuition_amount, is_payed, created_at, version
-            FROM students
-            WHERE is_payed = 0
-            ORDER BY student_id
-            """
-        )
-        students = cursor.fetchall()
-        
-        # Convert data types
-        result = []
-        for student in students:
-            result.append({
-                "student_id": student["student_id"],
-                "full_name": student["full_name"],
-                "class": student["class"],
-                "faculty": student["faculty"],
-                "semester": student["semester"],
-                "year": student["year"],
-                "tuition_amount": float(student["tuition_amount"]),
-                "is_payed": bool(student["is_payed"]),
-                "created_at": student["created_at"].isoformat() if student["created_at"] else None,
-                "version": student.get("version", 1)
-            })
-        
-        return {
-            "success": True,
-            "statusCode": 200,
-            "message": "Unpaid students retrieved",
-            "data": result
-        }
+        with db.cursor() as cursor:
+            # ✅ FIX: Use 'year' instead of 'academic_year'
+            cursor.execute(
+                """
+                SELECT student_id, full_name, class, faculty, semester, 
+                       year, tuition_amount, is_payed, created_at, version
+                FROM students
+                WHERE is_payed = 0
+                ORDER BY student_id
+                """
+            )
+            students = cursor.fetchall()
+            
+            # Convert data types
+            result = []
+            for student in students:
+                result.append(_serialize_student(student))
+            
+            return {
+                "success": True,
+                "statusCode": 200,
+                "message": "Unpaid students retrieved",
+                "data": result
+            }
         
     except Exception as e:
         print(f"❌ Error getting unpaid students: {e}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            db.return_connection(connection)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
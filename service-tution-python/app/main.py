@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import student, payment
+from app.routes import student, payment, metrics, debug
+from app.config.revocation import revocation_list
+from app.utils.student_index import student_index
+from app.config.database import db
+from app.config.executors import executors
+from app.middleware.admission import admission_limiter, ADMISSION_ENABLED, ADMISSION_ROUTES
+from soa_common.admission import AdmissionMiddleware
 
 app = FastAPI(
     title="Tuition Service API",
@@ -8,6 +14,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# ✅ Admission control trước các route dùng database (thêm trước CORS để
+#    response 503 vẫn đi qua CORSMiddleware và có header CORS)
+app.add_middleware(
+    AdmissionMiddleware,
+    limiter=admission_limiter,
+    routes=ADMISSION_ROUTES,
+    enabled=ADMISSION_ENABLED
+)
+
 # ✅ CORS - Allow all origins for development
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +36,8 @@ app.add_middleware(
 # Register routes
 app.include_router(student.router, tags=["Students"])
 app.include_router(payment.router, tags=["Payments"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(debug.router, tags=["Debug"])
 
 @app.get("/")
 async def root():
@@ -36,6 +53,14 @@ async def health_check():
 
 @app.on_event("startup")
 async def startup_event():
+    try:
+        db.warm_up()
+    except Exception as e:
+        # Pool tự mở connection khi có request, chỉ cảnh báo
+        print(f"⚠️ Database warm-up failed: {e}")
+    revocation_list.start()
+    # Dựng index tên sinh viên ở task nền (/students/search/name trả 503 tới khi xong)
+    student_index.start()
     print("\n" + "=" * 70)
     print("🚀 TUITION SERVICE STARTED")
     print("=" * 70)
@@ -44,4 +69,11 @@ async def startup_event():
         if hasattr(route, "methods"):
             methods = ", ".join(route.methods)
             print(f"   [{methods}] {route.path}")
-    print("=" * 70 + "\n")
\ No newline at end of file
+    print("=" * 70 + "\n")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await revocation_list.stop()
+    await student_index.stop()
+    executors.shutdown()
+    db.close()
@@ -0,0 +1,23 @@
+import os
+
+from dotenv import load_dotenv
+
+from app.config.database import db
+from soa_common.admission import AdaptiveLimiter
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+# Route dùng database → mức ưu tiên. Quá tải: list đọc bị từ chối trước,
+# thanh toán được giữ tới khi toàn bộ limit bị chiếm.
+ADMISSION_ROUTES = [
+    ("/payments/pay", "critical"),
+    ("/students/search", "normal"),
+    ("/payments/statistics", "normal"),
+    ("/payments/history", "low"),
+    ("/students", "low")
+]
+
+# Tín hiệu quá tải: latency request + thời gian chờ connection của pool
+admission_limiter = AdaptiveLimiter.from_env("tuition", pool_wait=lambda: db.wait_seconds_ewma)
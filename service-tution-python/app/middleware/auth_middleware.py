@@ -4,6 +4,8 @@ from jose import jwt, JWTError
 from typing import Optional
 import os
 from dotenv import load_dotenv
+from app.middleware.token_cache import token_cache
+from app.config.revocation import revocation_list
 
 load_dotenv()
 
@@ -21,6 +23,20 @@ PUBLIC_ROUTES = [
     "/redoc"
 ]
 
+def _check_not_revoked(jti: Optional[str]):
+    """Kiểm tra Bloom filter thu hồi (kể cả khi claims lấy từ cache)"""
+    if revocation_list.is_revoked(jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={
+                "success": False,
+                "statusCode": 401,
+                "message": "Token has been revoked",
+                "error": "TOKEN_REVOKED",
+                "redirect": "/login"
+            }
+        )
+
 def verify_token(authorization: str = None) -> dict:
     """
     Verify JWT token from Authorization header
@@ -52,6 +68,13 @@ def verify_token(authorization: str = None) -> dict:
         
         token = authorization.split(" ")[1]
         
+        # ✅ Token đã verify trước đó và chưa hết hạn → dùng lại claims
+        cache_key = token_cache.digest(token)
+        cached_user = token_cache.get(cache_key)
+        if cached_user is not None:
+            _check_not_revoked(cached_user.get("jti"))
+            return dict(cached_user)
+        
         # Decode JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         
@@ -71,13 +94,17 @@ def verify_token(authorization: str = None) -> dict:
                 }
             )
         
-        print(f"✅ Token verified for user: {username} ({user_id})")
+        _check_not_revoked(payload.get("jti"))
         
-        return {
+        user = {
             "user_id": user_id,
             "username": username,
-            "email": email
+            "email": email,
+            "jti": payload.get("jti")
         }
+        token_cache.put(cache_key, user, payload.get("exp"))
+        
+        return dict(user)
         
     except JWTError as e:
         print(f"❌ JWT Error: {e}")
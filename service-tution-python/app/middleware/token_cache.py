@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+
+
+class TokenCache:
+    """
+    LRU cache cho JWT đã verify: sha256(token) → user claims, giữ đến khi token hết hạn.
+
+    Client gửi lại cùng một bearer token cho mọi request trong phiên, nên chỉ lần
+    đầu cần decode + kiểm tra chữ ký HS256. Key là digest để không giữ token gốc
+    trong bộ nhớ.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, key: str, user: dict, expires_at: Optional[float]):
+        # Token không có exp thì không cache (không biết khi nào hết hiệu lực)
+        if not expires_at or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (user, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# Singleton instance
+token_cache = TokenCache()
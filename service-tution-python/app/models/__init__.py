@@ -1,4 +1,10 @@
-from .student import StudentBase, StudentResponse, StudentSearchRequest, StudentListResponse
+from .student import (
+    StudentBase,
+    StudentResponse,
+    StudentSearchRequest,
+    StudentBatchSearchRequest,
+    StudentListResponse
+)
 from .payment import (
     PaymentRequest, 
     PaymentResponse, 
@@ -10,6 +16,7 @@ __all__ = [
     "StudentBase",
     "StudentResponse",
     "StudentSearchRequest",
+    "StudentBatchSearchRequest",
     "StudentListResponse",
     "PaymentRequest",
     "PaymentResponse",
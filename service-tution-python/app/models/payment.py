@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class PaymentRequest(BaseModel):
@@ -15,4 +15,24 @@ class PaymentResponse(BaseModel):
     amount_paid: float
     payment_date: str
     remaining_balance: float
-    transaction_id: Optional[str] = None
\ No newline at end of file
+    transaction_id: Optional[str] = None
+
+class PaymentHistoryItem(BaseModel):
+    payment_id: int
+    student_id: str
+    student_name: str
+    student_class: Optional[str] = None
+    student_faculty: Optional[str] = None
+    semester: Optional[str] = None
+    year: Optional[int] = None
+    amount: float
+    payment_date: Optional[str] = None
+    user_id: str
+    username: Optional[str] = None
+    user_full_name: Optional[str] = None
+
+class PaymentHistoryResponse(BaseModel):
+    success: bool
+    statusCode: int
+    message: str
+    data: List[PaymentHistoryItem]
@@ -48,6 +48,16 @@ class StudentSearchRequest(BaseModel):
             }
         }
 
+class StudentBatchSearchRequest(BaseModel):
+    student_ids: list[str] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "student_ids": ["ST2025001", "ST2025002", "ST2025404"]
+            }
+        }
+
 class StudentListResponse(BaseModel):
     students: list[StudentResponse]
     total_count: int
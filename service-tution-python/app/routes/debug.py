@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from app.middleware.auth_middleware import get_current_user
+from app.config.database import db
+
+router = APIRouter(prefix="/debug")
+
+@router.get("/queries")
+async def top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total", pattern="^(total|avg|max|calls|rows|errors|slow)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Top-N SQL statements by fingerprint (normalized SQL) + recent slow queries
+    GET /debug/queries?limit=20&order_by=total
+    """
+    return {
+        "success": True,
+        "data": {
+            "summary": db.query_stats.snapshot(),
+            "statements": db.query_stats.top(limit, order_by),
+            "slow_queries": db.query_stats.slow_log(limit)
+        }
+    }
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends
+from app.middleware.auth_middleware import get_current_user
+from app.middleware.token_cache import token_cache
+from app.config.revocation import revocation_list
+from app.config.database import db
+from app.controllers.payment import payment_retry_policy
+from app.middleware.admission import admission_limiter
+from app.config.executors import executors
+from app.controllers.student import student_lookups
+from app.utils.student_cache import student_cache
+from app.utils.student_index import student_index
+
+router = APIRouter(prefix="/metrics")
+
+@router.get("/token-cache")
+async def token_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    JWT verification cache metrics
+    GET /metrics/token-cache
+    """
+    return {
+        "success": True,
+        "data": token_cache.get_stats()
+    }
+
+@router.get("/revocation")
+async def revocation_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Token revocation Bloom filter metrics
+    GET /metrics/revocation
+    """
+    return {
+        "success": True,
+        "data": revocation_list.get_stats()
+    }
+
+@router.get("/database")
+async def database_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Connection pool + query timing metrics
+    GET /metrics/database
+    """
+    return {
+        "success": True,
+        "data": db.status()
+    }
+
+@router.get("/payment-retry")
+async def payment_retry_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-side transaction retry metrics for pay_tuition
+    GET /metrics/payment-retry
+    """
+    return {
+        "success": True,
+        "data": payment_retry_policy.get_stats()
+    }
+
+@router.get("/admission")
+async def admission_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Adaptive concurrency limiter state (limit, inflight, rejections per priority)
+    GET /metrics/admission
+    """
+    return {
+        "success": True,
+        "data": admission_limiter.get_stats()
+    }
+
+@router.get("/executors")
+async def executor_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Blocking-work executors: queue depth, active workers, wait/run time
+    GET /metrics/executors
+    """
+    return {
+        "success": True,
+        "data": executors.get_stats()
+    }
+
+@router.get("/student-lookup")
+async def student_lookup_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Student search: request coalescing (single-flight) + result cache
+    GET /metrics/student-lookup
+    """
+    return {
+        "success": True,
+        "data": {
+            "singleflight": student_lookups.get_stats(),
+            "cache": student_cache.get_stats()
+        }
+    }
+
+@router.get("/student-index")
+async def student_index_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    In-memory student name index metrics (size, sync, search candidates)
+    GET /metrics/student-index
+    """
+    return {
+        "success": True,
+        "data": student_index.get_stats()
+    }
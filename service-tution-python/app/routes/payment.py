@@ -5,7 +5,10 @@ from app.controllers.payment import (
     get_all_payment_history,
     get_payment_statistics
 )
+from app.controllers.student import invalidate_student
 from app.middleware.auth_middleware import get_current_user
+from app.utils.payment_auth import payment_token_store
+from app.config.executors import run_blocking
 
 router = APIRouter(prefix="/payments")
 
@@ -17,9 +20,24 @@ async def pay(
     """
     Pay tuition
     POST /payments/pay
-    Body: {"student_id": "ST2025001"}
+    Body: {"student_id": "ST2025001", "payment_token": "<token từ /api/otp/verify>"}
     """
-    return pay_tuition(data, current_user)
+    result = await run_blocking("database", pay_tuition, data, current_user)
+    invalidate_student(data["student_id"])
+    return result
+
+@router.get("/authorization/stats")
+async def authorization_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Payment-authorization token metrics
+    GET /payments/authorization/stats
+    """
+    return {
+        "success": True,
+        "data": payment_token_store.get_stats()
+    }
 
 @router.get("/history")
 async def history(
@@ -29,7 +47,7 @@ async def history(
     Get payment history for current user
     GET /payments/history
     """
-    return get_payment_history(current_user["user_id"])
+    return await run_blocking("database", get_payment_history, current_user["user_id"])
 
 @router.get("/history/all")
 async def all_history(
@@ -39,10 +57,10 @@ async def all_history(
     Get all payment history (admin)
     GET /payments/history/all
     """
-    return get_all_payment_history()
+    return await run_blocking("database", get_all_payment_history)
 
 @router.get("/statistics", summary="Get payment statistics")
-def statistics(current_user: dict = Depends(get_current_user)):
+async def statistics(current_user: dict = Depends(get_current_user)):
     """
     Get payment statistics for the currently logged-in user.
     """
@@ -50,4 +68,4 @@ def statistics(current_user: dict = Depends(get_current_user)):
     user_id = current_user['user_id']
     
     # Truyền user_id vào hàm controller
-    return get_payment_statistics(user_id=user_id)
\ No newline at end of file
+    return await run_blocking("database", get_payment_statistics, user_id=user_id)
\ No newline at end of file
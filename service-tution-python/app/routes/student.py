@@ -1,6 +1,11 @@
 from fastapi import APIRouter, Query, Request, Depends
-from app.controllers.student import search_student_by_id, get_all_students, get_unpaid_students
+from typing import Optional
+from app.controllers.student import (
+    lookup_student, search_students_by_ids, search_students_by_name, get_all_students, get_unpaid_students
+)
+from app.models.student import StudentBatchSearchRequest
 from app.middleware.auth_middleware import get_current_user, get_current_user_optional
+from app.config.executors import run_blocking
 
 router = APIRouter(prefix="/students")
 
@@ -16,7 +21,7 @@ async def search_student(
     Requires: Authorization: Bearer <token>
     """
     print(f"\n📚 User {current_user['username']} searching for student {student_id}")
-    return search_student_by_id(student_id)
+    return await lookup_student(student_id)
 
 @router.get("/")
 async def get_students(
@@ -27,7 +32,7 @@ async def get_students(
     GET /students/
     """
     print(f"\n📚 User {current_user['username']} getting all students")
-    return get_all_students()
+    return await run_blocking("database", get_all_students)
 
 @router.get("/unpaid")
 async def get_unpaid(
@@ -38,7 +43,37 @@ async def get_unpaid(
     GET /students/unpaid
     """
     print(f"\n📚 User {current_user['username']} getting unpaid students")
-    return get_unpaid_students()
+    return await run_blocking("database", get_unpaid_students)
+
+@router.post("/search/batch")
+async def search_batch(
+    body: StudentBatchSearchRequest,
+    current_user: dict = Depends(get_current_user)  # ✅ Require authentication
+):
+    """
+    Search many students in one request - PROTECTED ROUTE
+    POST /students/search/batch
+    Body: {"student_ids": ["ST2025001", "ST2025002"]}
+    Kết quả theo thứ tự request; ID không tồn tại → {"found": false}
+    """
+    print(f"\n📚 User {current_user['username']} searching {len(body.student_ids)} students")
+    return await run_blocking("database", search_students_by_ids, body.student_ids)
+
+@router.get("/search/name")
+async def search_by_name(
+    q: str = Query(..., min_length=1, max_length=100, description="Tên hoặc lớp (có dấu hoặc không dấu)"),
+    semester: Optional[str] = Query(None, description="Lọc theo học kỳ, ví dụ: Fall 2024"),
+    year: Optional[int] = Query(None, description="Lọc theo năm"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)  # ✅ Require authentication
+):
+    """
+    Search students by name or class - PROTECTED ROUTE
+    GET /students/search/name?q=nguyen van an&year=2024&limit=20
+    Không phân biệt dấu / hoa thường, khớp chuỗi con; has_more = còn kết quả sau limit
+    """
+    print(f"\n📚 User {current_user['username']} searching students by name '{q}'")
+    return await run_blocking("database", search_students_by_name, q, semester, year, limit)
 
 @router.get("/search/{student_id}")
 async def search_by_path(
@@ -50,4 +85,4 @@ async def search_by_path(
     GET /students/search/ST2025004
     """
     print(f"\n📚 User {current_user['username']} searching for student {student_id}")
-    return search_student_by_id(student_id)
\ No newline at end of file
+    return await lookup_student(student_id)
\ No newline at end of file
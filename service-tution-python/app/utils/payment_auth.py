@@ -0,0 +1,129 @@
+from fastapi import HTTPException, status
+from jose import jwt, JWTError, ExpiredSignatureError
+from typing import Dict, Optional
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Secret dùng chung với OTP Service (service-otp-python/app/services/payment_auth.py).
+# Đọc một lần khi import, không gọi OTP Service khi thanh toán.
+PAYMENT_AUTH_SECRET = os.getenv("PAYMENT_AUTH_SECRET", "change-this-payment-auth-secret")
+PAYMENT_AUTH_ALGORITHM = "HS256"
+PAYMENT_AUTH_TOKEN_TYPE = "payment_auth"
+
+# /payments/pay bắt buộc payment_token từ /api/otp/verify (false chỉ dùng cho test nội bộ)
+PAYMENT_OTP_TOKEN_REQUIRED = os.getenv("PAYMENT_OTP_TOKEN_REQUIRED", "true").lower() == "true"
+
+
+def _payment_auth_error(message: str, error: str, status_code: int = status.HTTP_403_FORBIDDEN):
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "success": False,
+            "statusCode": status_code,
+            "message": message,
+            "error": error
+        }
+    )
+
+
+class PaymentTokenStore:
+    """
+    Theo dõi jti của payment token để mỗi token chỉ dùng được một lần.
+
+    jti được "reserve" trước khi chạy transaction thanh toán, "commit" khi thanh toán
+    thành công và "release" khi thất bại để người dùng có thể thử lại với cùng token.
+    Entry được giữ đến khi token hết hạn (sau đó chữ ký exp đã chặn replay).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._used: Dict[str, float] = {}
+        self._in_flight: Dict[str, float] = {}
+        self._next_prune = 0.0
+
+        # Metrics
+        self.accepted_total = 0
+        self.rejected_total = 0
+        self.replays_blocked_total = 0
+
+    def reserve(self, jti: str, expires_at: float) -> bool:
+        with self._lock:
+            self._prune(time.time())
+            if jti in self._used or jti in self._in_flight:
+                self.replays_blocked_total += 1
+                return False
+            self._in_flight[jti] = expires_at
+            return True
+
+    def commit(self, jti: str):
+        with self._lock:
+            self._used[jti] = self._in_flight.pop(jti, time.time())
+            self.accepted_total += 1
+
+    def release(self, jti: str):
+        with self._lock:
+            self._in_flight.pop(jti, None)
+
+    def _prune(self, now: float):
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        for jti in [jti for jti, exp in self._used.items() if exp < now]:
+            del self._used[jti]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "required": PAYMENT_OTP_TOKEN_REQUIRED,
+                "used_tokens": len(self._used),
+                "in_flight": len(self._in_flight),
+                "accepted_total": self.accepted_total,
+                "rejected_total": self.rejected_total,
+                "replays_blocked_total": self.replays_blocked_total
+            }
+
+
+payment_token_store = PaymentTokenStore()
+
+
+def verify_payment_token(token: Optional[str], user_id: str, student_id: str) -> Optional[str]:
+    """
+    Kiểm tra payment-authorization token do OTP Service phát hành và reserve jti.
+
+    Returns:
+        jti đã reserve (gọi payment_token_store.commit/release sau transaction),
+        hoặc None nếu không có token và cấu hình không bắt buộc.
+    """
+    if not token:
+        if PAYMENT_OTP_TOKEN_REQUIRED:
+            payment_token_store.rejected_total += 1
+            raise _payment_auth_error("OTP verification is required before payment", "PAYMENT_TOKEN_REQUIRED")
+        return None
+
+    try:
+        claims = jwt.decode(token, PAYMENT_AUTH_SECRET, algorithms=[PAYMENT_AUTH_ALGORITHM])
+    except ExpiredSignatureError:
+        payment_token_store.rejected_total += 1
+        raise _payment_auth_error("Payment authorization has expired, please verify OTP again", "PAYMENT_TOKEN_EXPIRED")
+    except JWTError:
+        payment_token_store.rejected_total += 1
+        raise _payment_auth_error("Invalid payment authorization token", "PAYMENT_TOKEN_INVALID")
+
+    if claims.get("typ") != PAYMENT_AUTH_TOKEN_TYPE or not claims.get("jti") or claims.get("sub") != user_id:
+        payment_token_store.rejected_total += 1
+        raise _payment_auth_error("Invalid payment authorization token", "PAYMENT_TOKEN_INVALID")
+
+    # Token gắn với một sinh viên cụ thể thì chỉ dùng cho sinh viên đó
+    if claims.get("student_id") and claims["student_id"] != student_id:
+        payment_token_store.rejected_total += 1
+        raise _payment_auth_error("Payment authorization does not match this student", "PAYMENT_TOKEN_MISMATCH")
+
+    if not payment_token_store.reserve(claims["jti"], claims["exp"]):
+        payment_token_store.rejected_total += 1
+        raise _payment_auth_error("Payment authorization has already been used", "PAYMENT_TOKEN_USED")
+
+    return claims["jti"]
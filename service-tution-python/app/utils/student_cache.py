@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import Callable, Optional
+import os
+import threading
+import time
+
+load_dotenv()
+
+# 0 → tắt cache (mọi lookup vẫn được gộp bởi single-flight)
+STUDENT_CACHE_TTL_SECONDS = float(os.getenv("STUDENT_CACHE_TTL_SECONDS", 5))
+STUDENT_CACHE_MAX_SIZE = int(os.getenv("STUDENT_CACHE_MAX_SIZE", 10000))
+
+
+class StudentCache:
+    """
+    Cache ngắn hạn cho response của search_student_by_id, key là student_id.
+
+    Thanh toán thành công gọi invalidate(student_id): xóa entry và ghi lại generation
+    của lần invalidate. Kết quả của lần đọc DB bắt đầu trước đó không được put vào
+    cache, nên cache không giữ trạng thái "chưa đóng" sau khi thanh toán.
+    Instance khác của service có thể trễ tối đa TTL; charge_tuition luôn kiểm tra
+    lại is_payed với SELECT ... FOR UPDATE.
+
+    Giá trị cache là dict response dùng chung giữa các request — chỉ đọc.
+    """
+
+    def __init__(self, ttl_seconds: float = STUDENT_CACHE_TTL_SECONDS, max_size: int = STUDENT_CACHE_MAX_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # student_id → generation của lần invalidate gần nhất (giữ tối đa max_size key)
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._generation = 0
+        # Lần đọc bắt đầu trước mốc này không được put (bản ghi invalidate của nó có thể đã bị bỏ)
+        self._floor = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, student_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[student_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return value
+
+    def generation(self) -> int:
+        """Đọc trước khi truy vấn DB, truyền lại cho put()"""
+        with self._lock:
+            return self._generation
+
+    def put(self, student_id: str, value: dict, generation: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation < self._floor or self._invalidated.get(student_id, 0) > generation:
+                # Dữ liệu đã đổi trong lúc đọc DB
+                self.stale_puts += 1
+                return
+            self._entries[student_id] = (value, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, student_id: str):
+        with self._lock:
+            self._entries.pop(student_id, None)
+            self._generation += 1
+            self._invalidated[student_id] = self._generation
+            self._invalidated.move_to_end(student_id)
+            self.invalidations += 1
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = generation
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts
+            }
+
+
+# Singleton instance
+student_cache = StudentCache()
@@ -0,0 +1,346 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.config.database import db
+from app.config.executors import executors
+
+load_dotenv()
+
+STUDENT_INDEX_ENABLED = os.getenv("STUDENT_INDEX_ENABLED", "true").lower() == "true"
+# Poll incremental (created_at mới) mỗi N giây; rebuild toàn bộ (dọn bản ghi cũ) mỗi M giây
+STUDENT_INDEX_SYNC_INTERVAL_SECONDS = float(os.getenv("STUDENT_INDEX_SYNC_INTERVAL_SECONDS", 5))
+STUDENT_INDEX_REBUILD_INTERVAL_SECONDS = float(os.getenv("STUDENT_INDEX_REBUILD_INTERVAL_SECONDS", 3600))
+# Số dòng mỗi lần đọc students (keyset theo student_id khi rebuild, theo created_at khi sync)
+STUDENT_INDEX_PAGE_SIZE = int(os.getenv("STUDENT_INDEX_PAGE_SIZE", 10000))
+# Đọc lại các dòng có created_at trong N giây trước watermark (transaction commit trễ)
+STUDENT_INDEX_SYNC_OVERLAP_SECONDS = float(os.getenv("STUDENT_INDEX_SYNC_OVERLAP_SECONDS", 5))
+
+MIN_QUERY_LENGTH = 3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Bỏ dấu tiếng Việt + chữ thường + gộp ký tự không phải chữ/số thành một dấu cách:
+    "Nguyễn Thị Đào" → "nguyen thi dao", "CNTT-K18" → "cntt k18"
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _IndexData:
+    """
+    Một phiên bản của index. Mỗi dòng students là một doc (số thứ tự tăng dần);
+    posting list của trigram là array('I') các doc theo thứ tự tăng.
+
+    Cập nhật một sinh viên → doc mới, doc cũ thành tombstone (names[doc] = None),
+    vì xóa khỏi array là O(n). Rebuild dựng phiên bản mới không còn tombstone.
+    Thứ tự ghi: các list theo doc trước, posting sau — reader thấy doc trong
+    posting thì doc đó đã có đủ dữ liệu.
+    """
+
+    def __init__(self):
+        self.student_ids: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.classes: List[str] = []
+        self.semesters: List[str] = []
+        self.years = array("H")
+        self.grams: Dict[str, array] = {}
+        self.doc_by_student: Dict[str, int] = {}
+        # Chuỗi đã chuẩn hóa dùng chung giữa các doc trùng tên / lớp / học kỳ
+        self.strings: Dict[str, str] = {}
+        self.live = 0
+
+    def _intern(self, text: Optional[str]) -> str:
+        value = self.strings.get(text)
+        if value is None:
+            value = normalize_text(text)
+            self.strings[text] = value
+        return value
+
+    def add(self, student_id: str, full_name: str, class_name: str, semester: str, year: int,
+            gram_cache: Optional[Dict[str, frozenset]] = None) -> bool:
+        """False nếu sinh viên đã có trong index với đúng dữ liệu này"""
+        name, cls, sem = self._intern(full_name), self._intern(class_name), self._intern(semester)
+        # Collation của MySQL không phân biệt hoa thường; key casefold dùng luôn làm ID trả về
+        key = student_id.casefold()
+        old = self.doc_by_student.get(key)
+        if old is not None:
+            if (self.names[old], self.classes[old], self.semesters[old], self.years[old]) == (name, cls, sem, year):
+                return False
+            self.names[old] = None
+            self.live -= 1
+
+        if gram_cache is None:
+            grams = trigrams(name) | trigrams(cls)
+        else:
+            grams = self._cached_trigrams(name, gram_cache) | self._cached_trigrams(cls, gram_cache)
+
+        doc = len(self.names)
+        self.student_ids.append(key)
+        self.classes.append(cls)
+        self.semesters.append(sem)
+        self.years.append(year or 0)
+        self.names.append(name)
+        for gram in grams:
+            posting = self.grams.get(gram)
+            if posting is None:
+                posting = self.grams[gram] = array("I")
+            posting.append(doc)
+        self.doc_by_student[key] = doc
+        self.live += 1
+        return True
+
+    @staticmethod
+    def _cached_trigrams(text: str, gram_cache: Dict[str, frozenset]) -> frozenset:
+        grams = gram_cache.get(text)
+        if grams is None:
+            grams = gram_cache[text] = frozenset(trigrams(text))
+        return grams
+
+    def postings_bytes(self) -> int:
+        return sum(posting.itemsize * len(posting) for posting in self.grams.values())
+
+
+class StudentNameIndex:
+    """
+    Index trigram trong bộ nhớ cho tìm sinh viên theo tên / lớp (không dấu, không
+    phân biệt hoa thường, khớp chuỗi con như LIKE '%...%').
+
+    Tìm kiếm: lấy posting list ngắn nhất trong các trigram của query làm ứng viên
+    rồi kiểm tra chuỗi con trên tên/lớp đã chuẩn hóa; dừng khi đủ limit + 1 kết quả.
+    Index chỉ trả student_id — dữ liệu (học phí, is_payed) đọc lại từ DB.
+
+    Đồng bộ: task nền dựng index khi khởi động (đọc students theo trang khóa chính),
+    sau đó poll các dòng có created_at mới (sinh viên mới; pay_tuition cũng đặt
+    created_at = NOW()), định kỳ rebuild để dọn tombstone và bắt các thay đổi
+    không đụng tới created_at. Chỉ task nền ghi; reader không cần lock.
+    """
+
+    def __init__(self, database=db):
+        self._db = database
+        self._lock = threading.Lock()
+        self._data: Optional[_IndexData] = None
+        # created_at lớn nhất đã nạp
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_rebuild = 0.0
+
+        # Metrics
+        self.searches = 0
+        self.candidates_scanned = 0
+        self.short_queries = 0
+        self.syncs = 0
+        self.synced_rows = 0
+        self.sync_errors = 0
+        self.rebuilds = 0
+        self.last_rebuild_seconds: Optional[float] = None
+        self.last_sync_at: Optional[datetime] = None
+        self.last_sync_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._data is not None
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 20, semester: Optional[str] = None,
+               year: Optional[int] = None) -> Tuple[List[str], bool]:
+        """
+        (student_id khớp theo thứ tự doc — dạng casefold, còn kết quả khác hay không).
+        ValueError nếu query chuẩn hóa ngắn hơn MIN_QUERY_LENGTH ký tự.
+        """
+        data = self._data
+        if data is None:
+            raise RuntimeError("Student index is not built yet")
+
+        text = normalize_text(query)
+        if len(text) < MIN_QUERY_LENGTH:
+            self.short_queries += 1
+            raise ValueError(f"Query must have at least {MIN_QUERY_LENGTH} letters or digits")
+        self.searches += 1
+
+        postings = []
+        for gram in trigrams(text):
+            posting = data.grams.get(gram)
+            if posting is None:
+                return [], False
+            postings.append(posting)
+        candidates = min(postings, key=len)
+
+        wanted_semester = normalize_text(semester) if semester else None
+        names, classes, semesters, years = data.names, data.classes, data.semesters, data.years
+        matches = []
+        scanned = 0
+        for doc in candidates:
+            scanned += 1
+            name = names[doc]
+            if name is None:
+                continue
+            if text not in name and text not in classes[doc]:
+                continue
+            if year is not None and years[doc] != year:
+                continue
+            if wanted_semester is not None and semesters[doc] != wanted_semester:
+                continue
+            matches.append(data.student_ids[doc])
+            if len(matches) > limit:
+                break
+        self.candidates_scanned += scanned
+        return matches[:limit], len(matches) > limit
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def rebuild(self) -> int:
+        """Đọc toàn bộ students theo trang khóa chính, dựng index mới rồi thay thế"""
+        started = time.perf_counter()
+        with self._db.cursor() as cursor:
+            # Lấy mốc trước khi đọc: dòng ghi trong lúc rebuild sẽ được sync lần sau
+            cursor.execute("SELECT MAX(created_at) AS max_created_at FROM students")
+            watermark = cursor.fetchone()["max_created_at"]
+
+        data = _IndexData()
+        gram_cache: Dict[str, frozenset] = {}
+        last_id = ""
+        while True:
+            with self._db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT student_id, full_name, class, semester, year
+                    FROM students
+                    WHERE student_id > %s
+                    ORDER BY student_id
+                    LIMIT %s
+                    """,
+                    (last_id, STUDENT_INDEX_PAGE_SIZE)
+                )
+                rows = cursor.fetchall()
+            for row in rows:
+                data.add(row["student_id"], row["full_name"], row["class"], row["semester"], row["year"],
+                         gram_cache=gram_cache)
+            if len(rows) < STUDENT_INDEX_PAGE_SIZE:
+                break
+            last_id = rows[-1]["student_id"]
+
+        with self._lock:
+            self._data = data
+            self._watermark = watermark
+        self.rebuilds += 1
+        self._last_rebuild = time.time()
+        self.last_rebuild_seconds = round(time.perf_counter() - started, 3)
+        print(f"✅ Student index built: {data.live:,} students, {len(data.grams):,} trigrams "
+              f"in {self.last_rebuild_seconds}s")
+        return data.live
+
+    def sync(self) -> int:
+        """Nạp lại các dòng có created_at >= watermark - overlap (thêm mới hoặc đổi tên/lớp)"""
+        if self._watermark is None:
+            return self.rebuild()
+
+        since = self._watermark - timedelta(seconds=STUDENT_INDEX_SYNC_OVERLAP_SECONDS)
+        last_key = (since, "")
+        changed = 0
+        while True:
+            with self._db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT student_id, full_name, class, semester, year, created_at
+                    FROM students
+                    WHERE (created_at, student_id) > (%s, %s)
+                    ORDER BY created_at, student_id
+                    LIMIT %s
+                    """,
+                    (*last_key, STUDENT_INDEX_PAGE_SIZE)
+                )
+                rows = cursor.fetchall()
+            with self._lock:
+                for row in rows:
+                    changed += self._data.add(row["student_id"], row["full_name"], row["class"],
+                                              row["semester"], row["year"])
+            self.synced_rows += len(rows)
+            if rows:
+                last_key = (rows[-1]["created_at"], rows[-1]["student_id"])
+                self._watermark = max(self._watermark, rows[-1]["created_at"])
+            if len(rows) < STUDENT_INDEX_PAGE_SIZE:
+                return changed
+
+    async def _loop(self):
+        while True:
+            try:
+                if time.time() - self._last_rebuild >= STUDENT_INDEX_REBUILD_INTERVAL_SECONDS:
+                    await executors["database"].run(self.rebuild)
+                else:
+                    await executors["database"].run(self.sync)
+                self.syncs += 1
+                self.last_sync_at = datetime.now()
+                self.last_sync_error = None
+            except Exception as e:
+                self.sync_errors += 1
+                self.last_sync_error = str(e)
+                print(f"⚠️ Student index sync failed: {e}")
+            await asyncio.sleep(STUDENT_INDEX_SYNC_INTERVAL_SECONDS)
+
+    def start(self):
+        """Dựng index + khởi động task đồng bộ (gọi trong startup event)"""
+        if not STUDENT_INDEX_ENABLED:
+            print("⚠️ Student name index disabled (STUDENT_INDEX_ENABLED=false)")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            print(f"✅ Student index sync started: every {STUDENT_INDEX_SYNC_INTERVAL_SECONDS}s, "
+                  f"rebuild every {STUDENT_INDEX_REBUILD_INTERVAL_SECONDS}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        data = self._data
+        return {
+            "enabled": STUDENT_INDEX_ENABLED,
+            "ready": data is not None,
+            "running": self._task is not None and not self._task.done(),
+            "students": data.live if data else 0,
+            # Doc cũ của sinh viên đã cập nhật, được dọn ở lần rebuild tiếp theo
+            "tombstones": len(data.names) - data.live if data else 0,
+            "trigrams": len(data.grams) if data else 0,
+            "postings_bytes": data.postings_bytes() if data else 0,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            "searches": self.searches,
+            "avg_candidates_scanned": round(self.candidates_scanned / self.searches, 1) if self.searches else 0.0,
+            "short_queries": self.short_queries,
+            "syncs": self.syncs,
+            "synced_rows": self.synced_rows,
+            "sync_errors": self.sync_errors,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+            "last_sync_at": self.last_sync_at.isoformat() if self.last_sync_at else None,
+            "last_sync_error": self.last_sync_error
+        }
+
+
+# Singleton instance
+student_index = StudentNameIndex()
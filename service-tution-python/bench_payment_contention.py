@@ -0,0 +1,208 @@
+"""
+Benchmark goodput của pay_tuition dưới tranh chấp: không retry vs retry phía server
+
+Dữ liệu riêng (prefix BENCH_PAY_): vài tài khoản trả tiền dùng chung (tranh chấp
+trên dòng users) + một luồng "hoàn tiền" khóa users → students, ngược thứ tự
+của thanh toán (students → users), nên InnoDB thực sự báo deadlock 1213.
+innodb_lock_wait_timeout của session được hạ xuống để 1205 cũng xuất hiện.
+
+Mỗi mode chạy charge_tuition (bước 1-5 thật của controller) qua run_in_transaction:
+- no-retry: lỗi tranh chấp trả thẳng về client (client phải gửi lại cả HTTP request)
+- server-retry: payment_retry_policy (backoff + jitter) chạy lại transaction
+
+Chạy: python bench_payment_contention.py [--threads 16] [--payers 4] [--seconds 20]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import queue
+import random
+import statistics
+import threading
+import time
+from dataclasses import replace
+
+import pymysql
+from fastapi import HTTPException
+
+from app.config.database import config
+from app.controllers.payment import charge_tuition, payment_retry_policy
+from soa_common.db import ConnectionPool, RetryPolicy, classify, run_in_transaction
+
+PREFIX = "BENCH_PAY_"
+TUITION = 1000.0
+
+
+def make_pool(threads: int, lock_wait_timeout: int) -> ConnectionPool:
+    bench_config = replace(config, max_size=threads + 2)
+
+    def connect():
+        return pymysql.connect(
+            **bench_config.connect_kwargs(),
+            init_command=f"SET SESSION innodb_lock_wait_timeout = {lock_wait_timeout}"
+        )
+
+    return ConnectionPool(bench_config, name="bench", connect=connect)
+
+
+def setup(pool: ConnectionPool, payers: int, students: int):
+    cleanup(pool)
+    with pool.transaction() as cursor:
+        cursor.executemany(
+            """
+            INSERT INTO users (user_id, username, email_address, password, full_name,
+                               available_balance, created_at, updated_at)
+            VALUES (%s, %s, %s, 'x', 'Bench payer', %s, NOW(), NOW())
+            """,
+            [(f"{PREFIX}U{i}", f"{PREFIX}u{i}", f"{PREFIX.lower()}u{i}@example.com", 1e15)
+             for i in range(payers)]
+        )
+        cursor.executemany(
+            """
+            INSERT INTO students (student_id, full_name, class, faculty, semester, year,
+                                  tuition_amount, is_payed, version)
+            VALUES (%s, 'Bench student', 'BENCH', 'BENCH', 1, 2025, %s, 0, 1)
+            """,
+            [(f"{PREFIX}S{i}", TUITION) for i in range(students)]
+        )
+
+
+def cleanup(pool: ConnectionPool):
+    with pool.transaction() as cursor:
+        cursor.execute("DELETE FROM user_student_payment WHERE student_id LIKE %s", (f"{PREFIX}%",))
+        cursor.execute("DELETE FROM students WHERE student_id LIKE %s", (f"{PREFIX}%",))
+        cursor.execute("DELETE FROM users WHERE user_id LIKE %s", (f"{PREFIX}%",))
+
+
+def refund(cursor, user_id: str, student_id: str):
+    """Hoàn tiền: khóa users trước rồi students (ngược thứ tự với thanh toán)"""
+    cursor.execute("SELECT available_balance FROM users WHERE user_id = %s FOR UPDATE", (user_id,))
+    cursor.execute(
+        "UPDATE users SET available_balance = available_balance + %s, "
+        "balance_version = balance_version + 1 WHERE user_id = %s",
+        (TUITION, user_id)
+    )
+    cursor.execute(
+        "UPDATE students SET is_payed = 0, version = version + 1 WHERE student_id = %s AND is_payed = 1",
+        (student_id,)
+    )
+    return cursor.rowcount
+
+
+def run_mode(name: str, policy: RetryPolicy, args) -> dict:
+    pool = make_pool(args.threads + 1, args.lock_wait_timeout)
+    setup(pool, args.payers, args.students)
+
+    unpaid = queue.Queue()
+    for i in range(args.students):
+        unpaid.put(f"{PREFIX}S{i}")
+    paid = queue.Queue()
+
+    stop = threading.Event()
+    latencies = []
+    outcomes = {"paid": 0, "conflict_to_client": 0, "other_error": 0}
+    lock = threading.Lock()
+
+    def payer_worker(seed: int):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            try:
+                student_id = unpaid.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            user_id = f"{PREFIX}U{rng.randrange(args.payers)}"
+            started = time.perf_counter()
+            try:
+                run_in_transaction(pool, lambda cursor: charge_tuition(cursor, student_id, user_id), policy=policy)
+                outcome = "paid"
+                paid.put((user_id, student_id))
+            except HTTPException:
+                outcome = "other_error"
+            except Exception as e:
+                outcome = "conflict_to_client" if classify(e) else "other_error"
+                # Client sẽ gửi lại → đưa student về hàng đợi
+                unpaid.put(student_id)
+            elapsed = time.perf_counter() - started
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "paid":
+                    latencies.append(elapsed)
+
+    def refund_worker():
+        while not stop.is_set():
+            try:
+                user_id, student_id = paid.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                run_in_transaction(pool, lambda cursor: refund(cursor, user_id, student_id),
+                                   policy=RetryPolicy("refund"))
+                unpaid.put(student_id)
+            except Exception:
+                paid.put((user_id, student_id))
+
+    # print của controller làm nhiễu kết quả → tắt trong lúc đo
+    real_stdout = sys.stdout
+    workers = [threading.Thread(target=payer_worker, args=(i,)) for i in range(args.threads)]
+    workers.append(threading.Thread(target=refund_worker))
+    try:
+        sys.stdout = open(os.devnull, "w")
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+        cleanup(pool)
+        pool.close()
+
+    latencies.sort()
+    return {
+        "mode": name,
+        "goodput": outcomes["paid"] / elapsed,
+        "outcomes": outcomes,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "retry_stats": policy.get_stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pay_tuition goodput under contention")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--payers", type=int, default=4, help="Số tài khoản trả tiền dùng chung")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--lock-wait-timeout", type=int, default=2, help="innodb_lock_wait_timeout (giây)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"💳 PAYMENT CONTENTION — {args.threads} threads, {args.payers} payers, {args.seconds:.0f}s/mode")
+    print("=" * 80)
+
+    no_retry = RetryPolicy("no-retry", rules={})
+    results = [run_mode("no-retry", no_retry, args), run_mode("server-retry", payment_retry_policy, args)]
+
+    for result in results:
+        stats = result["retry_stats"]
+        print(f"\n   {result['mode']}")
+        print(f"      goodput:            {result['goodput']:8.1f} payments/s")
+        print(f"      latency p50 / p99:  {result['p50_ms']:8.1f} / {result['p99_ms']:.1f} ms")
+        print(f"      outcomes:           {result['outcomes']}")
+        print(f"      server retries:     {stats['retries']}  exhausted: {stats['exhausted']}")
+
+    baseline, retried = results
+    if baseline["goodput"]:
+        print(f"\n⚡ Goodput with server-side retry: {retried['goodput'] / baseline['goodput']:.2f}x")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: N lần GET /students/search/{id} tuần tự so với một POST /students/search/batch
+
+Dữ liệu từ database/generate_data.py (student_id ST00000000…, user0 / password123).
+Mỗi vòng dùng một bộ ID ngẫu nhiên mới (không trúng cache tra cứu của service),
+một phần là ID không tồn tại (--missing-ratio).
+
+Cần Auth + Tuition Service đang chạy trên database đã sinh dữ liệu.
+Chạy: python bench_student_batch.py [--ids 50] [--rounds 20] [--students 1000000]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import aiohttp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+
+from generate_data import DEFAULT_PASSWORD, student_id  # noqa: E402
+
+BASE_AUTH_URL = "http://localhost:8000/api"
+BASE_TUITION_URL = "http://localhost:8001"
+
+
+async def login(session, args) -> str:
+    async with session.post(f"{args.auth_url}/auth/login",
+                            json={"username": args.username, "password": args.password}) as response:
+        data = await response.json()
+        if response.status != 200:
+            raise RuntimeError(f"Login failed: {data}")
+        return data["token"]
+
+
+def sample_ids(rng: random.Random, args) -> list:
+    ids = []
+    for _ in range(args.ids):
+        if rng.random() < args.missing_ratio:
+            ids.append(f"MISSING{rng.randrange(10 ** 8):08d}")
+        else:
+            ids.append(student_id(rng.randrange(args.students)))
+    return ids
+
+
+async def sequential(session, headers, args, ids) -> int:
+    found = 0
+    for value in ids:
+        async with session.get(f"{args.tuition_url}/students/search/{value}", headers=headers) as response:
+            await response.read()
+            found += response.status == 200
+    return found
+
+
+async def batch(session, headers, args, ids) -> int:
+    async with session.post(f"{args.tuition_url}/students/search/batch",
+                            json={"student_ids": ids}, headers=headers) as response:
+        data = await response.json()
+        if response.status != 200:
+            raise RuntimeError(f"Batch search failed: {data}")
+        assert [result["student_id"] for result in data["data"]] == ids
+        return sum(result["found"] for result in data["data"])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sequential single lookups vs one batch lookup")
+    parser.add_argument("--auth-url", default=BASE_AUTH_URL)
+    parser.add_argument("--tuition-url", default=BASE_TUITION_URL)
+    parser.add_argument("--username", default="user0")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--ids", type=int, default=50, help="Số ID mỗi lần tra cứu")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--students", type=int, default=1000000, help="Số sinh viên đã sinh (--students của generate_data)")
+    parser.add_argument("--missing-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print("=" * 80)
+    print(f"📦 STUDENT LOOKUP — {args.ids} IDs x {args.rounds} rounds: sequential vs batch")
+    print("=" * 80)
+
+    async with aiohttp.ClientSession() as session:
+        headers = {"Authorization": f"Bearer {await login(session, args)}"}
+        # Warm-up: connection, token cache, pool
+        await batch(session, headers, args, sample_ids(rng, args))
+
+        timings = {"sequential": [], "batch": []}
+        for _ in range(args.rounds):
+            for mode, fn in (("sequential", sequential), ("batch", batch)):
+                ids = sample_ids(rng, args)
+                started = time.perf_counter()
+                await fn(session, headers, args, ids)
+                timings[mode].append(time.perf_counter() - started)
+
+    for mode, values in timings.items():
+        mean = statistics.mean(values)
+        print(f"{mode:<11} mean {mean * 1000:8.1f} ms/round  {mean * 1000 / args.ids:7.2f} ms/ID  "
+              f"median {statistics.median(values) * 1000:8.1f} ms  max {max(values) * 1000:8.1f} ms")
+
+    print("=" * 80)
+    speedup = statistics.mean(timings["sequential"]) / statistics.mean(timings["batch"])
+    print(f"⚡ Batch vs sequential: {speedup:.1f}x faster for {args.ids} IDs")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Mô phỏng số lần đọc DB khi cả lớp cùng mở trang học phí (/students/search)
+
+Mỗi "lớp" gồm --class-size client tra cứu cùng một student_id trong vòng --spread-ms;
+các lớp bắt đầu xen kẽ nhau. Truy vấn DB được thay bằng asyncio.sleep(--db-ms)
+chạy qua một executor giới hạn --workers luồng (như executor "database").
+SingleFlight và StudentCache là class thật của service.
+
+So sánh: không gộp / single-flight / single-flight + cache (--ttl giây).
+
+Chạy: python bench_student_coalescing.py [--classes 200] [--class-size 40] [--db-ms 5]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import asyncio
+import random
+import time
+
+import app.config.database  # noqa: F401  (thêm shared/ vào sys.path)
+from app.utils.student_cache import StudentCache
+from soa_common.singleflight import SingleFlight
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(mode: str, args) -> dict:
+    rng = random.Random(args.seed)
+    workers = asyncio.Semaphore(args.workers)
+    flight = SingleFlight("bench")
+    cache = StudentCache(ttl_seconds=args.ttl if mode == "singleflight+cache" else 0)
+    db_reads = 0
+
+    async def fetch(student_id: str) -> dict:
+        nonlocal db_reads
+        async with workers:
+            db_reads += 1
+            await asyncio.sleep(args.db_ms / 1000)
+            return {"success": True, "data": {"student_id": student_id}}
+
+    async def lookup(student_id: str) -> dict:
+        if mode == "none":
+            return await fetch(student_id)
+        cached = cache.get(student_id)
+        if cached is not None:
+            return cached
+        generation = cache.generation()
+        result = await flight.do(student_id, lambda: fetch(student_id))
+        cache.put(student_id, result, generation)
+        return result
+
+    latencies = []
+
+    async def client(student_id: str, delay: float):
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        await lookup(student_id)
+        latencies.append(time.perf_counter() - started)
+
+    # Cả lớp tra cứu cùng sinh viên (mã của lớp trưởng chia sẻ lên nhóm chat)
+    tasks = []
+    for c in range(args.classes):
+        class_start = c * args.class_gap_ms / 1000
+        student_id = f"ST{rng.randrange(args.classes * 10):08d}"
+        for _ in range(args.class_size):
+            tasks.append(client(student_id, class_start + rng.random() * args.spread_ms / 1000))
+
+    await asyncio.gather(*tasks)
+
+    return {
+        "requests": len(latencies),
+        "db_reads": db_reads,
+        "coalescing_ratio": flight.get_stats()["coalescing_ratio"],
+        "cache_hit_ratio": cache.get_stats()["hit_ratio"],
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulate DB reads saved by student lookup coalescing")
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--class-size", type=int, default=40)
+    parser.add_argument("--spread-ms", type=float, default=500, help="Cả lớp mở trang trong khoảng này")
+    parser.add_argument("--class-gap-ms", type=float, default=20, help="Khoảng cách giữa hai lớp")
+    parser.add_argument("--db-ms", type=float, default=5, help="Thời gian một truy vấn DB giả lập")
+    parser.add_argument("--workers", type=int, default=10, help="Số luồng executor \"database\"")
+    parser.add_argument("--ttl", type=float, default=5, help="TTL cache (giây) cho mode có cache")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"👥 STUDENT LOOKUP COALESCING — {args.classes} classes x {args.class_size} students")
+    print("=" * 80)
+    print(f"\n{'mode':<20} {'requests':>9} {'db reads':>9} {'coalesced':>10} {'cache hit':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("none", "singleflight", "singleflight+cache"):
+        result = await run(mode, args)
+        print(f"{mode:<20} {result['requests']:>9,} {result['db_reads']:>9,} "
+              f"{result['coalescing_ratio']:>10.1%} {result['cache_hit_ratio']:>10.1%} "
+              f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
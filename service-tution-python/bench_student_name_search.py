@@ -0,0 +1,153 @@
+"""
+Benchmark: tìm sinh viên theo tên — index trigram trong bộ nhớ (app/utils/student_index.py)
+so với SQL LIKE '%...%' trên cùng database
+
+Dữ liệu từ database/generate_data.py (mặc định database midterm_soa_scale, 1 triệu sinh viên;
+--generate để sinh lại). Cả hai cách trả về cùng các cột như GET /students/search/name:
+- index: student_index.search() rồi đọc thông tin theo khóa chính (WHERE student_id IN ...)
+- like:  SELECT ... WHERE full_name LIKE %s OR class LIKE %s LIMIT %s (quét bảng tới khi đủ dòng)
+
+Các loại query: họ tên đầy đủ có dấu / không dấu, tên riêng, mã lớp, và chuỗi không khớp
+(trường hợp xấu nhất của LIKE: quét hết bảng).
+
+Chạy: python bench_student_name_search.py [--database midterm_soa_scale] [--queries 50] [--limit 20]
+      python bench_student_name_search.py --generate --students 1000000
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import random
+import statistics
+import time
+from dataclasses import replace
+
+from app.config.database import config
+from app.utils.student_index import StudentNameIndex, normalize_text
+from soa_common.db import ConnectionPool
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database"))
+
+from generate_data import (  # noqa: E402
+    FACULTIES, FAMILY_NAMES, GIVEN_NAMES, MIDDLE_NAMES, SCALE_DB, connect, create_database, generate
+)
+
+COLUMNS = "student_id, full_name, class, faculty, semester, year, tuition_amount, is_payed, created_at, version"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def sample_queries(rng: random.Random, count: int, years) -> dict:
+    def full_name():
+        return f"{rng.choice(FAMILY_NAMES)[0]} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}"
+
+    return {
+        "full name": [full_name() for _ in range(count)],
+        "no diacritics": [normalize_text(full_name()) for _ in range(count)],
+        "given name": [f"{rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}" for _ in range(count)],
+        # Mã lớp như generate_data: CNTT-K18 (khóa = năm - 2006)
+        "class": [f"{rng.choice(FACULTIES)[0]}-K{rng.choice(years) - 2006}" for _ in range(count)],
+        "no match": ["".join(rng.choice("qwxzj") for _ in range(5)) for _ in range(count)],
+    }
+
+
+def search_index(index: StudentNameIndex, pool: ConnectionPool, query: str, limit: int) -> int:
+    student_ids, _ = index.search(query, limit=limit)
+    if not student_ids:
+        return 0
+    with pool.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {COLUMNS} FROM students WHERE student_id IN ({', '.join(['%s'] * len(student_ids))})",
+            student_ids
+        )
+        return len(cursor.fetchall())
+
+
+def search_like(pool: ConnectionPool, query: str, limit: int) -> int:
+    pattern = f"%{query}%"
+    with pool.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {COLUMNS} FROM students WHERE full_name LIKE %s OR class LIKE %s LIMIT %s",
+            (pattern, pattern, limit)
+        )
+        return len(cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory trigram index vs SQL LIKE for student name search")
+    parser.add_argument("--database", default=SCALE_DB, help="Database đã sinh bằng generate_data.py")
+    parser.add_argument("--generate", action="store_true", help="DROP + sinh lại --database trước khi đo")
+    parser.add_argument("--students", type=int, default=1000000, help="Số sinh viên khi --generate")
+    parser.add_argument("--queries", type=int, default=50, help="Số query mỗi loại")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database == config.database:
+        sys.exit(f"❌ Refusing to benchmark on the service database {config.database}; use a generated one")
+
+    if args.generate:
+        print(f"🔧 Generating {args.students:,} students into {args.database}...")
+        connection = connect()
+        try:
+            with connection.cursor() as cursor:
+                create_database(cursor, args.database)
+            generate(connection, users=1000, students=args.students, seed=args.seed)
+        finally:
+            connection.close()
+
+    pool = ConnectionPool(replace(config, database=args.database, min_size=1, max_size=2), name="bench")
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS total FROM students")
+        total = cursor.fetchone()["total"]
+        cursor.execute("SELECT MIN(year) AS first, MAX(year) AS last FROM students")
+        span = cursor.fetchone()
+
+    print("=" * 80)
+    print(f"🔎 STUDENT NAME SEARCH — {total:,} students, limit {args.limit}, {args.queries} queries/type")
+    print("=" * 80)
+
+    index = StudentNameIndex(database=pool)
+    index.rebuild()
+    stats = index.get_stats()
+    print(f"   build {stats['last_rebuild_seconds']}s, {stats['trigrams']:,} trigrams, "
+          f"postings {stats['postings_bytes'] / 1024 / 1024:.1f} MB")
+
+    rng = random.Random(args.seed)
+    queries = sample_queries(rng, args.queries, list(range(span["first"] or 2024, (span["last"] or 2024) + 1)))
+
+    # Warm-up: buffer pool + connection
+    search_like(pool, "warm", args.limit)
+    search_index(index, pool, "nguyen", args.limit)
+
+    print(f"\n{'query type':<14} {'mode':<6} {'rows':>6} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind, values in queries.items():
+        means = {}
+        for mode in ("index", "like"):
+            timings, rows = [], 0
+            for query in values:
+                started = time.perf_counter()
+                if mode == "index":
+                    rows += search_index(index, pool, query, args.limit)
+                else:
+                    rows += search_like(pool, query, args.limit)
+                timings.append(time.perf_counter() - started)
+            means[mode] = statistics.mean(timings)
+            print(f"{kind:<14} {mode:<6} {rows / len(values):>6.1f} {means[mode] * 1000:>9.2f} "
+                  f"{percentile(timings, 50) * 1000:>8.2f} {percentile(timings, 99) * 1000:>8.2f}")
+        print(f"{'':<14} ⚡ index {means['like'] / means['index']:.1f}x faster")
+
+    print("=" * 80)
+    print(f"   index searches scanned {index.get_stats()['avg_candidates_scanned']:,} candidates on average")
+    print("   Ghi chú: LIKE phụ thuộc collation (utf8mb4_0900_ai_ci bỏ qua dấu trừ đ/Đ);")
+    print("   index luôn bỏ dấu tiếng Việt, kể cả đ → d.")
+    print("=" * 80)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
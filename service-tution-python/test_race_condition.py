@@ -10,6 +10,8 @@ BASE_TUITION_URL = "http://localhost:8001/api"
 USER1 = {"username": "johndoe", "password": "password123"}
 USER2 = {"username": "janedoe", "password": "password456"}
 STUDENT_ID = "ST2025005"
+# Script gửi /payments/pay không kèm payment_token (không qua OTP):
+# chạy Tuition Service với PAYMENT_OTP_TOKEN_REQUIRED=false khi test race condition
 
 async def login(session, user_credentials):
     """Login and get token"""
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.utils import payment_auth
+from app.utils.payment_auth import (
+    PAYMENT_AUTH_ALGORITHM, PAYMENT_AUTH_SECRET, PAYMENT_AUTH_TOKEN_TYPE, PaymentTokenStore, verify_payment_token
+)
+
+
+def make_token(secret=PAYMENT_AUTH_SECRET, **overrides):
+    """Token giống app/services/payment_auth.py của OTP Service"""
+    now = int(time.time())
+    claims = {"typ": PAYMENT_AUTH_TOKEN_TYPE, "sub": "USR1", "email": "user@example.com",
+              "jti": f"jti-{time.perf_counter_ns()}", "iat": now, "exp": now + 300}
+    claims.update(overrides)
+    claims = {key: value for key, value in claims.items() if value is not None}
+    return jwt.encode(claims, secret, algorithm=PAYMENT_AUTH_ALGORITHM)
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = PaymentTokenStore()
+    monkeypatch.setattr(payment_auth, "payment_token_store", store)
+    return store
+
+
+def error_of(token, user_id="USR1", student_id="ST2025001"):
+    with pytest.raises(HTTPException) as raised:
+        verify_payment_token(token, user_id, student_id)
+    assert raised.value.status_code == 403
+    return raised.value.detail["error"]
+
+
+def test_valid_token_reserves_its_jti(store):
+    jti = verify_payment_token(make_token(jti="abc"), "USR1", "ST2025001")
+    assert jti == "abc"
+    assert store.get_stats()["in_flight"] == 1
+
+
+def test_missing_token_is_rejected_when_required(monkeypatch):
+    monkeypatch.setattr(payment_auth, "PAYMENT_OTP_TOKEN_REQUIRED", True)
+    assert error_of(None) == "PAYMENT_TOKEN_REQUIRED"
+    monkeypatch.setattr(payment_auth, "PAYMENT_OTP_TOKEN_REQUIRED", False)
+    assert verify_payment_token(None, "USR1", "ST2025001") is None
+
+
+@pytest.mark.parametrize("token, error", [
+    (make_token(typ="access"), "PAYMENT_TOKEN_INVALID"),
+    (make_token(typ=None), "PAYMENT_TOKEN_INVALID"),
+    (make_token(jti=None), "PAYMENT_TOKEN_INVALID"),
+    (make_token(sub="USR2"), "PAYMENT_TOKEN_INVALID"),
+    (make_token(secret="other-secret"), "PAYMENT_TOKEN_INVALID"),
+    (make_token(exp=int(time.time()) - 1), "PAYMENT_TOKEN_EXPIRED"),
+    ("not-a-jwt", "PAYMENT_TOKEN_INVALID"),
+])
+def test_rejected_tokens(token, error, store):
+    assert error_of(token) == error
+    assert store.get_stats()["rejected_total"] == 1
+    assert store.get_stats()["in_flight"] == 0
+
+
+def test_token_bound_to_a_student_only_pays_for_that_student():
+    assert error_of(make_token(student_id="ST2025002")) == "PAYMENT_TOKEN_MISMATCH"
+    assert verify_payment_token(make_token(student_id="ST2025001"), "USR1", "ST2025001")
+
+
+def test_jti_cannot_be_reused_while_in_flight_or_after_commit(store):
+    token = make_token(jti="once")
+    jti = verify_payment_token(token, "USR1", "ST2025001")
+    assert error_of(token) == "PAYMENT_TOKEN_USED"
+
+    store.commit(jti)
+    assert error_of(token) == "PAYMENT_TOKEN_USED"
+    stats = store.get_stats()
+    assert stats["accepted_total"] == 1
+    assert stats["used_tokens"] == 1
+    assert stats["replays_blocked_total"] == 2
+
+
+def test_released_jti_can_be_retried(store):
+    token = make_token(jti="retry")
+    store.release(verify_payment_token(token, "USR1", "ST2025001"))
+    assert verify_payment_token(token, "USR1", "ST2025001") == "retry"
+
+
+def test_used_jti_is_forgotten_only_after_expiry(store, monkeypatch):
+    expires_at = time.time() + 300
+    assert store.reserve("old", expires_at)
+    store.commit("old")
+    assert not store.reserve("old", expires_at)
+
+    monkeypatch.setattr(time, "time", lambda: expires_at + 120)
+    store._next_prune = 0
+    assert store.reserve("old", expires_at + 300)
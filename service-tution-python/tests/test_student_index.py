@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from app.utils.student_index import StudentNameIndex, normalize_text
+
+STUDENTS = [
+    ("ST2025001", "Nguyễn Văn An", "CNTT-K18", "HK1", 2024),
+    ("ST2025002", "Trần Thị Đào", "CNTT-K18", "HK1", 2024),
+    ("ST2025003", "Lê Văn Đức", "QTKD-K19", "HK2", 2025),
+    ("st2025004", "Nguyễn Thị Anh", "KT-K18", "HK1", 2025),
+]
+
+
+class FakeCursor:
+    """Trả về students cho 2 query của rebuild(): MAX(created_at) và trang theo student_id"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._result = []
+
+    def execute(self, sql, args=()):
+        if "MAX(created_at)" in sql:
+            self._result = [{"max_created_at": datetime(2025, 1, 1)}]
+        else:
+            last_id, limit = args
+            self._result = [row for row in self.rows if row["student_id"] > last_id][:limit]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeDatabase:
+    def __init__(self, students):
+        keys = ("student_id", "full_name", "class", "semester", "year")
+        self.rows = sorted((dict(zip(keys, student)) for student in students), key=lambda row: row["student_id"])
+
+    @contextmanager
+    def cursor(self):
+        yield FakeCursor(self.rows)
+
+
+@pytest.fixture
+def index():
+    index = StudentNameIndex(database=FakeDatabase(STUDENTS))
+    index.rebuild()
+    return index
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Nguyễn Thị Đào", "nguyen thi dao"),
+    ("ĐẶNG  Văn Ư", "dang van u"),
+    ("CNTT-K18", "cntt k18"),
+    ("  --  ", ""),
+    (None, ""),
+])
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_search_ignores_diacritics_and_case(index):
+    assert index.search("nguyen")[0] == ["st2025001", "st2025004"]
+    assert index.search("TRẦN THỊ ĐÀO")[0] == ["st2025002"]
+    assert index.search("duc")[0] == ["st2025003"]
+
+
+def test_search_matches_class_and_substrings(index):
+    assert index.search("cntt-k18")[0] == ["st2025001", "st2025002"]
+    assert index.search("van a")[0] == ["st2025001"]
+    assert index.search("qwxz") == ([], False)
+
+
+def test_search_filters_and_limit(index):
+    assert index.search("k18", year=2025)[0] == ["st2025004"]
+    assert index.search("k18", semester="hk1", year=2024)[0] == ["st2025001", "st2025002"]
+    assert index.search("nguyen", limit=1) == (["st2025001"], True)
+
+
+def test_search_rejects_short_queries_and_unbuilt_index(index):
+    with pytest.raises(ValueError):
+        index.search("Đ-")
+    assert index.get_stats()["short_queries"] == 1
+    with pytest.raises(RuntimeError):
+        StudentNameIndex(database=FakeDatabase([])).search("nguyen")
@@ -0,0 +1,109 @@
+"""
+Benchmark overhead của instrumentation trong TimedCursor / TimedDictCursor
+
+Cursor giả (execute không gọi MySQL) để chỉ còn lại chi phí của wrapper:
+perf_counter x2, tra fingerprint (cache theo chuỗi SQL), cập nhật QueryStats.
+Chạy cả đơn luồng và nhiều luồng cùng ghi vào một QueryStats (lock tranh chấp).
+
+Chạy (trong thư mục shared/): python bench_query_stats.py [--queries 200000] [--threads 8]
+"""
+import argparse
+import threading
+import time
+
+from soa_common.db.cursors import QueryStats, _TimedMixin
+
+# Một số câu lệnh thật của controller (template có %s)
+STATEMENTS = [
+    "SELECT user_id, username, email_address, password, full_name, available_balance "
+    "FROM users WHERE username = %s LIMIT 1",
+    "SELECT * FROM students WHERE student_id = %s",
+    "SELECT available_balance, balance_version FROM users WHERE user_id = %s FOR UPDATE",
+    "UPDATE students SET is_payed = 1, version = version + 1 WHERE student_id = %s AND version = %s",
+    "INSERT INTO user_student_payment (user_id, student_id, amount, payment_date) VALUES (%s, %s, %s, %s)",
+]
+
+
+class NullConnection:
+    def __init__(self, stats):
+        self.query_stats = stats
+
+
+class NullCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 1
+
+    def execute(self, query, args=None):
+        return 1
+
+
+class InstrumentedNullCursor(_TimedMixin, NullCursor):
+    pass
+
+
+def run(cursor, queries: int) -> float:
+    statements = STATEMENTS
+    count = len(statements)
+    started = time.perf_counter()
+    for i in range(queries):
+        cursor.execute(statements[i % count], (i,))
+    return time.perf_counter() - started
+
+
+def run_threads(make_cursor, queries: int, threads: int) -> float:
+    per_thread = queries // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        cursor = make_cursor()
+        barrier.wait()
+        run(cursor, per_thread)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    # Wall time chia cho tổng số query (các luồng chạy xen kẽ dưới GIL)
+    return (time.perf_counter() - started) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query instrumentation overhead")
+    parser.add_argument("--queries", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"⏱️  QUERY INSTRUMENTATION OVERHEAD — {args.queries:,} queries")
+    print("=" * 80)
+
+    stats = QueryStats(slow_threshold=0.2)
+    connection = NullConnection(stats)
+
+    # Warm-up: điền cache fingerprint
+    run(InstrumentedNullCursor(connection), len(STATEMENTS))
+
+    bare = run(NullCursor(connection), args.queries) / args.queries
+    timed = run(InstrumentedNullCursor(connection), args.queries) / args.queries
+    print("\n   1 thread")
+    print(f"      bare cursor:          {bare * 1e6:8.3f} µs/query")
+    print(f"      instrumented cursor:  {timed * 1e6:8.3f} µs/query")
+    print(f"      overhead:             {(timed - bare) * 1e6:8.3f} µs/query")
+
+    bare_mt = run_threads(lambda: NullCursor(connection), args.queries, args.threads)
+    timed_mt = run_threads(lambda: InstrumentedNullCursor(connection), args.queries, args.threads)
+    print(f"\n   {args.threads} threads, one shared QueryStats (wall time / total queries)")
+    print(f"      bare cursor:          {bare_mt * 1e6:8.3f} µs/query")
+    print(f"      instrumented cursor:  {timed_mt * 1e6:8.3f} µs/query")
+    print(f"      overhead:             {(timed_mt - bare_mt) * 1e6:8.3f} µs/query")
+
+    print(f"\n   Top statements recorded: {len(stats.top())}  (queries: {stats.snapshot()['queries']:,})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
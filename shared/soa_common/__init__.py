@@ -0,0 +1,6 @@
+"""
+Thư viện dùng chung cho các service (Auth, Tuition, OTP).
+
+Các service chạy từ thư mục riêng của mình; app/config/database.py của mỗi
+service thêm thư mục shared/ vào sys.path trước khi import soa_common.
+"""
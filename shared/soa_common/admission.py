@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Phần của limit mà mỗi mức ưu tiên được dùng: khi quá tải, "low" bị từ chối
+# trước, "critical" (thanh toán) vẫn còn chỗ cho tới khi toàn bộ limit bị chiếm
+PRIORITY_SHARES: Dict[str, float] = {
+    "critical": 1.0,
+    "normal": 0.8,
+    "low": 0.5
+}
+
+
+class AdaptiveLimiter:
+    """
+    Giới hạn số request đang xử lý đồng thời, tự điều chỉnh theo AIMD:
+
+    - Request xong nhanh (latency <= target_latency) và pool không phải chờ
+      (EWMA thời gian checkout <= target_pool_wait) → limit += 1/limit
+      (tăng ~1 sau mỗi "vòng" limit request, chỉ khi limit đang được dùng tới).
+    - Request chậm hoặc pool phải chờ → limit *= backoff_ratio, tối đa một lần
+      mỗi cooldown để một loạt request chậm không kéo limit về min ngay lập tức.
+
+    Khi MySQL chậm lại, limit co lại và phần vượt quá bị từ chối sớm (503)
+    thay vì dồn vào threadpool rồi cùng timeout.
+    Chỉ dùng trong một event loop (middleware ASGI) nên không cần lock.
+    """
+
+    def __init__(
+        self,
+        name: str = "admission",
+        initial_limit: float = 20,
+        min_limit: float = 2,
+        max_limit: float = 200,
+        target_latency: float = 0.5,
+        target_pool_wait: float = 0.05,
+        backoff_ratio: float = 0.9,
+        cooldown: Optional[float] = None,
+        pool_wait: Optional[Callable[[], float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.target_latency = target_latency
+        self.target_pool_wait = target_pool_wait
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = target_latency if cooldown is None else cooldown
+        self._pool_wait = pool_wait or (lambda: 0.0)
+        self._clock = clock
+        self._last_decrease = float("-inf")
+
+        self.inflight = 0
+        self.inflight_by_priority: Dict[str, int] = {priority: 0 for priority in PRIORITY_SHARES}
+
+        # Metrics
+        self.admitted: Dict[str, int] = {priority: 0 for priority in PRIORITY_SHARES}
+        self.rejected: Dict[str, int] = {priority: 0 for priority in PRIORITY_SHARES}
+        self.increases = 0
+        self.decreases = 0
+        self.latency_ewma = 0.0
+        self.last_overload_reason: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, name: str, pool_wait: Optional[Callable[[], float]] = None) -> "AdaptiveLimiter":
+        """ADMISSION_* env → limiter (cùng tên biến ở mọi service)"""
+        return cls(
+            name=name,
+            initial_limit=float(os.getenv("ADMISSION_INITIAL_LIMIT", 20)),
+            min_limit=float(os.getenv("ADMISSION_MIN_LIMIT", 2)),
+            max_limit=float(os.getenv("ADMISSION_MAX_LIMIT", 200)),
+            target_latency=float(os.getenv("ADMISSION_TARGET_LATENCY_MS", 500)) / 1000,
+            target_pool_wait=float(os.getenv("ADMISSION_TARGET_POOL_WAIT_MS", 50)) / 1000,
+            backoff_ratio=float(os.getenv("ADMISSION_BACKOFF_RATIO", 0.9)),
+            pool_wait=pool_wait
+        )
+
+    def capacity(self, priority: str) -> float:
+        share = PRIORITY_SHARES.get(priority, PRIORITY_SHARES["normal"])
+        return max(1.0, self.limit * share)
+
+    def try_acquire(self, priority: str = "normal") -> bool:
+        priority = priority if priority in PRIORITY_SHARES else "normal"
+        if self.inflight >= self.capacity(priority):
+            self.rejected[priority] += 1
+            return False
+        self.inflight += 1
+        self.inflight_by_priority[priority] += 1
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, latency: float, priority: str = "normal", failed: bool = False):
+        """Gọi khi request được nhận xong; failed = lỗi 5xx (tính là tín hiệu quá tải)"""
+        priority = priority if priority in PRIORITY_SHARES else "normal"
+        in_flight_at_start = self.inflight
+        self.inflight -= 1
+        self.inflight_by_priority[priority] -= 1
+        self.latency_ewma = latency if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * latency
+
+        pool_wait = self._pool_wait()
+        if latency > self.target_latency:
+            reason = f"latency {latency * 1000:.0f}ms"
+        elif pool_wait > self.target_pool_wait:
+            reason = f"pool wait {pool_wait * 1000:.0f}ms"
+        elif failed:
+            reason = "server error"
+        else:
+            reason = None
+
+        if reason:
+            now = self._clock()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self.decreases += 1
+                self.last_overload_reason = reason
+        elif in_flight_at_start >= self.limit / 2:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.increases += 1
+
+    def retry_after(self) -> int:
+        """Gợi ý cho client (giây): khoảng một chu kỳ xử lý hiện tại"""
+        return max(1, math.ceil(self.latency_ewma * 2))
+
+    def get_stats(self) -> dict:
+        return {
+            "name": self.name,
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "capacity": {priority: round(self.capacity(priority), 2) for priority in PRIORITY_SHARES},
+            "inflight": self.inflight,
+            "inflight_by_priority": dict(self.inflight_by_priority),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 2),
+            "pool_wait_ms": round(self._pool_wait() * 1000, 2),
+            "target_latency_ms": self.target_latency * 1000,
+            "target_pool_wait_ms": self.target_pool_wait * 1000,
+            "last_overload_reason": self.last_overload_reason
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware đặt limiter trước các route dùng database.
+
+    routes: [(path prefix, priority)], prefix dài nhất khớp trước; path không
+    khớp (health, metrics, docs) đi thẳng, không bị giới hạn.
+    Bị từ chối → 503 + Retry-After, body theo format lỗi chung của các service.
+    """
+
+    def __init__(self, app, limiter: AdaptiveLimiter, routes: Iterable[Tuple[str, str]], enabled: bool = True):
+        self.app = app
+        self.limiter = limiter
+        self.routes = sorted(routes, key=lambda route: len(route[0]), reverse=True)
+        self.enabled = enabled
+
+    def priority_for(self, path: str) -> Optional[str]:
+        for prefix, priority in self.routes:
+            base = prefix.rstrip("/")
+            if path.rstrip("/") == base or path.startswith(base + "/"):
+                return priority
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.priority_for(scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire(priority):
+            await self._reject(send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.limiter.release(time.perf_counter() - started, priority, failed=status["code"] >= 500)
+
+    async def _reject(self, send):
+        body = json.dumps({
+            "success": False,
+            "statusCode": 503,
+            "message": "Service is overloaded, please retry shortly",
+            "error": "OVERLOADED"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(self.limiter.retry_after()).encode("ascii"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
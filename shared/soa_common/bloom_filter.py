@@ -0,0 +1,51 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Bloom filter đơn giản trên bytearray.
+
+    k vị trí bit được suy ra từ một digest blake2b 16 byte (double hashing:
+    h1 + i*h2), nên mỗi lần add/kiểm tra chỉ tốn một phép hash.
+    Không có false negative; false positive ≈ error_rate khi count <= capacity.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def estimated_false_positive_rate(self) -> float:
+        """Tỉ lệ false positive lý thuyết với số phần tử hiện tại"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def get_stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "size_bits": self.size,
+            "size_bytes": len(self._bits),
+            "hash_count": self.hash_count,
+            "target_false_positive_rate": self.error_rate,
+            "estimated_false_positive_rate": round(self.estimated_false_positive_rate(), 6)
+        }
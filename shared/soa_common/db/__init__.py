@@ -0,0 +1,35 @@
+from .config import DatabaseConfig
+from .cursors import QueryStats, TimedCursor, TimedDictCursor, normalize_sql
+from .pool import ConnectionPool, PoolTimeout
+from .retry import (
+    DEADLOCK,
+    LOCK_WAIT_TIMEOUT,
+    RetryPolicy,
+    RetryRule,
+    VersionConflict,
+    classify,
+    is_retryable,
+    retry_on_deadlock,
+    run_in_transaction
+)
+
+# AsyncDatabase (soa_common.db.aio) cần aiomysql → import trực tiếp từ module đó
+
+__all__ = [
+    "DatabaseConfig",
+    "QueryStats",
+    "TimedCursor",
+    "TimedDictCursor",
+    "normalize_sql",
+    "ConnectionPool",
+    "PoolTimeout",
+    "DEADLOCK",
+    "LOCK_WAIT_TIMEOUT",
+    "RetryPolicy",
+    "RetryRule",
+    "VersionConflict",
+    "classify",
+    "is_retryable",
+    "retry_on_deadlock",
+    "run_in_transaction"
+]
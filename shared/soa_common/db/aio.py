@@ -0,0 +1,182 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aiomysql
+
+from .config import DatabaseConfig
+from .cursors import LOCK_TIME_SQL, QueryStats
+
+
+class TimedAsyncDictCursor(aiomysql.DictCursor):
+    """aiomysql.DictCursor có đo thời gian execute (giống TimedDictCursor, stats gắn trên connection)"""
+
+    _template = None
+
+    async def execute(self, query, args=None):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await super().execute(query, args)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = getattr(self.connection, "query_stats", None)
+            if stats is not None:
+                template = self._template or query
+                rows = -1 if failed else self.rowcount
+                if stats.record(template, elapsed, rows, failed):
+                    lock_time = await self._last_lock_time(stats, failed) if stats.capture_lock_time else None
+                    stats.record_slow(template, elapsed, rows, failed, lock_time)
+
+    async def executemany(self, query, args):
+        self._template = query
+        try:
+            return await super().executemany(query, args)
+        finally:
+            self._template = None
+
+    async def _last_lock_time(self, stats: QueryStats, failed: bool) -> Optional[float]:
+        try:
+            cursor = await self.connection.cursor(aiomysql.Cursor)
+            try:
+                await cursor.execute(LOCK_TIME_SQL)
+                row = await cursor.fetchone()
+            finally:
+                await cursor.close()
+        except Exception as e:
+            if not failed:
+                stats.capture_lock_time = False
+                print(f"⚠️ Lock time unavailable, slow-query log continues without it: {e}")
+            return None
+        return row[0] / 1e12 if row and row[0] is not None else None
+
+
+class AsyncDatabase:
+    """
+    Async connection pool (aiomysql), cùng API context manager với ConnectionPool:
+
+        async with db.cursor() as cursor: ...
+        async with db.transaction() as cursor: ...
+
+    Mỗi request checkout một connection riêng từ pool.
+    """
+
+    def __init__(self, config: DatabaseConfig, name: str = "db"):
+        self.config = config
+        self.name = name
+        self.min_size = config.min_size
+        self.max_size = config.max_size
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+        self.query_stats = QueryStats(
+            slow_threshold=config.slow_query_ms / 1000 if config.slow_query_ms is not None else None,
+            capture_lock_time=config.slow_query_lock_time
+        )
+
+        # Metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def connect(self):
+        """Tạo pool (idempotent)"""
+        async with self._pool_lock:
+            if self.pool is not None:
+                return self.pool
+            kwargs = self.config.connect_kwargs()
+            kwargs["db"] = kwargs.pop("database")
+            # aiomysql không có read/write timeout riêng
+            kwargs.pop("read_timeout", None)
+            kwargs.pop("write_timeout", None)
+            try:
+                self.pool = await aiomysql.create_pool(
+                    minsize=self.min_size,
+                    maxsize=self.max_size,
+                    cursorclass=TimedAsyncDictCursor,
+                    pool_recycle=int(self.config.max_lifetime_seconds),
+                    **kwargs
+                )
+                print(f"✅ Database pool ready: {self.config.describe()} "
+                      f"(size {self.min_size}-{self.max_size})")
+            except Exception as e:
+                print(f"❌ Database connection failed: {e}")
+                raise
+        return self.pool
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Checkout một connection cho request hiện tại (chờ tối đa acquire_timeout)"""
+        pool = self.pool or await self.connect()
+        started = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(pool.acquire(), self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        connection.query_stats = self.query_stats
+        try:
+            yield connection
+        finally:
+            pool.release(connection)
+
+    @asynccontextmanager
+    async def cursor(self):
+        """Cursor trên connection riêng (autocommit)"""
+        async with self.acquire() as connection:
+            async with connection.cursor() as cursor:
+                yield cursor
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Cursor trong một transaction: commit khi thành công, rollback khi lỗi"""
+        async with self.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    yield cursor
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+
+    def status(self) -> dict:
+        """Trạng thái pool"""
+        metrics = {
+            "name": self.name,
+            "database": self.config.describe(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "avg": round(self.wait_seconds_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max": round(self.wait_seconds_max * 1000, 3)
+            },
+            "query_stats": self.query_stats.snapshot()
+        }
+        if self.pool is None:
+            return {"connected": False, "min_size": self.min_size, "max_size": self.max_size, **metrics}
+        return {
+            "connected": True,
+            "min_size": self.pool.minsize,
+            "max_size": self.pool.maxsize,
+            "size": self.pool.size,
+            "free": self.pool.freesize,
+            "in_use": self.pool.size - self.pool.freesize,
+            **metrics
+        }
+
+    async def close(self):
+        """Đóng pool"""
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            print("🔒 Database pool closed")
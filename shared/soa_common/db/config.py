@@ -0,0 +1,93 @@
+import os
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+def _optional_float(value: Optional[str], default: Optional[float]) -> Optional[float]:
+    """Chuỗi rỗng / "off" → None (tắt); không đặt → default"""
+    if value is None:
+        return default
+    if value.strip().lower() in ("", "off", "none"):
+        return None
+    return float(value)
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """
+    Cấu hình kết nối + pool, đọc từ cùng một bộ biến môi trường ở cả ba service.
+
+    Connection: DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+    Pool:       DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT_SECONDS,
+                DB_POOL_MAX_IDLE_SECONDS, DB_POOL_MAX_LIFETIME_SECONDS
+    Query log:  DB_SLOW_QUERY_MS, DB_SLOW_QUERY_LOCK_TIME
+    """
+
+    host: str = "localhost"
+    port: int = 3306
+    user: str = "root"
+    password: str = ""
+    database: str = "midterm_soa"
+    charset: str = "utf8mb4"
+    autocommit: bool = True
+    # None → giữ mặc định của server
+    isolation_level: Optional[str] = None
+    connect_timeout: int = 5
+    read_timeout: Optional[int] = None
+    write_timeout: Optional[int] = None
+
+    min_size: int = 1
+    max_size: int = 10
+    # Thời gian tối đa chờ một connection rảnh trước khi báo PoolTimeout
+    acquire_timeout: float = 5.0
+    # Connection rảnh lâu hơn → ping trước khi dùng lại
+    max_idle_seconds: float = 30.0
+    # Connection sống lâu hơn → đóng và tạo mới (tránh wait_timeout của server)
+    max_lifetime_seconds: float = 3600.0
+
+    # Query chậm hơn ngưỡng này (ms) → slow-query log; None → tắt
+    slow_query_ms: Optional[float] = 200.0
+    # Với query chậm: đọc LOCK_TIME từ performance_schema (thêm một round trip)
+    slow_query_lock_time: bool = True
+
+    @classmethod
+    def from_env(cls, **overrides) -> "DatabaseConfig":
+        """Đọc cấu hình từ env; overrides là các giá trị riêng của từng service"""
+        config = cls(
+            host=os.getenv("DB_HOST", cls.host),
+            port=int(os.getenv("DB_PORT", cls.port)),
+            user=os.getenv("DB_USER", cls.user),
+            password=os.getenv("DB_PASSWORD", cls.password),
+            database=os.getenv("DB_NAME", cls.database),
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", cls.min_size)),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", cls.max_size)),
+            acquire_timeout=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", cls.acquire_timeout)),
+            max_idle_seconds=float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", cls.max_idle_seconds)),
+            max_lifetime_seconds=float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", cls.max_lifetime_seconds)),
+            slow_query_ms=_optional_float(os.getenv("DB_SLOW_QUERY_MS"), cls.slow_query_ms),
+            slow_query_lock_time=os.getenv("DB_SLOW_QUERY_LOCK_TIME", "true").lower() == "true"
+        )
+        return replace(config, **overrides)
+
+    def connect_kwargs(self) -> dict:
+        """Tham số cho pymysql.connect / aiomysql.connect"""
+        kwargs = {
+            "host": self.host,
+            "port": self.port,
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+            "charset": self.charset,
+            "autocommit": self.autocommit,
+            "connect_timeout": self.connect_timeout
+        }
+        if self.read_timeout is not None:
+            kwargs["read_timeout"] = self.read_timeout
+        if self.write_timeout is not None:
+            kwargs["write_timeout"] = self.write_timeout
+        if self.isolation_level:
+            kwargs["init_command"] = f"SET SESSION TRANSACTION ISOLATION LEVEL {self.isolation_level}"
+        return kwargs
+
+    def describe(self) -> str:
+        return f"{self.database}@{self.host}:{self.port}"
@@ -0,0 +1,257 @@
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from pymysql.cursors import Cursor, DictCursor
+
+# Thời gian chờ lock của câu lệnh vừa chạy trên connection này (picosecond).
+# MySQL >= 8.0.28 tính cả thời gian chờ row lock (FOR UPDATE, UPDATE) vào LOCK_TIME.
+LOCK_TIME_SQL = (
+    "SELECT LOCK_TIME FROM performance_schema.events_statements_history "
+    "WHERE THREAD_ID = PS_CURRENT_THREAD_ID() ORDER BY EVENT_ID DESC LIMIT 1"
+)
+
+# Fingerprint: bỏ literal/placeholder để các lần chạy cùng một câu lệnh gộp về một dòng
+_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUE_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_SPACES = re.compile(r"\s+")
+
+# Câu lệnh trong code là template cố định → cache fingerprint theo chuỗi SQL.
+# Giới hạn để SQL sinh động (literal ghép trực tiếp) không làm cache phình ra.
+_FINGERPRINT_CACHE: Dict[str, str] = {}
+_FINGERPRINT_CACHE_SIZE = 2048
+
+
+def normalize_sql(query: str) -> str:
+    """
+    SQL → fingerprint:
+        SELECT * FROM students WHERE student_id IN (%s, %s, %s) AND year = 2025
+        → SELECT * FROM students WHERE student_id IN (?+) AND year = ?
+    """
+    text = _COMMENT.sub(" ", query)
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUE_LIST.sub("(?+)", text)
+    text = _VALUE_ROWS.sub("(?+)", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def fingerprint(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    cached = _FINGERPRINT_CACHE.get(query)
+    if cached is None:
+        cached = normalize_sql(query)
+        if len(_FINGERPRINT_CACHE) < _FINGERPRINT_CACHE_SIZE:
+            _FINGERPRINT_CACHE[query] = cached
+    return cached
+
+
+class _StatementStats:
+    __slots__ = ("calls", "errors", "total", "max", "rows", "slow", "lock_samples", "lock_total")
+
+    def __init__(self):
+        self.calls = self.errors = self.rows = self.slow = self.lock_samples = 0
+        self.total = self.max = self.lock_total = 0.0
+
+
+class QueryStats:
+    """
+    Thống kê query của một pool (mọi cursor lấy từ pool đó):
+    - tổng: số query, lỗi, thời gian
+    - theo fingerprint (SQL đã chuẩn hóa): số lần, thời gian, số dòng
+    - slow-query log: query chậm hơn slow_threshold được in ra và giữ lại
+      slow_log_size bản ghi gần nhất (kèm lock time nếu đọc được)
+    """
+
+    # Fingerprint thứ max_fingerprints trở đi gộp vào một dòng
+    OTHER = "(other)"
+
+    def __init__(
+        self,
+        slow_threshold: Optional[float] = None,
+        capture_lock_time: bool = True,
+        max_fingerprints: int = 500,
+        slow_log_size: int = 100
+    ):
+        self._lock = threading.Lock()
+        self.slow_threshold = slow_threshold
+        self.capture_lock_time = capture_lock_time
+        self.max_fingerprints = max_fingerprints
+        self._statements: Dict[str, _StatementStats] = {}
+        self._slow_log: Deque[dict] = deque(maxlen=slow_log_size)
+        self.queries = 0
+        self.errors = 0
+        self.slow_queries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, query, elapsed: float, rows: int = 0, failed: bool = False) -> bool:
+        """Ghi một lần execute; True nếu query chậm (caller sẽ gọi record_slow)"""
+        key = fingerprint(query)
+        slow = self.slow_threshold is not None and elapsed >= self.slow_threshold
+        with self._lock:
+            self.queries += 1
+            self.total_seconds += elapsed
+            if elapsed > self.max_seconds:
+                self.max_seconds = elapsed
+            statement = self._statements.get(key)
+            if statement is None:
+                if len(self._statements) >= self.max_fingerprints:
+                    key = self.OTHER
+                statement = self._statements.setdefault(key, _StatementStats())
+            statement.calls += 1
+            statement.total += elapsed
+            if elapsed > statement.max:
+                statement.max = elapsed
+            if failed:
+                self.errors += 1
+                statement.errors += 1
+            elif rows > 0:
+                statement.rows += rows
+            if slow:
+                self.slow_queries += 1
+                statement.slow += 1
+        return slow
+
+    def record_slow(self, query, elapsed: float, rows: int, failed: bool, lock_time: Optional[float] = None):
+        key = fingerprint(query)
+        entry = {
+            "at": time.time(),
+            "fingerprint": key,
+            "ms": round(elapsed * 1000, 3),
+            "rows": rows,
+            "failed": failed,
+            "lock_ms": round(lock_time * 1000, 3) if lock_time is not None else None
+        }
+        with self._lock:
+            self._slow_log.append(entry)
+            statement = self._statements.get(key)
+            if statement is not None and lock_time is not None:
+                statement.lock_samples += 1
+                statement.lock_total += lock_time
+        lock = f" lock={entry['lock_ms']}ms" if lock_time is not None else ""
+        print(f"🐢 Slow query {entry['ms']:.1f}ms rows={rows}{lock}: {key[:300]}")
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[dict]:
+        """Các câu lệnh tốn nhiều nhất theo total | avg | max | calls | rows | errors"""
+        with self._lock:
+            result = [
+                {
+                    "fingerprint": key,
+                    "calls": statement.calls,
+                    "errors": statement.errors,
+                    "rows": statement.rows,
+                    "rows_avg": round(statement.rows / statement.calls, 2),
+                    "total_ms": round(statement.total * 1000, 3),
+                    "avg_ms": round(statement.total * 1000 / statement.calls, 3),
+                    "max_ms": round(statement.max * 1000, 3),
+                    "slow": statement.slow,
+                    "lock_ms_avg": (round(statement.lock_total * 1000 / statement.lock_samples, 3)
+                                    if statement.lock_samples else None)
+                }
+                for key, statement in self._statements.items()
+            ]
+            total = self.total_seconds
+        for row in result:
+            row["share"] = round(row["total_ms"] / (total * 1000), 4) if total else 0.0
+        sort_key = {"total": "total_ms", "avg": "avg_ms", "max": "max_ms"}.get(order_by, order_by)
+        if result and sort_key not in result[0]:
+            sort_key = "total_ms"
+        result.sort(key=lambda row: row[sort_key], reverse=True)
+        return result[:limit]
+
+    def slow_log(self, limit: int = 50) -> List[dict]:
+        """Slow query gần nhất trước"""
+        with self._lock:
+            return list(self._slow_log)[::-1][:limit]
+
+    def reset(self):
+        with self._lock:
+            self.queries = self.errors = self.slow_queries = 0
+            self.total_seconds = self.max_seconds = 0.0
+            self._statements.clear()
+            self._slow_log.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "errors": self.errors,
+                "total_ms": round(self.total_seconds * 1000, 3),
+                "avg_ms": round(self.total_seconds * 1000 / self.queries, 3) if self.queries else 0.0,
+                "max_ms": round(self.max_seconds * 1000, 3),
+                "fingerprints": len(self._statements),
+                "slow_queries": self.slow_queries,
+                "slow_threshold_ms": self.slow_threshold * 1000 if self.slow_threshold is not None else None
+            }
+
+
+class _TimedMixin:
+    """
+    Đo thời gian mỗi lần execute (gồm cả round trip tới MySQL) và số dòng
+    (rowcount: số dòng trả về với SELECT, số dòng bị ảnh hưởng với UPDATE/INSERT).
+    executemany của pymysql gọi lại execute với SQL đã ghép giá trị → ghi theo
+    template gốc để cả batch dùng chung một fingerprint.
+    Stats lấy từ connection.query_stats (pool gắn vào khi tạo connection).
+    Query chậm: đọc thêm LOCK_TIME từ performance_schema (chỉ với query chậm).
+    """
+
+    _template = None
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = super().execute(query, args)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = getattr(self.connection, "query_stats", None)
+            if stats is not None:
+                template = self._template or query
+                rows = -1 if failed else self.rowcount
+                if stats.record(template, elapsed, rows, failed):
+                    lock_time = self._last_lock_time(stats, failed) if stats.capture_lock_time else None
+                    stats.record_slow(template, elapsed, rows, failed, lock_time)
+
+    def executemany(self, query, args):
+        self._template = query
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._template = None
+
+    def _last_lock_time(self, stats: QueryStats, failed: bool) -> Optional[float]:
+        # Cursor riêng: kết quả của query chính (đã buffer) vẫn còn cho caller fetch
+        try:
+            cursor = self.connection.cursor(Cursor)
+            try:
+                cursor.execute(LOCK_TIME_SQL)
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        except Exception as e:
+            # Connection vẫn tốt mà không đọc được (performance_schema tắt, không có
+            # quyền, MySQL < 8.0.16) → không thử lại nữa
+            if not failed:
+                stats.capture_lock_time = False
+                print(f"⚠️ Lock time unavailable, slow-query log continues without it: {e}")
+            return None
+        return row[0] / 1e12 if row and row[0] is not None else None
+
+
+class TimedCursor(_TimedMixin, Cursor):
+    pass
+
+
+class TimedDictCursor(_TimedMixin, DictCursor):
+    pass
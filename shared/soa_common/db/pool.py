@@ -0,0 +1,284 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import pymysql
+
+from .config import DatabaseConfig
+from .cursors import QueryStats, TimedCursor, TimedDictCursor
+
+
+class PoolTimeout(Exception):
+    """Không lấy được connection trong acquire_timeout (pool đã cạn)"""
+
+
+class ConnectionPool:
+    """
+    Pool pymysql có giới hạn, thread-safe, dùng chung cho các service sync.
+
+    - Tối đa max_size connection mở cùng lúc; request thứ max_size + 1 chờ
+      (Condition) tối đa acquire_timeout rồi nhận PoolTimeout.
+    - Connection rảnh được dùng lại theo LIFO (connection "nóng" nhất trước);
+      rảnh quá max_idle_seconds thì ping trước khi trả ra, quá
+      max_lifetime_seconds thì đóng và tạo mới.
+    - Trả connection về pool: connection không autocommit được rollback để
+      request sau không đọc snapshot cũ; lỗi khi reset → bỏ connection.
+
+    Dùng qua context manager thay cho try/finally/return_connection:
+
+        with db.cursor() as cursor:           # autocommit / đọc
+            cursor.execute(...)
+
+        with db.transaction() as cursor:      # BEGIN ... COMMIT, lỗi → ROLLBACK
+            cursor.execute(...)
+    """
+
+    def __init__(
+        self,
+        config: DatabaseConfig,
+        name: str = "db",
+        connect: Optional[Callable[[], object]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.config = config
+        self.name = name
+        self.max_size = config.max_size
+        self.acquire_timeout = config.acquire_timeout
+        self._connect = connect or self._default_connect
+        self._clock = clock
+        self._cond = threading.Condition()
+        # (connection, thời điểm trả về pool)
+        self._idle: Deque[Tuple[object, float]] = deque()
+        # id(connection) → thời điểm tạo
+        self._created: Dict[int, float] = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        self.query_stats = QueryStats(
+            slow_threshold=config.slow_query_ms / 1000 if config.slow_query_ms is not None else None,
+            capture_lock_time=config.slow_query_lock_time
+        )
+
+        # Metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.connect_errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.last_wait_seconds = 0.0
+        # Trung bình trượt thời gian chờ checkout (tín hiệu quá tải cho admission control)
+        self.wait_seconds_ewma = 0.0
+
+    def _default_connect(self):
+        return pymysql.connect(**self.config.connect_kwargs(), cursorclass=TimedCursor)
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+
+    def get_connection(self, timeout: Optional[float] = None):
+        """Checkout một connection; nhớ return_connection (hoặc dùng connection())"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = self._clock()
+        deadline = started + timeout
+
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                connection = self._open()
+                break
+            connection, returned_at = entry
+            if self._is_usable(connection, returned_at):
+                break
+            self._discard(connection)
+
+        waited = self._clock() - started
+        with self._cond:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.last_wait_seconds = waited
+            self.wait_seconds_ewma = 0.8 * self.wait_seconds_ewma + 0.2 * waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+        return connection
+
+    def _reserve(self, deadline: float):
+        """
+        Lấy một (connection, returned_at) rảnh, hoặc giữ chỗ để mở connection
+        mới (trả về None). Việc mở/ping connection làm ngoài lock.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout(f"Pool '{self.name}' is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"Pool '{self.name}' exhausted: {self._size}/{self.max_size} "
+                        f"connections in use after {self.acquire_timeout}s"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _open(self):
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self.connect_errors += 1
+                self._cond.notify()
+            raise
+        connection.query_stats = self.query_stats
+        with self._cond:
+            self._created[id(connection)] = self._clock()
+            self.connections_created += 1
+        return connection
+
+    def _is_usable(self, connection, returned_at: float) -> bool:
+        now = self._clock()
+        if now - self._created.get(id(connection), now) > self.config.max_lifetime_seconds:
+            return False
+        if now - returned_at > self.config.max_idle_seconds:
+            try:
+                connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, connection):
+        """Đóng connection và nhả chỗ của nó trong pool"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created.pop(id(connection), None)
+            self._size -= 1
+            self.connections_closed += 1
+            self._cond.notify()
+
+    def return_connection(self, connection, discard: bool = False):
+        """Trả connection về pool (reset transaction đang mở nếu có)"""
+        if connection is None:
+            return
+        if discard or self._closed or not getattr(connection, "open", True):
+            self._discard(connection)
+            return
+        try:
+            if not connection.get_autocommit():
+                connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        with self._cond:
+            self._idle.append((connection, self._clock()))
+            self._cond.notify()
+
+    # ------------------------------------------------------------------
+    # Context managers
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """Connection cho một request; lỗi → rollback, rollback lỗi → bỏ connection"""
+        connection = self.get_connection()
+        broken = False
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.return_connection(connection, discard=broken)
+
+    @contextmanager
+    def cursor(self, dict_cursor: bool = True):
+        """Cursor trên connection riêng (theo autocommit của config)"""
+        with self.connection() as connection:
+            cursor = connection.cursor(TimedDictCursor if dict_cursor else TimedCursor)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self, dict_cursor: bool = True):
+        """Cursor trong một transaction: commit khi thành công, rollback khi lỗi"""
+        with self.connection() as connection:
+            connection.begin()
+            cursor = connection.cursor(TimedDictCursor if dict_cursor else TimedCursor)
+            try:
+                yield cursor
+                connection.commit()
+            finally:
+                cursor.close()
+
+    # ------------------------------------------------------------------
+    # Lifecycle / metrics
+    # ------------------------------------------------------------------
+
+    def warm_up(self):
+        """Mở sẵn min_size connection (gọi trong startup event)"""
+        connections = [self.get_connection() for _ in range(min(self.config.min_size, self.max_size))]
+        for connection in connections:
+            self.return_connection(connection)
+
+    def close_idle(self) -> int:
+        """Đóng toàn bộ connection đang rảnh. Trả về số connection đã đóng."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, _ in idle:
+            self._discard(connection)
+        return len(idle)
+
+    def close(self):
+        """Đóng pool: connection rảnh đóng ngay, connection đang dùng đóng khi được trả về"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.close_idle()
+
+    def status(self) -> dict:
+        with self._cond:
+            checkouts = self.checkouts
+            return {
+                "name": self.name,
+                "database": self.config.describe(),
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "connect_errors": self.connect_errors,
+                "wait_ms": {
+                    "avg": round(self.wait_seconds_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                    "max": round(self.wait_seconds_max * 1000, 3),
+                    "last": round(self.last_wait_seconds * 1000, 3),
+                    "ewma": round(self.wait_seconds_ewma * 1000, 3)
+                },
+                "query_stats": self.query_stats.snapshot()
+            }
@@ -0,0 +1,220 @@
+import functools
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, TypeVar
+
+import pymysql
+
+T = TypeVar("T")
+
+# InnoDB chọn transaction này làm nạn nhân deadlock / chờ lock quá innodb_lock_wait_timeout
+DEADLOCK = 1213
+LOCK_WAIT_TIMEOUT = 1205
+RETRYABLE_ERRORS = {DEADLOCK, LOCK_WAIT_TIMEOUT}
+
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 0.02
+
+
+class VersionConflict(Exception):
+    """Optimistic lock thất bại (UPDATE ... WHERE version = %s không khớp dòng nào)"""
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    """Chính sách cho một loại lỗi: số lần chạy tối đa (kể cả lần đầu) và backoff"""
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+
+
+# Mặc định theo loại lỗi:
+# - deadlock: InnoDB đã rollback ngay, chạy lại gần như chắc chắn thành công
+# - lock_wait_timeout: mỗi lần đã tốn innodb_lock_wait_timeout → chỉ thử lại một lần
+# - version_conflict: dữ liệu vừa đổi, đọc lại là đủ
+DEFAULT_RULES: Dict[str, RetryRule] = {
+    "deadlock": RetryRule(max_attempts=5, base_delay=0.01, max_delay=0.2),
+    "lock_wait_timeout": RetryRule(max_attempts=2, base_delay=0.05, max_delay=0.2),
+    "version_conflict": RetryRule(max_attempts=3, base_delay=0.005, max_delay=0.05)
+}
+
+
+def classify(error: BaseException) -> Optional[str]:
+    """Tên loại lỗi có thể chạy lại, hoặc None"""
+    if isinstance(error, VersionConflict):
+        return "version_conflict"
+    if isinstance(error, pymysql.err.MySQLError) and error.args:
+        if error.args[0] == DEADLOCK:
+            return "deadlock"
+        if error.args[0] == LOCK_WAIT_TIMEOUT:
+            return "lock_wait_timeout"
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Lỗi MySQL mà chạy lại cả transaction từ đầu là an toàn"""
+    return (
+        isinstance(error, pymysql.err.MySQLError)
+        and bool(error.args)
+        and error.args[0] in RETRYABLE_ERRORS
+    )
+
+
+class RetryPolicy:
+    """
+    Chạy lại một unit of work (thường là cả transaction) khi gặp lỗi tranh chấp.
+
+    Mỗi loại lỗi có RetryRule riêng; backoff tăng theo cấp số nhân, có jitter
+    ("equal jitter": nửa cố định + nửa ngẫu nhiên) để các request vừa đụng nhau
+    không cùng thử lại một lúc. Lỗi không nằm trong rules được raise ngay.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rules: Optional[Dict[str, RetryRule]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random
+    ):
+        self.name = name
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self._sleep = sleep
+        self._rng = rng
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.calls = 0
+        self.succeeded_first_try = 0
+        self.succeeded_after_retry = 0
+        self.failed = 0
+        self.retries: Dict[str, int] = {kind: 0 for kind in self.rules}
+        self.exhausted: Dict[str, int] = {kind: 0 for kind in self.rules}
+        self.backoff_seconds_total = 0.0
+
+    def delay(self, rule: RetryRule, attempt: int) -> float:
+        """Thời gian chờ trước lần chạy thứ attempt + 1"""
+        cap = min(rule.max_delay, rule.base_delay * (2 ** (attempt - 1)))
+        return cap / 2 + self._rng() * cap / 2
+
+    def run(self, work: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            self.calls += 1
+        attempts: Dict[str, int] = {}
+        retried = False
+
+        while True:
+            try:
+                result = work(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                rule = self.rules.get(kind)
+                if rule is None:
+                    with self._lock:
+                        self.failed += 1
+                    raise
+
+                attempts[kind] = attempts.get(kind, 0) + 1
+                if attempts[kind] >= rule.max_attempts:
+                    with self._lock:
+                        self.exhausted[kind] += 1
+                        self.failed += 1
+                    raise
+
+                pause = self.delay(rule, attempts[kind])
+                with self._lock:
+                    self.retries[kind] += 1
+                    self.backoff_seconds_total += pause
+                retried = True
+                print(f"🔁 {self.name}: {kind}, retry {attempts[kind]}/{rule.max_attempts - 1} "
+                      f"in {pause * 1000:.0f}ms")
+                self._sleep(pause)
+                continue
+
+            with self._lock:
+                if retried:
+                    self.succeeded_after_retry += 1
+                else:
+                    self.succeeded_first_try += 1
+            return result
+
+    def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
+        """Dùng như decorator: @policy"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            return self.run(func, *args, **kwargs)
+        return wrapper
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "succeeded_first_try": self.succeeded_first_try,
+                "succeeded_after_retry": self.succeeded_after_retry,
+                "failed": self.failed,
+                "retries": dict(self.retries),
+                "exhausted": dict(self.exhausted),
+                "backoff_ms_total": round(self.backoff_seconds_total * 1000, 1),
+                "rules": {
+                    kind: {
+                        "max_attempts": rule.max_attempts,
+                        "base_delay_ms": rule.base_delay * 1000,
+                        "max_delay_ms": rule.max_delay * 1000
+                    }
+                    for kind, rule in self.rules.items()
+                }
+            }
+
+
+def retry_on_deadlock(
+    func: Callable[..., T] = None,
+    attempts: int = DEFAULT_ATTEMPTS,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    sleep: Callable[[float], None] = time.sleep
+):
+    """
+    Decorator: chạy lại func khi MySQL báo deadlock / lock wait timeout.
+    func phải tự mở transaction của nó (cả transaction được chạy lại).
+
+        @retry_on_deadlock(attempts=5)
+        def transfer(...):
+            with db.transaction() as cursor:
+                ...
+    """
+    rule = RetryRule(max_attempts=attempts, base_delay=backoff_seconds,
+                     max_delay=backoff_seconds * (2 ** attempts))
+
+    def decorator(inner: Callable[..., T]) -> Callable[..., T]:
+        policy = RetryPolicy(
+            inner.__name__,
+            rules={"deadlock": rule, "lock_wait_timeout": rule},
+            sleep=sleep
+        )
+        wrapper = policy(inner)
+        wrapper.retry_policy = policy
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def run_in_transaction(
+    pool,
+    work: Callable[..., T],
+    policy: Optional[RetryPolicy] = None,
+    dict_cursor: bool = True
+) -> T:
+    """
+    Chạy work(cursor) trong pool.transaction(); lỗi tranh chấp → rollback và
+    chạy lại toàn bộ work trên transaction mới theo policy.
+    work không được có side effect ngoài DB (nó có thể chạy nhiều lần).
+    """
+    def attempt() -> T:
+        with pool.transaction(dict_cursor=dict_cursor) as cursor:
+            return work(cursor)
+
+    policy = policy or RetryPolicy(getattr(work, "__name__", "transaction"))
+    return policy.run(attempt)
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(Exception):
+    """Hàng đợi của executor đã đầy (max_queue task đang chờ worker)"""
+
+    def __init__(self, name: str, queued: int):
+        super().__init__(f"Executor '{name}' is saturated ({queued} tasks queued)")
+        self.name = name
+        self.queued = queued
+
+
+class BlockingExecutor:
+    """
+    Thread pool có tên cho một loại việc blocking (database, hashing, render email).
+
+    - max_workers: số việc chạy song song (database: bằng DB_POOL_MAX_SIZE để
+      worker không phải chờ connection; hashing: số CPU).
+    - max_queue: số việc được chờ worker; vượt quá → ExecutorSaturated ngay,
+      không để hàng đợi dài vô hạn như threadpool mặc định của Starlette.
+    - Metrics: queue depth, việc đang chạy, thời gian chờ worker và thời gian chạy.
+
+    Dùng từ event loop: await executor.run(fn, ...)
+    Dùng từ thread khác (vd. controller đang chạy trong executor database cần
+    hash bcrypt): executor.call(fn, ...). Gọi call() từ chính worker của executor
+    này thì chạy luôn tại chỗ (tránh tự deadlock khi pool đã đầy).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int = 100,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-worker")
+
+        # Metrics
+        self.queued = 0
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.max_queued = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_seconds_ewma = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, default_workers: int, default_queue: int = 100) -> "BlockingExecutor":
+        """EXECUTOR_<NAME>_WORKERS / EXECUTOR_<NAME>_QUEUE"""
+        prefix = f"EXECUTOR_{name.upper()}"
+        return cls(
+            name=name,
+            max_workers=int(os.getenv(f"{prefix}_WORKERS", default_workers)),
+            max_queue=int(os.getenv(f"{prefix}_QUEUE", default_queue))
+        )
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        with self._lock:
+            if self.queued >= self.max_queue + max(0, self.max_workers - self.active):
+                self.rejected += 1
+                raise ExecutorSaturated(self.name, self.queued)
+            self.queued += 1
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        enqueued_at = self._clock()
+
+        def task():
+            started = self._clock()
+            waited = started - enqueued_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                self.wait_seconds_ewma = 0.8 * self.wait_seconds_ewma + 0.2 * waited
+            self._local.inside = True
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._local.inside = False
+                elapsed = self._clock() - started
+                with self._lock:
+                    self.active -= 1
+                    self.run_seconds_total += elapsed
+                    self.run_seconds_max = max(self.run_seconds_max, elapsed)
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        # Bị hủy khi còn trong hàng đợi (client ngắt kết nối) → task() không chạy
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Chạy fn trong executor và chờ kết quả (gọi từ thread, không phải event loop)"""
+        if getattr(self._local, "inside", False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Chạy fn trong executor mà không chặn event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.failed + self.active
+            finished = self.completed + self.failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "wait_ms": {
+                    "avg": round(self.wait_seconds_total / started * 1000, 3) if started else 0.0,
+                    "max": round(self.wait_seconds_max * 1000, 3),
+                    "ewma": round(self.wait_seconds_ewma * 1000, 3)
+                },
+                "run_ms": {
+                    "avg": round(self.run_seconds_total / finished * 1000, 3) if finished else 0.0,
+                    "max": round(self.run_seconds_max * 1000, 3)
+                }
+            }
+
+
+class ExecutorGroup:
+    """Các executor của một service theo tên subsystem"""
+
+    def __init__(self, *executors: BlockingExecutor):
+        self._executors: Dict[str, BlockingExecutor] = {executor.name: executor for executor in executors}
+
+    def __getitem__(self, name: str) -> BlockingExecutor:
+        return self._executors[name]
+
+    def get(self, name: str) -> Optional[BlockingExecutor]:
+        return self._executors.get(name)
+
+    def get_stats(self) -> dict:
+        return {name: executor.get_stats() for name, executor in self._executors.items()}
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
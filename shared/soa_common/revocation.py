@@ -0,0 +1,216 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .bloom_filter import BloomFilter
+from .executors import BlockingExecutor
+
+
+class RevocationList:
+    """
+    Bản sao cục bộ của bảng revoked_tokens dưới dạng Bloom filter.
+
+    - jti không có trong filter → chắc chắn chưa bị thu hồi (chỉ tốn một phép hash).
+    - jti có trong filter → hỏi bảng revoked_tokens (authoritative); nếu không có
+      thì đó là false positive và được ghi nhận vào metrics.
+
+    Đồng bộ: task nền poll các dòng mới theo id (mỗi sync_interval giây), rebuild
+    toàn bộ filter từ các token chưa hết hạn mỗi rebuild_interval giây để filter
+    không đầy dần. Truy vấn DB chạy trong executor database của service.
+
+    AUTO_INCREMENT không commit theo thứ tự id: một dòng id nhỏ có thể commit sau
+    dòng id lớn hơn đã được sync. Vì vậy mỗi lần sync đọc lại sync_overlap id cuối
+    (id > last_id - sync_overlap), và rebuild chốt MAX(id) trước rồi chỉ nạp
+    id <= max_id — dòng commit muộn nằm trong cửa sổ đọc lại của lần sync sau.
+    """
+
+    def __init__(self, database, executor: BlockingExecutor, capacity: int = 100000,
+                 error_rate: float = 0.001, sync_interval: float = 5.0, rebuild_interval: float = 3600.0,
+                 sync_overlap: int = 1000):
+        self.database = database
+        self.executor = executor
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.sync_overlap = sync_overlap
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        # jti đã xác nhận thu hồi → exp, tránh hỏi DB lại khi token bị dùng lặp lại
+        self._confirmed: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_rebuild = 0.0
+
+        # Metrics
+        self.checks = 0
+        self.filter_hits = 0
+        self.confirmed_revoked = 0
+        self.false_positives = 0
+        self.lookup_errors = 0
+        self.syncs = 0
+        self.sync_errors = 0
+        self.rebuilds = 0
+        self.last_sync_at: Optional[datetime] = None
+        self.last_sync_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, database, executor: BlockingExecutor) -> "RevocationList":
+        """REVOCATION_BLOOM_CAPACITY/ERROR_RATE, REVOCATION_SYNC/REBUILD_INTERVAL_SECONDS, REVOCATION_SYNC_OVERLAP_IDS"""
+        return cls(
+            database,
+            executor,
+            capacity=int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000)),
+            error_rate=float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001)),
+            sync_interval=float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", 5)),
+            rebuild_interval=float(os.getenv("REVOCATION_REBUILD_INTERVAL_SECONDS", 3600)),
+            sync_overlap=int(os.getenv("REVOCATION_SYNC_OVERLAP_IDS", 1000))
+        )
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Token cũ không có jti thì không thể thu hồi riêng lẻ"""
+        if not jti:
+            return False
+
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+
+        self.filter_hits += 1
+        if jti in self._confirmed:
+            return True
+
+        try:
+            revoked = self._lookup(jti)
+        except Exception as e:
+            # Không xác minh được → từ chối (fail closed)
+            self.lookup_errors += 1
+            print(f"⚠️ Revocation lookup failed for jti {jti[:8]}...: {e}")
+            return True
+
+        if revoked is None:
+            self.false_positives += 1
+            return False
+
+        self.confirmed_revoked += 1
+        with self._lock:
+            self._confirmed[jti] = revoked
+        return True
+
+    def add_local(self, jti: str, expires_at: float):
+        """Đưa jti vừa thu hồi vào filter ngay, không chờ lượt sync"""
+        with self._lock:
+            self._filter.add(jti)
+            self._confirmed[jti] = expires_at
+
+    def _lookup(self, jti: str) -> Optional[float]:
+        with self.database.cursor() as cursor:
+            cursor.execute("SELECT expires_at FROM revoked_tokens WHERE jti = %s", (jti,))
+            row = cursor.fetchone()
+        return row["expires_at"].timestamp() if row else None
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(self) -> int:
+        """Nạp các dòng revoked_tokens mới (id > last_id - sync_overlap) vào filter; trả về số jti mới"""
+        with self.database.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, jti FROM revoked_tokens WHERE id > %s ORDER BY id",
+                (max(0, self._last_id - self.sync_overlap),)
+            )
+            rows = cursor.fetchall()
+
+        added = 0
+        with self._lock:
+            for row in rows:
+                # Dòng trong cửa sổ đọc lại đã có trong filter → không add lại (giữ count đúng)
+                if row["jti"] not in self._filter:
+                    self._filter.add(row["jti"])
+                    added += 1
+                self._last_id = max(self._last_id, row["id"])
+        return added
+
+    def rebuild(self) -> int:
+        """Dựng lại filter từ các token chưa hết hạn (tự tăng dung lượng nếu cần)"""
+        with self.database.cursor() as cursor:
+            # Chốt max_id trước: dòng commit sau snapshot có id > max_id (lần sync sau nạp)
+            # hoặc id <= max_id nhưng commit muộn (cửa sổ sync_overlap nạp)
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM revoked_tokens")
+            max_id = cursor.fetchone()["max_id"]
+            cursor.execute(
+                "SELECT id, jti FROM revoked_tokens WHERE expires_at > %s AND id <= %s",
+                (datetime.now(), max_id)
+            )
+            rows = cursor.fetchall()
+
+        capacity = self.capacity
+        while len(rows) > capacity:
+            capacity *= 2
+
+        new_filter = BloomFilter(capacity, self.error_rate)
+        for row in rows:
+            new_filter.add(row["jti"])
+
+        now = time.time()
+        with self._lock:
+            self._filter = new_filter
+            self._last_id = max_id
+            self._confirmed = {jti: exp for jti, exp in self._confirmed.items() if exp > now}
+        self.rebuilds += 1
+        self._last_rebuild = now
+        return len(rows)
+
+    async def _loop(self):
+        while True:
+            try:
+                if time.time() - self._last_rebuild >= self.rebuild_interval:
+                    await self.executor.run(self.rebuild)
+                else:
+                    await self.executor.run(self.sync)
+                self.syncs += 1
+                self.last_sync_at = datetime.now()
+                self.last_sync_error = None
+            except Exception as e:
+                self.sync_errors += 1
+                self.last_sync_error = str(e)
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        """Khởi động task đồng bộ (gọi trong startup event)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            print(f"✅ Revocation list sync started: every {self.sync_interval}s, "
+                  f"rebuild every {self.rebuild_interval}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "filter": self._filter.get_stats(),
+            "last_synced_id": self._last_id,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "confirmed_revoked": self.confirmed_revoked,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": round(self.false_positives / self.checks, 6) if self.checks else 0.0,
+            "lookup_errors": self.lookup_errors,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "rebuilds": self.rebuilds,
+            "last_sync_at": self.last_sync_at.isoformat() if self.last_sync_at else None,
+            "last_sync_error": self.last_sync_error
+        }
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời cùng key thành một lần thực thi (request coalescing).
+
+    Caller đầu tiên của một key chạy fn() trong một task riêng; caller tới sau khi
+    task còn đang chạy chỉ await kết quả của task đó (cả kết quả lẫn exception).
+    Key được xóa ngay khi task xong, nên đây không phải cache: caller tới sau đó
+    chạy lần mới.
+
+    Caller bị hủy (client ngắt kết nối) không hủy task dùng chung; các caller khác
+    vẫn nhận kết quả. Chỉ dùng trong một event loop nên không cần lock.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+        # Metrics
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.forgotten = 0
+        self.max_waiters = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.executions += 1
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            self._waiters[key] = 1
+            flight.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        return await asyncio.shield(flight)
+
+    def forget(self, key: Hashable) -> bool:
+        """
+        Caller tới sau không gộp vào lần chạy đang dở của key nữa (dữ liệu vừa đổi,
+        kết quả của lần chạy đó có thể đã cũ). Caller đang chờ vẫn nhận kết quả đó.
+        """
+        if self._flights.pop(key, None) is None:
+            return False
+        self._waiters.pop(key, None)
+        self.forgotten += 1
+        return True
+
+    def _finish(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            del self._waiters[key]
+        if not flight.cancelled() and flight.exception() is not None:
+            # exception() đánh dấu lỗi đã được đọc (không cảnh báo khi mọi caller đã bị hủy)
+            self.errors += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "name": self.name,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            # Phần lời gọi không phải chạy lại (chỉ chờ lần chạy của caller khác)
+            "coalescing_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "max_waiters": self.max_waiters,
+            "errors": self.errors,
+            "forgotten": self.forgotten
+        }
@@ -0,0 +1,119 @@
+import asyncio
+
+from soa_common.admission import AdaptiveLimiter, AdmissionMiddleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(**overrides):
+    options = dict(initial_limit=10, min_limit=2, max_limit=20, target_latency=0.1,
+                   target_pool_wait=0.05, cooldown=1.0, clock=FakeClock())
+    options.update(overrides)
+    return AdaptiveLimiter(**options)
+
+
+def test_low_priority_is_shed_before_critical():
+    limiter = make_limiter()
+    for _ in range(5):
+        assert limiter.try_acquire("low")
+    assert not limiter.try_acquire("low")
+    for _ in range(3):
+        assert limiter.try_acquire("normal")
+    assert not limiter.try_acquire("normal")
+    assert limiter.try_acquire("critical")
+    assert limiter.try_acquire("critical")
+    assert not limiter.try_acquire("critical")
+    assert limiter.get_stats()["rejected"] == {"critical": 1, "normal": 1, "low": 1}
+
+
+def test_slow_requests_decrease_limit_once_per_cooldown():
+    clock = FakeClock()
+    limiter = make_limiter(clock=clock)
+    for _ in range(3):
+        limiter.try_acquire("normal")
+    limiter.release(0.5, "normal")
+    limiter.release(0.5, "normal")
+    assert limiter.limit == 9.0
+    clock.now = 2.0
+    limiter.release(0.5, "normal")
+    assert limiter.limit == 8.1
+    assert limiter.decreases == 2
+
+
+def test_pool_wait_is_an_overload_signal():
+    wait = {"seconds": 0.2}
+    limiter = make_limiter(pool_wait=lambda: wait["seconds"])
+    limiter.try_acquire("normal")
+    limiter.release(0.01, "normal")
+    assert limiter.limit < 10
+    assert "pool wait" in limiter.last_overload_reason
+
+
+def test_fast_requests_grow_limit_only_when_utilized():
+    limiter = make_limiter()
+    limiter.try_acquire("normal")
+    limiter.release(0.01, "normal")
+    assert limiter.limit == 10
+
+    for _ in range(6):
+        limiter.try_acquire("critical")
+    limiter.release(0.01, "critical")
+    assert limiter.limit == 10.1
+
+
+def test_limit_stays_within_bounds():
+    clock = FakeClock()
+    limiter = make_limiter(clock=clock)
+    for step in range(100):
+        clock.now = step * 2
+        limiter.try_acquire("critical")
+        limiter.release(1.0, "critical")
+    assert limiter.limit == 2
+
+
+def run_asgi(middleware, path):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path}
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_middleware_rejects_with_503_and_retry_after():
+    limiter = make_limiter(initial_limit=2)
+    middleware = AdmissionMiddleware(ok_app, limiter, [("/students", "low"), ("/payments/pay", "critical")])
+    limiter.try_acquire("critical")
+
+    rejected = run_asgi(middleware, "/students/unpaid")
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"1") in rejected[0]["headers"]
+
+    admitted = run_asgi(middleware, "/payments/pay")
+    assert admitted[0]["status"] == 200
+    assert limiter.inflight == 1
+
+
+def test_middleware_ignores_unlisted_paths():
+    limiter = make_limiter(initial_limit=1)
+    middleware = AdmissionMiddleware(ok_app, limiter, [("/students", "low")])
+    limiter.try_acquire("critical")
+    assert run_asgi(middleware, "/health")[0]["status"] == 200
+    assert middleware.priority_for("/students/") == "low"
+    assert middleware.priority_for("/studentsX") is None
@@ -0,0 +1,28 @@
+from soa_common.bloom_filter import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_stays_near_target_at_capacity():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"revoked-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    stats = bloom.get_stats()
+    assert stats["count"] == 5000
+    assert stats["size_bytes"] == (stats["size_bits"] + 7) // 8
+    assert 0 < stats["estimated_false_positive_rate"] < 0.02
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(capacity=10)
+    assert "anything" not in bloom
+    assert bloom.estimated_false_positive_rate() == 0.0
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from soa_common.executors import BlockingExecutor, ExecutorGroup, ExecutorSaturated
+
+
+def test_run_returns_result_and_records_metrics():
+    executor = BlockingExecutor("database", max_workers=2, max_queue=4)
+    try:
+        result = asyncio.run(executor.run(lambda a, b: a + b, 2, b=3))
+        assert result == 5
+        stats = executor.get_stats()
+        assert stats["submitted"] == 1
+        assert stats["completed"] == 1
+        assert stats["queued"] == 0
+        assert stats["active"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_failure_is_raised_and_counted():
+    executor = BlockingExecutor("database", max_workers=1)
+
+    def boom():
+        raise ValueError("boom")
+
+    try:
+        with pytest.raises(ValueError):
+            executor.call(boom)
+        assert executor.get_stats()["failed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_queue_limit_rejects_when_workers_and_queue_are_full():
+    executor = BlockingExecutor("hashing", max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = threading.Event()
+
+    def block():
+        running.set()
+        release.wait(5)
+
+    try:
+        first = executor.submit(block)
+        assert running.wait(5)
+        second = executor.submit(block)
+        assert executor.get_stats()["queued"] == 1
+        with pytest.raises(ExecutorSaturated):
+            executor.submit(block)
+        release.set()
+        first.result(5)
+        second.result(5)
+        stats = executor.get_stats()
+        assert stats["rejected"] == 1
+        assert stats["max_queued"] == 1
+        assert stats["completed"] == 2
+        assert stats["wait_ms"]["max"] > 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_call_from_own_worker_runs_inline():
+    executor = BlockingExecutor("database", max_workers=1, max_queue=0)
+    try:
+        outer = executor.call(lambda: executor.call(lambda: threading.current_thread().name))
+        assert outer.startswith("database-worker")
+        assert executor.get_stats()["submitted"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_queued_task_leaves_queue():
+    executor = BlockingExecutor("email", max_workers=1, max_queue=2)
+    release = threading.Event()
+    try:
+        executor.submit(release.wait, 5)
+        queued = executor.submit(lambda: None)
+        assert queued.cancel()
+        stats = executor.get_stats()
+        assert stats["queued"] == 0
+        assert stats["cancelled"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_from_env_and_group(monkeypatch):
+    monkeypatch.setenv("EXECUTOR_HASHING_WORKERS", "3")
+    monkeypatch.setenv("EXECUTOR_HASHING_QUEUE", "7")
+    hashing = BlockingExecutor.from_env("hashing", default_workers=1)
+    database = BlockingExecutor.from_env("database", default_workers=4, default_queue=10)
+    group = ExecutorGroup(database, hashing)
+    try:
+        assert group["hashing"].max_workers == 3
+        assert group["hashing"].max_queue == 7
+        assert group["database"].max_workers == 4
+        assert set(group.get_stats()) == {"database", "hashing"}
+        assert group.get("email") is None
+    finally:
+        group.shutdown()
@@ -0,0 +1,200 @@
+import threading
+
+import pytest
+
+from soa_common.db import ConnectionPool, DatabaseConfig, PoolTimeout
+
+
+class FakeConnection:
+    """Connection giả: chỉ ghi lại các lệnh pool gọi tới (không cần MySQL)"""
+
+    def __init__(self, autocommit=True):
+        self.open = True
+        self.autocommit = autocommit
+        self.calls = []
+        self.fail_ping = False
+        self.fail_rollback = False
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def ping(self, reconnect=False):
+        self.calls.append("ping")
+        if self.fail_ping:
+            raise ConnectionError("gone away")
+
+    def begin(self):
+        self.calls.append("begin")
+
+    def commit(self):
+        self.calls.append("commit")
+
+    def rollback(self):
+        self.calls.append("rollback")
+        if self.fail_rollback:
+            raise ConnectionError("lost")
+
+    def cursor(self, cursorclass=None):
+        return FakeCursor()
+
+    def close(self):
+        self.open = False
+
+
+class FakeCursor:
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(max_size=2, autocommit=True, acquire_timeout=0.05, clock=None, **overrides):
+    created = []
+
+    def connect():
+        connection = FakeConnection(autocommit)
+        created.append(connection)
+        return connection
+
+    config = DatabaseConfig(max_size=max_size, acquire_timeout=acquire_timeout, **overrides)
+    kwargs = {"clock": clock} if clock else {}
+    return ConnectionPool(config, name="test", connect=connect, **kwargs), created
+
+
+def test_reuses_returned_connection():
+    pool, created = make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.status()["checkouts"] == 2
+
+
+def test_bounded_size_times_out():
+    pool, created = make_pool(max_size=2)
+    a = pool.get_connection()
+    b = pool.get_connection()
+    with pytest.raises(PoolTimeout):
+        pool.get_connection()
+    assert len(created) == 2
+    assert pool.status()["timeouts"] == 1
+    pool.return_connection(a)
+    pool.return_connection(b)
+
+
+def test_waiter_gets_connection_when_returned():
+    pool, created = make_pool(max_size=1, acquire_timeout=2)
+    held = pool.get_connection()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.get_connection()))
+    waiter.start()
+    threading.Timer(0.05, pool.return_connection, args=(held,)).start()
+    waiter.join(3)
+    assert got == [held]
+    assert len(created) == 1
+    assert pool.status()["wait_ms"]["max"] > 0
+
+
+def test_non_autocommit_connection_is_reset_on_return():
+    pool, _ = make_pool(autocommit=False)
+    with pool.connection() as connection:
+        pass
+    assert connection.calls == ["rollback"]
+
+
+def test_transaction_commits_or_rolls_back():
+    pool, _ = make_pool()
+    with pool.transaction():
+        pass
+    connection = pool.get_connection()
+    assert connection.calls == ["begin", "commit"]
+    pool.return_connection(connection)
+
+    with pytest.raises(ValueError):
+        with pool.transaction():
+            raise ValueError("boom")
+    assert connection.calls[-2:] == ["begin", "rollback"]
+
+
+def test_broken_connection_is_discarded():
+    pool, created = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as connection:
+            connection.fail_rollback = True
+            raise ValueError("boom")
+    assert not connection.open
+    assert pool.status()["size"] == 0
+
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not connection
+    assert len(created) == 2
+
+
+def test_idle_connection_is_pinged_and_replaced_if_dead():
+    clock = FakeClock()
+    pool, created = make_pool(clock=clock, max_idle_seconds=10)
+    with pool.connection() as connection:
+        pass
+
+    clock.now = 5
+    with pool.connection():
+        pass
+    assert "ping" not in connection.calls
+
+    clock.now = 20
+    connection.fail_ping = True
+    with pool.connection() as replacement:
+        pass
+    assert "ping" in connection.calls
+    assert replacement is not connection
+    assert pool.status()["connections_closed"] == 1
+
+
+def test_connection_past_max_lifetime_is_recycled():
+    clock = FakeClock()
+    pool, created = make_pool(clock=clock, max_lifetime_seconds=100, max_idle_seconds=1000)
+    with pool.connection() as connection:
+        pass
+    clock.now = 101
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not connection
+    assert len(created) == 2
+
+
+def test_connect_error_releases_slot():
+    config = DatabaseConfig(max_size=1, acquire_timeout=0.05)
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("refused")
+        return FakeConnection()
+
+    pool = ConnectionPool(config, connect=connect)
+    with pytest.raises(ConnectionError):
+        pool.get_connection()
+    connection = pool.get_connection()
+    assert connection.open
+    assert pool.status()["connect_errors"] == 1
+
+
+def test_close_rejects_new_checkouts():
+    pool, _ = make_pool()
+    held = pool.get_connection()
+    pool.close()
+    with pytest.raises(PoolTimeout):
+        pool.get_connection()
+    pool.return_connection(held)
+    assert not held.open
+    assert pool.status()["size"] == 0
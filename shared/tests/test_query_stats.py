@@ -0,0 +1,130 @@
+from soa_common.db.cursors import QueryStats, _TimedMixin, normalize_sql
+
+
+def test_normalize_sql_collapses_literals_and_lists():
+    assert normalize_sql(
+        "SELECT *  FROM students\n WHERE student_id IN (%s, %s, %s) AND year = 2025 AND name = 'An'"
+    ) == "SELECT * FROM students WHERE student_id IN (?+) AND year = ? AND name = ?"
+    assert normalize_sql(
+        "INSERT INTO t (a, b) VALUES ('x', 1), ('y', 2) /* batch */"
+    ) == "INSERT INTO t (a, b) VALUES (?+)"
+    assert normalize_sql("SELECT %(id)s -- comment") == "SELECT ?"
+
+
+def test_record_groups_by_fingerprint_and_orders_top():
+    stats = QueryStats()
+    stats.record("SELECT * FROM users WHERE user_id = %s", 0.002, rows=1)
+    stats.record("SELECT *   FROM users WHERE user_id = %s", 0.004, rows=1)
+    stats.record("UPDATE students SET is_payed = 1 WHERE student_id = %s", 0.010, rows=1)
+    stats.record("UPDATE students SET is_payed = 1 WHERE student_id = %s", 0.001, failed=True)
+
+    top = stats.top(limit=5)
+    assert [row["fingerprint"] for row in top] == [
+        "UPDATE students SET is_payed = ? WHERE student_id = ?",
+        "SELECT * FROM users WHERE user_id = ?"
+    ]
+    assert top[0]["errors"] == 1
+    assert top[1]["calls"] == 2
+    assert top[1]["rows"] == 2
+    assert top[1]["avg_ms"] == 3.0
+    assert stats.top(limit=1, order_by="calls")[0]["calls"] == 2
+    assert stats.snapshot()["fingerprints"] == 2
+
+
+def test_fingerprints_beyond_limit_go_to_other():
+    stats = QueryStats(max_fingerprints=2)
+    for table in ("a", "b", "c", "d"):
+        stats.record(f"SELECT * FROM {table}", 0.001)
+    assert {row["fingerprint"] for row in stats.top()} == {"SELECT * FROM a", "SELECT * FROM b", QueryStats.OTHER}
+
+
+class FakeLockCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, args=None):
+        self.connection.executed.append(query)
+        if self.connection.lock_error:
+            raise RuntimeError("performance_schema disabled")
+
+    def fetchone(self):
+        return (self.connection.lock_time_ps,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, stats, lock_time_ps=0, lock_error=False):
+        self.query_stats = stats
+        self.lock_time_ps = lock_time_ps
+        self.lock_error = lock_error
+        self.executed = []
+
+    def cursor(self, cursorclass=None):
+        return FakeLockCursor(self)
+
+
+class FakeBaseCursor:
+    """Thay cho pymysql Cursor: execute không cần server"""
+
+    def __init__(self, connection, rowcount=1):
+        self.connection = connection
+        self.rowcount = rowcount
+
+    def execute(self, query, args=None):
+        self.connection.executed.append(query)
+        return self.rowcount
+
+    def executemany(self, query, args):
+        for arg in args:
+            self.execute(query.replace("%s", repr(arg)))
+        return len(args)
+
+
+class InstrumentedCursor(_TimedMixin, FakeBaseCursor):
+    pass
+
+
+def test_executemany_is_recorded_under_template_fingerprint():
+    stats = QueryStats()
+    cursor = InstrumentedCursor(FakeConnection(stats))
+    cursor.executemany("INSERT INTO t VALUES (%s)", [1, 2, 3])
+    top = stats.top()
+    assert len(top) == 1
+    assert top[0]["fingerprint"] == "INSERT INTO t VALUES (?+)"
+    assert top[0]["calls"] == 3
+
+
+def test_slow_query_is_logged_with_lock_time(capsys):
+    stats = QueryStats(slow_threshold=0.0)
+    connection = FakeConnection(stats, lock_time_ps=1_500_000_000)
+    cursor = InstrumentedCursor(connection, rowcount=4)
+    cursor.execute("SELECT * FROM students WHERE is_payed = %s", (0,))
+
+    entry = stats.slow_log()[0]
+    assert entry["fingerprint"] == "SELECT * FROM students WHERE is_payed = ?"
+    assert entry["rows"] == 4
+    assert entry["lock_ms"] == 1.5
+    assert stats.top()[0]["lock_ms_avg"] == 1.5
+    assert "Slow query" in capsys.readouterr().out
+
+
+def test_lock_time_lookup_is_disabled_after_error():
+    stats = QueryStats(slow_threshold=0.0)
+    connection = FakeConnection(stats, lock_error=True)
+    cursor = InstrumentedCursor(connection)
+    cursor.execute("SELECT 1")
+    cursor.execute("SELECT 1")
+    assert stats.capture_lock_time is False
+    assert stats.slow_log()[0]["lock_ms"] is None
+    # Chỉ thử đọc performance_schema một lần
+    assert sum("performance_schema" in query for query in connection.executed) == 1
+
+
+def test_fast_queries_skip_slow_log():
+    stats = QueryStats(slow_threshold=10.0)
+    connection = FakeConnection(stats)
+    InstrumentedCursor(connection).execute("SELECT 1")
+    assert stats.slow_log() == []
+    assert connection.executed == ["SELECT 1"]
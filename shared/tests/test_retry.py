@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+
+import pymysql
+import pytest
+
+from soa_common.db import (
+    DEADLOCK,
+    LOCK_WAIT_TIMEOUT,
+    RetryPolicy,
+    RetryRule,
+    VersionConflict,
+    is_retryable,
+    retry_on_deadlock,
+    run_in_transaction
+)
+
+
+def mysql_error(code):
+    return pymysql.err.OperationalError(code, "simulated")
+
+
+def test_is_retryable():
+    assert is_retryable(mysql_error(DEADLOCK))
+    assert is_retryable(mysql_error(LOCK_WAIT_TIMEOUT))
+    assert not is_retryable(pymysql.err.IntegrityError(1062, "Duplicate entry"))
+    assert not is_retryable(ValueError("x"))
+
+
+def test_retries_deadlock_then_succeeds():
+    calls = []
+    sleeps = []
+
+    @retry_on_deadlock(attempts=3, sleep=sleeps.append)
+    def work():
+        calls.append(1)
+        if len(calls) < 3:
+            raise mysql_error(DEADLOCK)
+        return "ok"
+
+    assert work() == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert sleeps[1] > sleeps[0] * 0.5
+
+
+def test_gives_up_after_attempts():
+    calls = []
+
+    @retry_on_deadlock(attempts=2, sleep=lambda _: None)
+    def work():
+        calls.append(1)
+        raise mysql_error(LOCK_WAIT_TIMEOUT)
+
+    with pytest.raises(pymysql.err.OperationalError):
+        work()
+    assert len(calls) == 2
+
+
+def test_non_retryable_error_is_not_retried():
+    calls = []
+
+    @retry_on_deadlock(attempts=5, sleep=lambda _: None)
+    def work():
+        calls.append(1)
+        raise pymysql.err.IntegrityError(1062, "Duplicate entry")
+
+    with pytest.raises(pymysql.err.IntegrityError):
+        work()
+    assert len(calls) == 1
+
+
+def test_policy_applies_per_class_limits():
+    policy = RetryPolicy("test", rules={
+        "deadlock": RetryRule(max_attempts=4, base_delay=0.01, max_delay=0.1),
+        "version_conflict": RetryRule(max_attempts=2, base_delay=0.01, max_delay=0.1)
+    }, sleep=lambda _: None)
+    errors = [mysql_error(DEADLOCK), mysql_error(DEADLOCK), VersionConflict(), VersionConflict()]
+
+    def work():
+        raise errors.pop(0)
+
+    with pytest.raises(VersionConflict):
+        policy.run(work)
+    stats = policy.get_stats()
+    assert stats["retries"] == {"deadlock": 2, "version_conflict": 1}
+    assert stats["exhausted"] == {"deadlock": 0, "version_conflict": 1}
+    assert stats["failed"] == 1
+
+
+def test_policy_does_not_retry_unknown_class():
+    policy = RetryPolicy("test", rules={
+        "version_conflict": RetryRule(max_attempts=3, base_delay=0.01, max_delay=0.1)
+    }, sleep=lambda _: None)
+    calls = []
+
+    def work():
+        calls.append(1)
+        raise mysql_error(DEADLOCK)
+
+    with pytest.raises(pymysql.err.OperationalError):
+        policy.run(work)
+    assert len(calls) == 1
+
+
+def test_backoff_is_exponential_capped_and_jittered():
+    rule = RetryRule(max_attempts=10, base_delay=0.01, max_delay=0.05)
+    low = RetryPolicy("test", rng=lambda: 0.0)
+    high = RetryPolicy("test", rng=lambda: 1.0)
+    assert low.delay(rule, 1) == pytest.approx(0.005)
+    assert high.delay(rule, 1) == pytest.approx(0.01)
+    assert high.delay(rule, 2) == pytest.approx(0.02)
+    assert high.delay(rule, 10) == pytest.approx(0.05)
+    assert low.delay(rule, 10) == pytest.approx(0.025)
+
+
+def test_run_in_transaction_retries_whole_transaction():
+    transactions = []
+
+    class Pool:
+        @contextmanager
+        def transaction(self, dict_cursor=True):
+            transactions.append("begin")
+            yield "cursor"
+            transactions.append("commit")
+
+    outcomes = [VersionConflict(), "paid"]
+
+    def work(cursor):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    policy = RetryPolicy("pay", sleep=lambda _: None)
+    assert run_in_transaction(Pool(), work, policy=policy) == "paid"
+    assert transactions == ["begin", "begin", "commit"]
+    assert policy.get_stats()["succeeded_after_retry"] == 1
@@ -0,0 +1,182 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from soa_common.executors import BlockingExecutor
+from soa_common.revocation import RevocationList
+
+
+class FakeCursor:
+    """Đủ cho các query của RevocationList trên bảng revoked_tokens giả"""
+
+    def __init__(self, database):
+        self.database = database
+        self._result = []
+
+    def execute(self, sql, args=()):
+        self.database.queries.append(sql)
+        if self.database.fail:
+            raise RuntimeError("database down")
+        rows = self.database.rows
+        if "WHERE jti = %s" in sql:
+            self._result = [{"expires_at": row["expires_at"]} for row in rows if row["jti"] == args[0]]
+        elif "WHERE id > %s" in sql:
+            self._result = [row for row in rows if row["id"] > args[0]]
+        elif "WHERE expires_at > %s AND id <= %s" in sql:
+            self._result = [row for row in rows if row["expires_at"] > args[0] and row["id"] <= args[1]]
+        elif "MAX(id)" in sql:
+            self._result = [{"max_id": max((row["id"] for row in rows), default=0)}]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return list(self._result)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = []
+        self.queries = []
+        self.fail = False
+
+    def revoke(self, jti, expires_at=None, row_id=None):
+        self.rows.append({
+            "id": row_id or len(self.rows) + 1,
+            "jti": jti,
+            "expires_at": expires_at or datetime.now() + timedelta(minutes=15)
+        })
+
+    @contextmanager
+    def cursor(self):
+        yield FakeCursor(self)
+
+
+def make_revocation_list(database, **kwargs):
+    return RevocationList(database, BlockingExecutor("database", max_workers=1), **kwargs)
+
+
+def test_unknown_jti_is_answered_by_the_filter_without_a_query():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database)
+    assert revocations.is_revoked("never-revoked") is False
+    assert revocations.is_revoked(None) is False
+    assert database.queries == []
+
+
+def test_sync_picks_up_new_rows_and_confirms_them_once():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database)
+    database.revoke("a")
+    database.revoke("b")
+    assert revocations.sync() == 2
+    assert revocations.sync() == 0
+
+    assert revocations.is_revoked("a") is True
+    lookups = len(database.queries)
+    assert revocations.is_revoked("a") is True
+    assert len(database.queries) == lookups
+    stats = revocations.get_stats()
+    assert stats["last_synced_id"] == 2
+    assert stats["confirmed_revoked"] == 1
+
+
+def test_sync_rereads_recent_ids_committed_out_of_order():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database, sync_overlap=10)
+    database.revoke("first")
+    database.revoke("third", row_id=3)
+    assert revocations.sync() == 2
+
+    # id 2 được cấp trước id 3 nhưng commit sau khi đã sync tới id 3
+    database.revoke("second", row_id=2)
+    assert revocations.sync() == 1
+    assert revocations.is_revoked("second") is True
+    stats = revocations.get_stats()
+    assert stats["last_synced_id"] == 3
+    assert stats["filter"]["count"] == 3
+
+
+def test_rebuild_reads_max_id_before_the_snapshot(monkeypatch):
+    database = FakeDatabase()
+    revocations = make_revocation_list(database, sync_overlap=0)
+    database.revoke("a")
+    original_execute = FakeCursor.execute
+
+    def execute(self, sql, args=()):
+        original_execute(self, sql, args)
+        # Revoke commit giữa câu MAX(id) và snapshot
+        if "MAX(id)" in sql and not any(row["jti"] == "late" for row in database.rows):
+            database.revoke("late")
+
+    monkeypatch.setattr(FakeCursor, "execute", execute)
+    assert revocations.rebuild() == 1
+    monkeypatch.undo()
+    assert revocations.get_stats()["last_synced_id"] == 1
+    assert revocations.sync() == 1
+    assert revocations.is_revoked("late") is True
+
+
+def test_lookup_failure_fails_closed():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database)
+    revocations.add_local("a", 0)
+    revocations._confirmed.clear()
+    database.fail = True
+    assert revocations.is_revoked("a") is True
+    assert revocations.get_stats()["lookup_errors"] == 1
+
+
+def test_filter_hit_without_row_is_a_false_positive():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database)
+    revocations.add_local("ghost", 0)
+    revocations._confirmed.clear()
+    assert revocations.is_revoked("ghost") is False
+    assert revocations.get_stats()["false_positives"] == 1
+
+
+def test_rebuild_drops_expired_tokens_and_grows_capacity():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database, capacity=2)
+    database.revoke("expired", datetime.now() - timedelta(minutes=1))
+    for i in range(5):
+        database.revoke(f"live-{i}")
+
+    assert revocations.rebuild() == 5
+    stats = revocations.get_stats()
+    assert stats["filter"]["capacity"] == 8
+    assert stats["last_synced_id"] == 6
+    assert revocations.is_revoked("live-3") is True
+
+
+def test_background_loop_syncs_through_the_executor():
+    database = FakeDatabase()
+    revocations = make_revocation_list(database, sync_interval=0.01, rebuild_interval=3600)
+    database.revoke("a")
+
+    async def main():
+        revocations.start()
+        await asyncio.sleep(0.05)
+        await revocations.stop()
+
+    asyncio.run(main())
+    stats = revocations.get_stats()
+    assert stats["running"] is False
+    assert stats["rebuilds"] == 1
+    assert stats["syncs"] >= 2
+    assert revocations.is_revoked("a") is True
+    revocations.executor.shutdown()
+
+
+def test_from_env_reads_revocation_settings(monkeypatch):
+    monkeypatch.setenv("REVOCATION_BLOOM_CAPACITY", "500")
+    monkeypatch.setenv("REVOCATION_SYNC_INTERVAL_SECONDS", "2")
+    executor = BlockingExecutor("database", max_workers=1)
+    try:
+        revocations = RevocationList.from_env(FakeDatabase(), executor)
+        assert revocations.capacity == 500
+        assert revocations.sync_interval == 2.0
+        assert revocations.rebuild_interval == 3600.0
+    finally:
+        executor.shutdown()
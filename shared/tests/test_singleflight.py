@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from soa_common.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("students")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"student_id": "ST1"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("ST1", fetch) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result == {"student_id": "ST1"} for result in results)
+    stats = flight.get_stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["coalescing_ratio"] == 0.9
+    assert stats["max_waiters"] == 10
+    assert stats["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    async def main():
+        await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+        await flight.do("a", lambda: fetch("a"))
+
+    asyncio.run(main())
+    assert calls == ["a", "b", "a"]
+    assert flight.get_stats()["coalesced"] == 0
+
+
+def test_exception_is_shared_by_all_waiters():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise LookupError("missing")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("x", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, LookupError) for result in results)
+    assert flight.get_stats()["errors"] == 1
+    assert flight.get_stats()["executions"] == 1
+
+
+def test_cancelled_caller_does_not_cancel_shared_flight():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == 42
+
+
+def test_forget_starts_a_new_execution_for_later_callers():
+    flight = SingleFlight()
+    versions = iter([1, 2])
+
+    async def fetch():
+        version = next(versions)
+        await asyncio.sleep(0.01)
+        return version
+
+    async def main():
+        before = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        assert flight.forget("k")
+        after = await flight.do("k", fetch)
+        return await before, after
+
+    assert asyncio.run(main()) == (1, 2)
+    assert flight.get_stats()["forgotten"] == 1
+    assert flight.get_stats()["in_flight"] == 0